@@ -0,0 +1,173 @@
+"""
+Vercel 서버리스 핸들러 공통 코어. (파일명이 _로 시작하므로 Vercel 라우트로 노출되지 않음)
+
+- 요청 본문 읽기, JSON/SSE 응답, CORS, 요청별 metrics 기록을 한곳에서 처리합니다.
+- google-genai·feedparser 같은 무거운 모듈은 핸들러 모듈 최상단에서 import하지 않고,
+  warm_up()으로 모듈 로드 직후 백그라운드 스레드에서 미리 import해 둡니다.
+  콜드 스타트 시 런타임 초기화·요청 수신과 import가 겹치고, 요청 경로의 import는
+  이미 끝났거나 진행 중인 import를 기다리기만 합니다.
+- Gemini 클라이언트는 gemini_service의 프로세스 전역 싱글턴이므로 warm 호출 간에 재사용됩니다.
+"""
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler
+from typing import Callable
+
+# 프로젝트 루트를 path에 추가 (Vercel 실행 시)
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+
+def read_json_body(handler: BaseHTTPRequestHandler) -> dict:
+    length = int(handler.headers.get("Content-Length", 0))
+    if length == 0:
+        return {}
+    raw = handler.rfile.read(length)
+    try:
+        return json.loads(raw.decode("utf-8"))
+    except Exception:
+        return {}
+
+
+def send_json(handler: BaseHTTPRequestHandler, status: int, data: dict):
+    """JSON 응답. 요청 헤더에 따라 ETag/304(GET만)와 gzip/brotli 압축을 적용합니다. (http_cache.py)"""
+    from http_cache import encode_response
+    status, body, headers = encode_response(
+        json.dumps(data, ensure_ascii=False).encode("utf-8"),
+        status,
+        handler.headers.get("If-None-Match", ""),
+        handler.headers.get("Accept-Encoding", ""),
+        handler.command,
+    )
+    handler.send_response(status)
+    handler.send_header("Content-Type", "application/json; charset=utf-8")
+    if status != 304:
+        handler.send_header("Content-Length", str(len(body)))
+    for name, value in headers:
+        handler.send_header(name, value)
+    handler.send_header("Access-Control-Allow-Origin", "*")
+    handler.send_header("Access-Control-Expose-Headers", "ETag")
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+def start_sse(handler: BaseHTTPRequestHandler):
+    from sse import SSE_HEADERS
+    handler.send_response(200)
+    for name, value in SSE_HEADERS.items():
+        handler.send_header(name, value)
+    handler.send_header("Access-Control-Allow-Origin", "*")
+    handler.end_headers()
+
+
+def write_sse(handler: BaseHTTPRequestHandler, data, event: str = None):
+    from sse import format_sse
+    handler.wfile.write(format_sse(data, event=event).encode("utf-8"))
+    handler.wfile.flush()
+
+
+def send_sse(handler: BaseHTTPRequestHandler, chunks, result_key: str, prelude=()):
+    """
+    텍스트 조각 이터레이터를 SSE로 흘려보내고, 끝나면 done 이벤트로 전체 결과를 보냅니다.
+    prelude: 텍스트 조각보다 먼저 보낼 (event, data) 목록 (예: 기사 목록 news 이벤트)
+    """
+    start_sse(handler)
+    for event, data in prelude:
+        write_sse(handler, data, event=event)
+    parts = []
+    try:
+        for text in chunks:
+            parts.append(text)
+            write_sse(handler, {"text": text})
+        write_sse(handler, {"ok": True, result_key: "".join(parts)}, event="done")
+    except Exception as e:
+        write_sse(handler, {"ok": False, "error": str(e)}, event="error")
+
+
+def chat_history_from(history) -> list:
+    """프론트엔드의 [{"role", "text"}] 대화 기록을 Gemini 형식으로 바꿉니다."""
+    return [
+        {"role": h.get("role"), "parts": [{"text": h.get("text", "")}]}
+        for h in history
+        if h.get("role") in ("user", "model")
+    ]
+
+
+def warm_up(fn: Callable[[], None]) -> threading.Thread:
+    """fn(무거운 import, 클라이언트 생성 등)을 백그라운드 데몬 스레드에서 실행합니다. 실패는 무시."""
+    def run():
+        try:
+            fn()
+        except Exception:
+            pass
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def warm_gemini() -> None:
+    import gemini_service
+    if os.environ.get("GEMINI_API_KEY"):
+        gemini_service.get_client()
+
+
+def warm_news() -> None:
+    import news_fetcher
+    news_fetcher.warm_up()
+
+
+class JsonHandler(BaseHTTPRequestHandler):
+    """
+    POST JSON API 핸들러 기반 클래스. 하위 클래스는 endpoint를 정하고 handle_json(data)를 구현합니다.
+    GET(쿼리 문자열)도 받으려면 handle_get(params)를 구현합니다. (예: /api/news 폴링)
+    처리되지 않은 예외는 (응답을 시작하기 전이면) 500 JSON 응답으로 바뀝니다.
+    """
+
+    endpoint = "api"
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type, If-None-Match")
+        self.end_headers()
+
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
+
+    def do_POST(self):
+        self._run(lambda: self.handle_json(read_json_body(self)))
+
+    def do_GET(self):
+        from urllib.parse import parse_qsl, urlsplit
+        params = dict(parse_qsl(urlsplit(self.path).query))
+        self._run(lambda: self.handle_get(params))
+
+    def _run(self, fn: Callable[[], None]):
+        # METRICS_LOG=1이면 요청마다 단계별 소요 시간을 JSON 한 줄로 로그에 남김
+        import metrics
+        timing = metrics.start_request(self.endpoint)
+        self._status = None
+        try:
+            fn()
+        except ImportError as e:
+            self._fail("모듈 로드 실패: " + str(e))
+        except Exception as e:
+            self._fail(str(e))
+        finally:
+            metrics.finish_request(timing, self._status or 500)
+
+    def _fail(self, error: str):
+        if self._status is None:  # 아직 응답을 시작하지 않은 경우에만
+            send_json(self, 500, {"ok": False, "error": error})
+
+    def handle_json(self, data: dict):
+        raise NotImplementedError
+
+    def handle_get(self, params: dict):
+        send_json(self, 405, {"ok": False, "error": "Method Not Allowed"})
@@ -0,0 +1,40 @@
+"""
+Vercel 서버리스: 여러 키워드 배치 수집·요약 API. API 키는 환경변수에서만 사용됩니다.
+"""
+import os
+import sys
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+from api._core import JsonHandler, send_json, start_sse, warm_gemini, warm_news, warm_up, write_sse
+
+warm_up(lambda: (warm_news(), warm_gemini()))
+
+
+class handler(JsonHandler):
+    endpoint = "api_batch"
+
+    def handle_json(self, data: dict):
+        from batch import BATCH_MAX_KEYWORDS, iter_batch, normalize_keywords, parse_pack
+        keywords = normalize_keywords(data.get("keywords") or [])
+        if not keywords:
+            send_json(self, 400, {"ok": False, "error": "키워드 목록을 입력하세요."})
+            return
+        if len(keywords) > BATCH_MAX_KEYWORDS:
+            send_json(self, 400, {"ok": False, "error": f"키워드는 최대 {BATCH_MAX_KEYWORDS}개까지 가능합니다."})
+            return
+        summarize = bool(data.get("summarize", True))
+        pack = parse_pack(data.get("pack"))
+        if pack is None:
+            send_json(self, 400, {"ok": False, "error": "pack은 정수여야 합니다."})
+            return
+
+        start_sse(self)
+        try:
+            for item in iter_batch(keywords, max_articles=10, summarize=summarize, pack=pack):
+                write_sse(self, item, event=item.pop("type"))
+            write_sse(self, {"ok": True, "keywords": len(keywords)}, event="done")
+        except Exception as e:
+            write_sse(self, {"ok": False, "error": str(e)}, event="error")
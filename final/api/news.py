@@ -1,57 +1,49 @@
 """
 Vercel 서버리스: 뉴스 수집 API. API 키는 환경변수에서만 사용됩니다.
 """
-import json
 import os
 import sys
-from http.server import BaseHTTPRequestHandler
 
 # 프로젝트 루트를 path에 추가 (Vercel 실행 시)
 _root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if _root not in sys.path:
     sys.path.insert(0, _root)
 
+from api._core import JsonHandler, send_json, send_sse, warm_gemini, warm_news, warm_up
 
-def _read_json_body(handler: BaseHTTPRequestHandler):
-    length = int(handler.headers.get("Content-Length", 0))
-    if length == 0:
-        return {}
-    raw = handler.rfile.read(length)
-    try:
-        return json.loads(raw.decode("utf-8"))
-    except Exception:
-        return {}
+# 요약 동시 요청("summarize": true)에 대비해 Gemini 클라이언트도 미리 준비
+warm_up(lambda: (warm_news(), warm_gemini()))
 
 
-def _send_json(handler: BaseHTTPRequestHandler, status: int, data: dict):
-    handler.send_response(status)
-    handler.send_header("Content-Type", "application/json; charset=utf-8")
-    handler.send_header("Access-Control-Allow-Origin", "*")
-    handler.end_headers()
-    handler.wfile.write(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+class handler(JsonHandler):
+    endpoint = "api_news"
 
-
-class handler(BaseHTTPRequestHandler):
-    def do_OPTIONS(self):
-        self.send_response(204)
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Methods", "POST, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type")
-        self.end_headers()
-
-    def do_POST(self):
-        try:
-            from news_fetcher import fetch_google_news
-        except Exception as e:
-            _send_json(self, 500, {"ok": False, "error": "모듈 로드 실패: " + str(e)})
+    def handle_json(self, data: dict):
+        from news_fetcher import fetch_google_news
+        from prewarm import record_keyword
+        from feed_diff import changes_for
+        keyword = (data.get("keyword") or "").strip()
+        if not keyword:
+            send_json(self, 400, {"ok": False, "error": "키워드를 입력하세요."})
+            return
+        record_keyword(keyword)
+        articles = fetch_google_news(keyword, max_articles=10)
+        result = {"ok": True, "articles": articles, "changes": changes_for(keyword, articles)}
+        if not data.get("summarize"):
+            send_json(self, 200, result)
+            return
+        # 같은 호출 안에서 요약까지: 기사 목록을 news 이벤트로 먼저 보내고 요약을 스트리밍
+        # (/api/summarize 호출과 기사 목록 재업로드가 필요 없음)
+        from gemini_service import summarize_news_stream
+        send_sse(self, summarize_news_stream(keyword, articles), "summary", prelude=[("news", result)])
+
+    def handle_get(self, params: dict):
+        # 폴링용 기사 목록 조회 (인기 키워드 집계 제외). 기사 묶음이 그대로면 send_json이 304로 응답
+        from news_fetcher import fetch_google_news
+        from feed_diff import changes_for
+        keyword = (params.get("keyword") or "").strip()
+        if not keyword:
+            send_json(self, 400, {"ok": False, "error": "키워드를 입력하세요."})
             return
-        try:
-            data = _read_json_body(self)
-            keyword = (data.get("keyword") or "").strip()
-            if not keyword:
-                _send_json(self, 400, {"ok": False, "error": "키워드를 입력하세요."})
-                return
-            articles = fetch_google_news(keyword, max_articles=10)
-            _send_json(self, 200, {"ok": True, "articles": articles})
-        except Exception as e:
-            _send_json(self, 500, {"ok": False, "error": str(e)})
+        articles = fetch_google_news(keyword, max_articles=10)
+        send_json(self, 200, {"ok": True, "articles": articles, "changes": changes_for(keyword, articles)})
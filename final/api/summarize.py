@@ -1,57 +1,30 @@
 """
 Vercel 서버리스: 뉴스 요약 API. API 키는 환경변수에서만 사용됩니다.
 """
-import json
 import os
 import sys
-from http.server import BaseHTTPRequestHandler
 
 _root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if _root not in sys.path:
     sys.path.insert(0, _root)
 
+from api._core import JsonHandler, send_json, send_sse, warm_gemini, warm_up
 
-def _read_json_body(handler: BaseHTTPRequestHandler):
-    length = int(handler.headers.get("Content-Length", 0))
-    if length == 0:
-        return {}
-    raw = handler.rfile.read(length)
-    try:
-        return json.loads(raw.decode("utf-8"))
-    except Exception:
-        return {}
+warm_up(warm_gemini)
 
 
-def _send_json(handler: BaseHTTPRequestHandler, status: int, data: dict):
-    handler.send_response(status)
-    handler.send_header("Content-Type", "application/json; charset=utf-8")
-    handler.send_header("Access-Control-Allow-Origin", "*")
-    handler.end_headers()
-    handler.wfile.write(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+class handler(JsonHandler):
+    endpoint = "api_summarize"
 
-
-class handler(BaseHTTPRequestHandler):
-    def do_OPTIONS(self):
-        self.send_response(204)
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Methods", "POST, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type")
-        self.end_headers()
-
-    def do_POST(self):
-        try:
-            from gemini_service import summarize_news
-        except Exception as e:
-            _send_json(self, 500, {"ok": False, "error": "모듈 로드 실패: " + str(e)})
+    def handle_json(self, data: dict):
+        from gemini_service import summarize_news, summarize_news_stream
+        keyword = (data.get("keyword") or "").strip()
+        articles = data.get("articles") or []
+        if not articles:
+            send_json(self, 400, {"ok": False, "error": "먼저 뉴스를 수집하세요."})
+            return
+        if data.get("stream"):
+            send_sse(self, summarize_news_stream(keyword, articles), "summary")
             return
-        try:
-            data = _read_json_body(self)
-            keyword = (data.get("keyword") or "").strip()
-            articles = data.get("articles") or []
-            if not articles:
-                _send_json(self, 400, {"ok": False, "error": "먼저 뉴스를 수집하세요."})
-                return
-            summary = summarize_news(keyword, articles)
-            _send_json(self, 200, {"ok": True, "summary": summary})
-        except Exception as e:
-            _send_json(self, 500, {"ok": False, "error": str(e)})
+        summary = summarize_news(keyword, articles)
+        send_json(self, 200, {"ok": True, "summary": summary})
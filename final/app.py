@@ -108,6 +108,7 @@ def main():
                                 keyword=st.session_state.keyword,
                                 summary=st.session_state.summary,
                                 chat_history=st.session_state.chat_history[:-1],
+                                articles=st.session_state.articles,
                             )
                             st.write(reply)
                             st.session_state.chat_history.append({
@@ -0,0 +1,250 @@
+"""
+뉴스 챗봇 ASGI 앱: asyncio 기반 수집·요약·대화 API
+
+app_web.py(동기 Flask)와 달리 RSS 다운로드·Gemini 호출을 기다리는 동안 워커를 점유하지 않으므로,
+한 프로세스에서 수백 건의 LLM 호출을 동시에 처리할 수 있습니다.
+API 계약은 Vercel 서버리스(api/*.py)와 같습니다. (세션 없이 요청 본문에 keyword/articles/summary 전달)
+
+실행: uvicorn app_asgi:app --host 0.0.0.0 --port 5000
+"""
+import contextvars
+import json
+import os
+from urllib.parse import parse_qsl
+
+import http_cache
+import metrics
+from news_fetcher import fetch_google_news_async
+from gemini_service import (
+    summarize_news_async,
+    chat_with_news_async,
+    summarize_news_stream_async,
+    chat_with_news_stream_async,
+)
+from feed_diff import changes_for
+from prewarm import record_keyword
+from sse import SSE_HEADERS, format_sse
+
+_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "public", "index.html")
+
+_CORS_HEADERS = [(b"access-control-allow-origin", b"*")]
+
+# 현재 요청의 헤더 (소문자 이름 → 값). _send_json이 ETag/압축 협상에 사용
+_request_headers: "contextvars.ContextVar[dict]" = contextvars.ContextVar("newsbot_request_headers", default={})
+# 현재 요청의 메서드. ETag/304는 GET에만 적용
+_request_method: "contextvars.ContextVar[str]" = contextvars.ContextVar("newsbot_request_method", default="GET")
+
+
+async def _read_json_body(receive) -> dict:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    raw = b"".join(chunks)
+    if not raw:
+        return {}
+    try:
+        return json.loads(raw.decode("utf-8"))
+    except Exception:
+        return {}
+
+
+async def _send_json(send, status: int, data: dict):
+    """JSON 응답. 요청 헤더에 따라 ETag/304(GET만)와 gzip/brotli 압축을 적용합니다. (http_cache.py)"""
+    request_headers = _request_headers.get()
+    status, body, extra = http_cache.encode_response(
+        json.dumps(data, ensure_ascii=False).encode("utf-8"),
+        status,
+        request_headers.get("if-none-match", ""),
+        request_headers.get("accept-encoding", ""),
+        _request_method.get(),
+    )
+    headers = [(b"content-type", b"application/json; charset=utf-8")]
+    if status != 304:
+        headers.append((b"content-length", str(len(body)).encode()))
+    headers += [(name.lower().encode(), value.encode()) for name, value in extra]
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": headers + _CORS_HEADERS + [(b"access-control-expose-headers", b"ETag")],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_sse(send, chunks, result_key: str, prelude=()):
+    """
+    비동기 텍스트 조각 이터레이터를 SSE로 흘려보내고, 끝나면 done 이벤트로 전체 결과를 보냅니다.
+    prelude: 텍스트 조각보다 먼저 보낼 (event, data) 목록
+    """
+    headers = [(k.lower().encode(), v.encode()) for k, v in SSE_HEADERS.items()]
+    await send({"type": "http.response.start", "status": 200, "headers": headers + _CORS_HEADERS})
+    for event, data in prelude:
+        await send({"type": "http.response.body", "body": format_sse(data, event=event).encode("utf-8"), "more_body": True})
+    parts = []
+    try:
+        async for text in chunks:
+            parts.append(text)
+            await send({"type": "http.response.body", "body": format_sse({"text": text}).encode("utf-8"), "more_body": True})
+        event = format_sse({"ok": True, result_key: "".join(parts)}, event="done")
+    except Exception as e:
+        event = format_sse({"ok": False, "error": str(e)}, event="error")
+    await send({"type": "http.response.body", "body": event.encode("utf-8")})
+
+
+def _chat_history_from(history):
+    return [
+        {"role": h.get("role"), "parts": [{"text": h.get("text", "")}]}
+        for h in history
+        if h.get("role") in ("user", "model")
+    ]
+
+
+async def api_news(data: dict, send):
+    keyword = (data.get("keyword") or "").strip()
+    if not keyword:
+        await _send_json(send, 400, {"ok": False, "error": "키워드를 입력하세요."})
+        return
+    record_keyword(keyword)
+    articles = await fetch_google_news_async(keyword, max_articles=10)
+    result = {"ok": True, "articles": articles, "changes": changes_for(keyword, articles)}
+    if data.get("summarize"):
+        # 기사 목록(news 이벤트) 뒤에 같은 응답으로 요약을 스트리밍
+        await _send_sse(send, summarize_news_stream_async(keyword, articles), "summary", prelude=[("news", result)])
+        return
+    await _send_json(send, 200, result)
+
+
+async def api_news_poll(data: dict, send):
+    """GET /api/news?keyword=...: 폴링용 기사 목록 조회 (인기 키워드 집계 제외, 기사 묶음이 그대로면 304)."""
+    keyword = (data.get("keyword") or "").strip()
+    if not keyword:
+        await _send_json(send, 400, {"ok": False, "error": "키워드를 입력하세요."})
+        return
+    articles = await fetch_google_news_async(keyword, max_articles=10)
+    await _send_json(send, 200, {"ok": True, "articles": articles, "changes": changes_for(keyword, articles)})
+
+
+async def api_summarize(data: dict, send):
+    keyword = (data.get("keyword") or "").strip()
+    articles = data.get("articles") or []
+    if not articles:
+        await _send_json(send, 400, {"ok": False, "error": "먼저 뉴스를 수집하세요."})
+        return
+    if data.get("stream"):
+        await _send_sse(send, summarize_news_stream_async(keyword, articles), "summary")
+        return
+    summary = await summarize_news_async(keyword, articles)
+    await _send_json(send, 200, {"ok": True, "summary": summary})
+
+
+async def api_chat(data: dict, send):
+    message = (data.get("message") or "").strip()
+    history = data.get("history") or []
+    summary = (data.get("summary") or "").strip()
+    keyword = (data.get("keyword") or "").strip()
+    if not summary:
+        await _send_json(send, 400, {"ok": False, "error": "먼저 뉴스를 수집하고 요약하세요."})
+        return
+    if not message:
+        await _send_json(send, 400, {"ok": False, "error": "메시지를 입력하세요."})
+        return
+    chat_history = _chat_history_from(history)
+    articles = data.get("articles") or None  # 관련 기사 검색용
+    if data.get("stream"):
+        await _send_sse(send, chat_with_news_stream_async(message, keyword, summary, chat_history, articles), "reply")
+        return
+    reply = await chat_with_news_async(message, keyword, summary, chat_history, articles)
+    await _send_json(send, 200, {"ok": True, "reply": reply})
+
+
+ROUTES = {
+    "/api/news": api_news,
+    "/api/summarize": api_summarize,
+    "/api/chat": api_chat,
+}
+
+GET_ROUTES = {
+    "/api/news": api_news_poll,
+}
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    method = scope["method"]
+    path = scope["path"].rstrip("/") or "/"
+
+    if method == "OPTIONS":
+        await send({
+            "type": "http.response.start",
+            "status": 204,
+            "headers": _CORS_HEADERS + [
+                (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+                (b"access-control-allow-headers", b"Content-Type, If-None-Match"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    if method == "GET" and path == "/":
+        with open(_INDEX_PATH, "rb") as f:
+            body = f.read()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/html; charset=utf-8")],
+        })
+        await send({"type": "http.response.body", "body": body})
+        return
+
+    if method == "GET" and path == "/metrics":
+        body = metrics.render_prometheus().encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/plain; version=0.0.4; charset=utf-8")],
+        })
+        await send({"type": "http.response.body", "body": body})
+        return
+
+    _request_headers.set({k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])})
+    _request_method.set(method)
+    route = (GET_ROUTES if method == "GET" else ROUTES if method == "POST" else {}).get(path)
+    if route is None:
+        await _send_json(send, 404, {"ok": False, "error": "Not Found"})
+        return
+
+    timing = metrics.start_request(route.__name__)
+    status = [500]
+
+    async def timed_send(message):
+        if message["type"] == "http.response.start":
+            status[0] = message["status"]
+        await send(message)
+
+    if method == "GET":
+        data = dict(parse_qsl(scope.get("query_string", b"").decode("latin-1")))
+    else:
+        data = await _read_json_body(receive)
+    try:
+        await route(data, timed_send)
+    except Exception as e:
+        await _send_json(timed_send, 500, {"ok": False, "error": str(e)})
+    finally:
+        metrics.finish_request(timing, status[0])
@@ -3,13 +3,74 @@
 """
 import os
 import json
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, Response, g, render_template, request, jsonify, session, stream_with_context
 
-from news_fetcher import fetch_google_news
-from gemini_service import summarize_news, chat_with_news
+from news_fetcher import fetch_google_news, feed_cache_stats
+from gemini_service import (
+    summarize_news,
+    chat_with_news,
+    summarize_news_stream,
+    chat_with_news_stream,
+    get_cached_summary,
+    summary_cache_stats,
+)
+import http_cache
+import metrics
+import prewarm
+import session_store
+from feed_diff import changes_for
+from prompt_builder import prompt_stats
+from rate_limit import limiter_stats
+from model_router import router_stats
+from article_fetcher import article_cache_stats
+from chat_context import chat_context_stats
+from batch import BATCH_MAX_KEYWORDS, iter_batch, normalize_keywords, parse_pack
+from sse import SSE_HEADERS, format_sse
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("SECRET_KEY", "news-chatbot-secret-change-in-production")
+# 기사·요약은 서버 측 세션 저장소에 두고 쿠키에는 세션 ID만 담음 (SESSION_BACKEND, session_store.py)
+session_store.init_app(app)
+
+# 인기 키워드 사전 갱신 (gunicorn 워커마다 실행되므로 별도 prewarm 프로세스를 쓰는 경우 끄기)
+if os.environ.get("PREWARM_ENABLED") == "1":
+    prewarm.start_background()
+
+
+@app.before_request
+def _start_timing():
+    if request.endpoint and request.endpoint != "static":
+        g.metrics = metrics.start_request(request.endpoint)
+
+
+@app.after_request
+def _finish_timing(response):
+    handle = g.pop("metrics", None)
+    if handle is not None:
+        # 스트리밍 응답은 본문 전송이 끝난 뒤(close)에 기록해야 단계별 시간이 모두 포함됨
+        status = response.status_code
+        response.call_on_close(lambda: metrics.finish_request(handle, status))
+    return response
+
+
+@app.after_request
+def _encode_json(response):
+    # JSON 응답에 ETag(GET의 If-None-Match면 304)와 gzip/brotli 압축 적용 (SSE 등 스트리밍 응답은 그대로)
+    # after_request는 등록 역순으로 실행되므로 _finish_timing보다 먼저 실행되어 304 상태가 기록됨
+    if response.mimetype != "application/json" or response.is_streamed or response.direct_passthrough:
+        return response
+    status, body, headers = http_cache.encode_response(
+        response.get_data(),
+        response.status_code,
+        request.headers.get("If-None-Match", ""),
+        request.headers.get("Accept-Encoding", ""),
+        request.method,
+    )
+    response.status_code = status
+    response.set_data(body)
+    for name, value in headers:
+        response.headers[name] = value
+    return response
 
 
 @app.route("/")
@@ -19,16 +80,46 @@ def index():
 
 @app.route("/api/news", methods=["POST"])
 def api_news():
+    """
+    키워드로 뉴스를 수집합니다.
+    요청에 "summarize": true 가 있으면 수집 직후 요약을 시작해 같은 응답(SSE)으로 보냅니다.
+    (news 이벤트로 기사 목록 → 요약 텍스트 조각 → done 이벤트, /api/summarize 왕복 1회 절약)
+    """
     data = request.get_json() or {}
     keyword = (data.get("keyword") or "").strip()
     if not keyword:
         return jsonify({"ok": False, "error": "키워드를 입력하세요."}), 400
+    prewarm.record_keyword(keyword)
     try:
         articles = fetch_google_news(keyword, max_articles=10)
         session["keyword"] = keyword
         session["articles"] = articles
         session["summary"] = ""
-        return jsonify({"ok": True, "articles": articles})
+        result = {"ok": True, "articles": articles, "changes": changes_for(keyword, articles)}
+    except Exception as e:
+        return jsonify({"ok": False, "error": str(e)}), 500
+    if not data.get("summarize"):
+        return jsonify(result)
+
+    def generate():
+        yield format_sse(result, event="news")
+        yield from _summary_events(keyword, articles)
+
+    return Response(stream_with_context(generate()), headers=SSE_HEADERS)
+
+
+@app.route("/api/news", methods=["GET"])
+def api_news_poll():
+    """
+    기사 목록만 조회합니다. (폴링용: 세션과 인기 키워드 집계를 바꾸지 않음)
+    기사 묶음이 그대로면 If-None-Match로 보낸 ETag가 일치해 304(본문 없음)로 응답합니다.
+    """
+    keyword = (request.args.get("keyword") or "").strip()
+    if not keyword:
+        return jsonify({"ok": False, "error": "키워드를 입력하세요."}), 400
+    try:
+        articles = fetch_google_news(keyword, max_articles=10)
+        return jsonify({"ok": True, "articles": articles, "changes": changes_for(keyword, articles)})
     except Exception as e:
         return jsonify({"ok": False, "error": str(e)}), 500
 
@@ -47,30 +138,141 @@ def api_summarize():
         return jsonify({"ok": False, "error": str(e)}), 500
 
 
+def _summary_events(keyword: str, articles):
+    """요약 텍스트 조각을 SSE로 yield하고, 완성된 요약은 (서버 측) 세션에 저장한 뒤 done 이벤트를 보냅니다."""
+    parts = []
+    try:
+        for text in summarize_news_stream(keyword, articles):
+            parts.append(text)
+            yield format_sse({"text": text})
+        session["summary"] = "".join(parts)
+        session_store.persist_session(app, session)
+        yield format_sse({"ok": True, "summary": session["summary"]}, event="done")
+    except Exception as e:
+        yield format_sse({"ok": False, "error": str(e)}, event="error")
+
+
+@app.route("/api/summarize/stream", methods=["POST"])
+def api_summarize_stream():
+    """요약을 생성되는 대로 SSE로 전송합니다. 완성된 요약은 요약 캐시와 (서버 측) 세션에 저장됩니다."""
+    keyword = session.get("keyword", "")
+    articles = session.get("articles", [])
+    if not articles:
+        return jsonify({"ok": False, "error": "먼저 뉴스를 수집하세요."}), 400
+    return Response(stream_with_context(_summary_events(keyword, articles)), headers=SSE_HEADERS)
+
+
+def _current_summary() -> str:
+    # 쿠키 세션(SESSION_BACKEND=cookie)에는 스트리밍 요약을 저장할 수 없음 → 요약 캐시에서 조회
+    summary = session.get("summary", "")
+    if not summary:
+        summary = get_cached_summary(session.get("keyword", ""), session.get("articles", [])) or ""
+    return summary
+
+
+def _chat_history_from(history):
+    # history: [ { "role": "user"|"model", "text": "..." } ]
+    return [
+        {"role": h.get("role"), "parts": [{"text": h.get("text", "")}]}
+        for h in history
+        if h.get("role") in ("user", "model")
+    ]
+
+
+@app.route("/api/chat/stream", methods=["POST"])
+def api_chat_stream():
+    """챗봇 답변을 생성되는 대로 SSE로 전송합니다."""
+    data = request.get_json() or {}
+    message = (data.get("message") or "").strip()
+    history = data.get("history") or []
+    summary = _current_summary()
+    keyword = session.get("keyword", "")
+    articles = session.get("articles", [])
+    if not summary:
+        return jsonify({"ok": False, "error": "먼저 뉴스를 수집하고 요약하세요."}), 400
+    if not message:
+        return jsonify({"ok": False, "error": "메시지를 입력하세요."}), 400
+    chat_history = _chat_history_from(history)
+
+    def generate():
+        parts = []
+        try:
+            for text in chat_with_news_stream(message, keyword, summary, chat_history, articles):
+                parts.append(text)
+                yield format_sse({"text": text})
+            yield format_sse({"ok": True, "reply": "".join(parts)}, event="done")
+        except Exception as e:
+            yield format_sse({"ok": False, "error": f"응답 생성 중 오류가 발생했습니다: {e}"}, event="error")
+
+    return Response(stream_with_context(generate()), headers=SSE_HEADERS)
+
+
 @app.route("/api/chat", methods=["POST"])
 def api_chat():
     data = request.get_json() or {}
     message = (data.get("message") or "").strip()
     history = data.get("history") or []
-    summary = session.get("summary", "")
+    summary = _current_summary()
     keyword = session.get("keyword", "")
+    articles = session.get("articles", [])
     if not summary:
         return jsonify({"ok": False, "error": "먼저 뉴스를 수집하고 요약하세요."}), 400
     if not message:
         return jsonify({"ok": False, "error": "메시지를 입력하세요."}), 400
-    # history: [ { "role": "user"|"model", "text": "..." } ]
-    chat_history = [
-        {"role": h.get("role"), "parts": [{"text": h.get("text", "")}]}
-        for h in history
-        if h.get("role") in ("user", "model")
-    ]
+    chat_history = _chat_history_from(history)
     try:
-        reply = chat_with_news(message, keyword, summary, chat_history)
+        reply = chat_with_news(message, keyword, summary, chat_history, articles)
         return jsonify({"ok": True, "reply": reply})
     except Exception as e:
         return jsonify({"ok": False, "error": str(e)}), 500
 
 
+@app.route("/api/batch", methods=["POST"])
+def api_batch():
+    """
+    여러 키워드를 동시에 수집·요약해 끝나는 대로 SSE로 전송합니다.
+    요청: {"keywords": [...], "summarize": true, "pack": 1}
+    이벤트: news / summary / error, 마지막에 done
+    """
+    data = request.get_json() or {}
+    keywords = normalize_keywords(data.get("keywords") or [])
+    if not keywords:
+        return jsonify({"ok": False, "error": "키워드 목록을 입력하세요."}), 400
+    if len(keywords) > BATCH_MAX_KEYWORDS:
+        return jsonify({"ok": False, "error": f"키워드는 최대 {BATCH_MAX_KEYWORDS}개까지 가능합니다."}), 400
+    summarize = bool(data.get("summarize", True))
+    pack = parse_pack(data.get("pack"))
+    if pack is None:
+        return jsonify({"ok": False, "error": "pack은 정수여야 합니다."}), 400
+
+    def generate():
+        for item in iter_batch(keywords, max_articles=10, summarize=summarize, pack=pack):
+            yield format_sse(item, event=item.pop("type"))
+        yield format_sse({"ok": True, "keywords": len(keywords)}, event="done")
+
+    return Response(stream_with_context(generate()), headers=SSE_HEADERS)
+
+
+@app.route("/api/stats", methods=["GET"])
+def api_stats():
+    return jsonify({
+        "ok": True,
+        "feed_cache": feed_cache_stats(),
+        "summary_cache": summary_cache_stats(),
+        "prompt": prompt_stats(),
+        "gemini_limiter": limiter_stats(),
+        "gemini_router": router_stats(),
+        "chat_context": chat_context_stats(),
+        "articles": article_cache_stats(),
+    })
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Prometheus 스크레이프용 메트릭 (단계별 지연, 요청 지연, 토큰 수, 캐시 적중)."""
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port, debug=True)
@@ -0,0 +1,174 @@
+"""
+기사 HTML에서 본문 텍스트를 뽑는 경량 추출기. (article_fetcher가 사용)
+
+readability 계열과 같은 방식을 단순화했습니다.
+- html.parser로 한 번 훑으며 script/style/nav/header/footer/aside 등은 건너뛰고,
+  블록 태그(p, div, br, li ...) 경계마다 텍스트 덩어리를 만듭니다.
+- 덩어리를 가장 가까운 컨테이너(article/div/section/td/main)에 배정하고, 링크 비율이 높거나
+  너무 짧은 덩어리는 메뉴·관련 기사 목록으로 보고 점수에서 뺍니다.
+- 점수(본문 길이, 부모 컨테이너에는 절반)가 가장 높은 컨테이너 아래 덩어리를 순서대로 이어 붙입니다.
+  본문을 찾지 못하면 og:description / description 메타 태그를 사용합니다.
+trafilatura가 설치되어 있고 ARTICLE_EXTRACTOR=trafilatura 이면 그쪽을 사용합니다.
+"""
+import os
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+ARTICLE_EXTRACTOR = os.environ.get("ARTICLE_EXTRACTOR", "builtin").strip().lower()
+
+_SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "nav", "header", "footer",
+    "aside", "form", "button", "select", "iframe", "figure", "figcaption",
+}
+_CONTAINER_TAGS = {"article", "div", "section", "td", "main", "body"}
+_BLOCK_TAGS = _CONTAINER_TAGS | {"p", "br", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6",
+                                 "blockquote", "table", "tr", "dd", "dt", "pre", "hr"}
+_VOID_TAGS = {"br", "hr", "img", "meta", "link", "input", "source", "wbr", "area", "base", "col", "embed"}
+# id/class에 이런 이름이 있으면 본문일 가능성이 높음 / 낮음
+_POSITIVE_RE = re.compile(r"article|body|content|news|text|story|main|view", re.I)
+_NEGATIVE_RE = re.compile(r"comment|reply|footer|sidebar|banner|ad[-_]|related|recommend|share|sns|copyright|menu|popular|rank", re.I)
+
+MIN_BLOCK_CHARS = 25  # 이보다 짧은 덩어리는 점수에 넣지 않음
+MAX_LINK_RATIO = 0.5  # 링크 글자 비율이 이보다 높으면 목록으로 봄
+
+
+class _Block:
+    __slots__ = ("text", "links", "path")
+
+    def __init__(self, text: str, links: int, path: Tuple[int, ...]):
+        self.text = text
+        self.links = links
+        self.path = path  # 바깥쪽부터의 컨테이너 번호들
+
+
+class _BlockParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack: List[Tuple[str, int]] = []  # (태그, 컨테이너 번호 또는 -1)
+        self.containers: List[float] = []  # 컨테이너별 가중치 (id/class 힌트)
+        self.blocks: List[_Block] = []
+        self.meta: Dict[str, str] = {}
+        self.skip = 0
+        self.in_link = 0
+        self.buf: List[str] = []
+        self.link_chars = 0
+
+    def _path(self) -> Tuple[int, ...]:
+        return tuple(n for _, n in self.stack if n >= 0)
+
+    def _flush(self) -> None:
+        if not self.buf:
+            return
+        text = " ".join("".join(self.buf).split())
+        if text:
+            self.blocks.append(_Block(text, min(self.link_chars, len(text)), self._path()))
+        self.buf = []
+        self.link_chars = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "meta":
+            attrs_d = dict(attrs)
+            name = (attrs_d.get("property") or attrs_d.get("name") or "").lower()
+            if name in ("og:description", "description") and attrs_d.get("content"):
+                self.meta.setdefault(name, attrs_d["content"])
+            return
+        if tag in _VOID_TAGS:
+            if tag in _BLOCK_TAGS and not self.skip:
+                self._flush()
+            return
+        if tag in _SKIP_TAGS:
+            self.skip += 1
+        if tag in _BLOCK_TAGS and not self.skip:
+            self._flush()
+        number = -1
+        if tag in _CONTAINER_TAGS:
+            hint = " ".join(v or "" for k, v in attrs if k in ("id", "class", "itemprop"))
+            weight = 1.0
+            if tag == "article" or "articleBody" in hint:
+                weight = 1.5
+            elif _NEGATIVE_RE.search(hint):
+                weight = 0.3
+            elif _POSITIVE_RE.search(hint):
+                weight = 1.2
+            number = len(self.containers)
+            self.containers.append(weight)
+        if tag == "a":
+            self.in_link += 1
+        self.stack.append((tag, number))
+
+    def handle_endtag(self, tag):
+        if tag in _VOID_TAGS:
+            return
+        # 닫히지 않은 태그가 섞여 있어도 가장 가까운 같은 태그까지 되감음
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i][0] == tag:
+                break
+        else:
+            return
+        if tag in _BLOCK_TAGS and not self.skip:
+            self._flush()
+        for open_tag, _ in self.stack[i:]:
+            if open_tag in _SKIP_TAGS:
+                self.skip -= 1
+            if open_tag == "a":
+                self.in_link -= 1
+        del self.stack[i:]
+
+    def handle_data(self, data):
+        if self.skip:
+            return
+        self.buf.append(data)
+        if self.in_link:
+            self.link_chars += len(data.strip())
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def _is_content(block: _Block) -> bool:
+    return len(block.text) >= MIN_BLOCK_CHARS and block.links / len(block.text) <= MAX_LINK_RATIO
+
+
+def _builtin_extract(html: str) -> str:
+    parser = _BlockParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        # 깨진 HTML이어도 그때까지 모은 덩어리로 진행
+        parser._flush()
+
+    scores: Dict[int, float] = {}
+    for block in parser.blocks:
+        if not block.path or not _is_content(block):
+            continue
+        inner = block.path[-1]
+        scores[inner] = scores.get(inner, 0.0) + len(block.text) * parser.containers[inner]
+        if len(block.path) > 1:
+            outer = block.path[-2]
+            scores[outer] = scores.get(outer, 0.0) + len(block.text) * parser.containers[outer] / 2
+
+    if scores:
+        best = max(scores, key=scores.get)
+        texts = [b.text for b in parser.blocks
+                 if best in b.path and (_is_content(b) or len(b.text) >= 10 and not b.links)]
+        if texts:
+            return "\n".join(texts)
+    return parser.meta.get("og:description") or parser.meta.get("description") or ""
+
+
+def extract_text(html: str, url: Optional[str] = None) -> str:
+    """HTML 문서에서 기사 본문을 문단(줄) 단위 텍스트로 반환합니다. 찾지 못하면 빈 문자열."""
+    if not html:
+        return ""
+    if ARTICLE_EXTRACTOR == "trafilatura":
+        try:
+            import trafilatura  # 선택 의존성
+            text = trafilatura.extract(html, url=url, include_comments=False, include_tables=False)
+            if text:
+                return text.strip()
+        except ImportError:
+            pass
+    return _builtin_extract(html).strip()
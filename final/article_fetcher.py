@@ -0,0 +1,433 @@
+"""
+기사 본문 수집 (요약 품질 향상용 선택 단계, ARTICLE_FULLTEXT=1).
+
+RSS의 기사 요약은 제목 수준의 짧은 문장뿐이라, 요약 전에 기사 링크를 내려받아 본문을 붙입니다.
+- 기사 10건을 스레드 풀(ARTICLE_FETCH_WORKERS)로 동시에 받고, 호스트별 동시 연결은
+  ARTICLE_PER_HOST개로 제한합니다. 각 요청은 ARTICLE_TIMEOUT, 전체는 ARTICLE_DEADLINE 안에 끝내며,
+  시간 안에 못 받은 기사는 RSS 요약만으로 요약합니다. (늦게 끝난 다운로드도 캐시에는 저장)
+- 본문은 article_extractor로 추출해 기사당 ARTICLE_TEXT_TOKENS 토큰으로 자릅니다.
+- 결과는 디스크 캐시(ARTICLE_CACHE_DIR)에 저장합니다. URL → 내용 해시 → 본문의 두 단계라,
+  다른 키워드·사용자가 같은 기사를 요청하면 다운로드·파싱 없이 재사용하고, 다시 받은 HTML이
+  같으면 추출을 건너뜁니다. 전체 크기가 ARTICLE_CACHE_MAX_MB를 넘으면 오래 안 쓴 파일부터 지웁니다.
+- 같은 URL을 동시에 요청하면 한 번만 받습니다. (singleflight)
+- 요청 본문으로 들어온 임의의 링크를 서버가 대신 받지 않도록, 서버가 자기 피드에서 받은 링크(allowed)만 받습니다.
+  받을 때도 http/https만 허용하고, 호스트 주소가 사설·루프백·링크 로컬 등이면 거부하며,
+  리다이렉트는 직접 따라가며 단계마다 같은 검사를 합니다. (ARTICLE_ALLOW_PRIVATE=1이면 주소 검사 생략, 로컬 벤치마크용)
+- Google News 링크는 원문 URL을 꺼낼 수 있을 때만 받습니다. 꺼낼 수 없으면(최근 형식의 불투명 id)
+  news.google.com이 주는 안내·동의 페이지를 본문으로 오인하지 않도록 다운로드·캐시 없이 건너뜁니다.
+"""
+import base64
+import hashlib
+import ipaddress
+import json
+import os
+import re
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Collection, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import metrics
+from article_extractor import extract_text
+from cache import TTLCache
+from singleflight import SingleFlight
+from tokens import estimate_tokens
+
+ARTICLE_FULLTEXT = os.environ.get("ARTICLE_FULLTEXT") == "1"
+ARTICLE_FETCH_WORKERS = int(os.environ.get("ARTICLE_FETCH_WORKERS", "10"))
+ARTICLE_PER_HOST = int(os.environ.get("ARTICLE_PER_HOST", "2"))
+ARTICLE_TIMEOUT = float(os.environ.get("ARTICLE_TIMEOUT", "4"))  # 요청당 연결·읽기 타임아웃(초)
+ARTICLE_DEADLINE = float(os.environ.get("ARTICLE_DEADLINE", "6"))  # 기사 묶음 전체 대기 시간(초)
+ARTICLE_MAX_BYTES = int(os.environ.get("ARTICLE_MAX_BYTES", str(2 * 1024 * 1024)))
+ARTICLE_TEXT_TOKENS = int(os.environ.get("ARTICLE_TEXT_TOKENS", "250"))  # 기사당 본문 토큰 예산
+ARTICLE_CACHE_DIR = os.environ.get("ARTICLE_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "newsbot_articles")
+ARTICLE_CACHE_MAX_MB = float(os.environ.get("ARTICLE_CACHE_MAX_MB", "200"))
+ARTICLE_CACHE_TTL = float(os.environ.get("ARTICLE_CACHE_TTL", str(24 * 3600)))  # URL → 본문 유지 시간(초)
+ARTICLE_FAIL_TTL = 600.0  # 받지 못한 URL을 다시 시도하기까지의 시간(초)
+ARTICLE_MAX_REDIRECTS = int(os.environ.get("ARTICLE_MAX_REDIRECTS", "5"))
+ARTICLE_ALLOW_PRIVATE = os.environ.get("ARTICLE_ALLOW_PRIVATE") == "1"
+_REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+_USER_AGENT = "Mozilla/5.0 (compatible; NewsChatbot/1.0)"
+_CHARSET_RE = re.compile(rb"""<meta[^>]+charset=["']?([A-Za-z0-9_-]+)""", re.I)
+_URL_IN_BYTES_RE = re.compile(rb"https?://[\x21-\x7e]+")
+_SENTENCE_END_RE = re.compile(r"[.!?。](?=\s)|\n")
+
+
+class DiskCache:
+    """
+    디렉터리 기반 캐시. 파일을 임시 이름으로 쓴 뒤 교체(os.replace)하므로 여러 워커 프로세스가
+    같은 디렉터리를 써도 깨진 파일을 읽지 않습니다. 읽을 때 mtime을 갱신해 LRU 순서로 정리합니다.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None  # 첫 쓰기 때 디렉터리를 훑어 계산
+        self.evicted = 0
+
+    def _file(self, kind: str, key: str) -> str:
+        return os.path.join(self.path, kind, key[:2], key)
+
+    def read(self, kind: str, key: str) -> Optional[bytes]:
+        path = self._file(kind, key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except OSError:
+            return None
+
+    def write(self, kind: str, key: str, data: bytes) -> None:
+        path = self._file(kind, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._scan())
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _scan(self):
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+    def _evict(self) -> None:
+        # 최대 크기의 80%가 될 때까지 가장 오래 사용하지 않은 파일부터 삭제
+        entries = sorted(self._scan(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.8
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evicted += 1
+        self._size = total
+
+
+_disk = DiskCache(ARTICLE_CACHE_DIR, int(ARTICLE_CACHE_MAX_MB * 1024 * 1024))
+_memory = TTLCache(maxsize=512, ttl=ARTICLE_CACHE_TTL)  # URL → 본문 (디스크 앞단)
+_flight = SingleFlight()
+
+_pool: Optional[ThreadPoolExecutor] = None
+_host_slots: Dict[str, threading.BoundedSemaphore] = {}
+_lock = threading.Lock()
+_http = None
+
+_stats_lock = threading.Lock()
+_stats = {"requests": 0, "memory_hits": 0, "disk_hits": 0, "downloads": 0, "extract_reused": 0,
+          "failed": 0, "late": 0, "unresolved": 0, "rejected": 0}
+
+
+def _count(name: str, value: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += value
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(1, ARTICLE_FETCH_WORKERS), thread_name_prefix="article")
+        return _pool
+
+
+def _get_http():
+    global _http
+    with _lock:
+        if _http is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=max(ARTICLE_FETCH_WORKERS, ARTICLE_PER_HOST))
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({"User-Agent": _USER_AGENT, "Accept": "text/html,application/xhtml+xml"})
+            _http = session
+        return _http
+
+
+def _host_slot(host: str) -> threading.BoundedSemaphore:
+    with _lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(max(1, ARTICLE_PER_HOST))
+        return slot
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def resolve_link(url: str) -> str:
+    """
+    Google News 링크(news.google.com)면 기사 id 안에 인코딩된 원문 URL을 꺼냅니다.
+    원문 URL을 꺼낼 수 없으면 빈 문자열을 반환합니다. (Google 페이지를 기사로 받지 않도록)
+    다른 호스트의 URL은 그대로 반환합니다.
+    """
+    parsed = urlparse(url)
+    if parsed.netloc != "news.google.com":
+        return url
+    if "/articles/" not in parsed.path:
+        return ""
+    token = parsed.path.rsplit("/", 1)[-1]
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (ValueError, TypeError):
+        return ""
+    m = _URL_IN_BYTES_RE.search(raw)
+    if not m:
+        return ""  # 최근 형식(AU_yqL…)은 원문 URL이 아닌 불투명 토큰
+    target = m.group(0).decode("ascii")
+    return "" if urlparse(target).netloc.endswith("google.com") else target
+
+
+def _decode(body: bytes, content_type: str) -> str:
+    m = re.search(r"charset=([A-Za-z0-9_-]+)", content_type or "", re.I) or _CHARSET_RE.search(body[:4096])
+    charset = m.group(1) if m else "utf-8"
+    if isinstance(charset, bytes):
+        charset = charset.decode("ascii", "ignore")
+    try:
+        return body.decode(charset, errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+def truncate_text(text: str, budget: int = ARTICLE_TEXT_TOKENS) -> str:
+    """text를 budget 토큰 안으로 자릅니다. 가능하면 문장 끝에서 자릅니다."""
+    if not text or budget <= 0 or estimate_tokens(text) <= budget:
+        return text
+    # 글자당 토큰 비율로 잘라 낸 뒤 마지막 문장 경계까지 되돌림
+    cut = max(1, int(len(text) * budget / estimate_tokens(text)))
+    head = text[:cut]
+    ends = [m.end() for m in _SENTENCE_END_RE.finditer(head)]
+    if ends and ends[-1] > cut // 2:
+        head = head[:ends[-1]]
+    return head.rstrip() + " …"
+
+
+def _check_url(url: str) -> None:
+    """http/https가 아니거나 호스트가 공개 주소가 아니면 ValueError."""
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError(f"허용하지 않는 URL: {url}")
+    if ARTICLE_ALLOW_PRIVATE:
+        return
+    try:
+        infos = socket.getaddrinfo(parsed.hostname, parsed.port or 0, proto=socket.IPPROTO_TCP)
+    except (OSError, UnicodeError) as e:
+        raise ValueError(f"호스트 주소를 찾을 수 없음: {parsed.hostname}") from e
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%", 1)[0])
+        if not address.is_global or address.is_multicast:
+            raise ValueError(f"공개 주소가 아닌 호스트: {parsed.hostname} ({address})")
+
+
+def _download(url: str) -> Tuple[bytes, str]:
+    """
+    호스트별 동시 연결 제한 안에서 HTML을 최대 ARTICLE_MAX_BYTES까지 내려받습니다.
+    리다이렉트는 ARTICLE_MAX_REDIRECTS번까지 직접 따라가며, 단계마다 _check_url로 주소를 검사합니다.
+    """
+    for _ in range(ARTICLE_MAX_REDIRECTS + 1):
+        _check_url(url)
+        location = _download_once(url)
+        if isinstance(location, tuple):
+            return location
+        url = urljoin(url, location)
+    raise ValueError("리다이렉트가 너무 많음")
+
+
+def _download_once(url: str):
+    """한 번 요청해 (본문, Content-Type) 또는 리다이렉트 대상(Location)을 반환합니다."""
+    slot = _host_slot(urlparse(url).netloc)
+    if not slot.acquire(timeout=ARTICLE_DEADLINE):
+        raise TimeoutError("호스트 동시 연결 대기 시간 초과")
+    try:
+        with _get_http().get(url, timeout=(ARTICLE_TIMEOUT, ARTICLE_TIMEOUT), stream=True,
+                             allow_redirects=False) as resp:
+            if resp.status_code in _REDIRECT_STATUSES and resp.headers.get("Location"):
+                return resp.headers["Location"]
+            resp.raise_for_status()
+            content_type = resp.headers.get("Content-Type", "")
+            if "html" not in content_type and "xml" not in content_type:
+                raise ValueError(f"HTML이 아닌 응답: {content_type}")
+            chunks = []
+            size = 0
+            for chunk in resp.iter_content(chunk_size=64 * 1024):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= ARTICLE_MAX_BYTES:
+                    break
+            return b"".join(chunks), content_type
+    finally:
+        slot.release()
+
+
+def _fetch_and_extract(target: str, url_key: str) -> str:
+    try:
+        with metrics.span("article_download"):
+            body, content_type = _download(target)
+    except ValueError:
+        # 허용하지 않는 주소: 실패로 기록해 ARTICLE_FAIL_TTL 동안 다시 시도하지 않음
+        _count("rejected")
+        _disk.write("url", url_key, json.dumps({"hash": None, "at": time.time()}).encode("utf-8"))
+        return ""
+    except Exception:
+        _count("failed")
+        _disk.write("url", url_key, json.dumps({"hash": None, "at": time.time()}).encode("utf-8"))
+        return ""
+    _count("downloads")
+
+    content_hash = _sha256(body)
+    cached = _disk.read("text", content_hash)
+    if cached is not None:
+        # 같은 HTML을 이미 추출한 적 있음 (다른 URL이거나 만료 후 다시 받은 경우)
+        _count("extract_reused")
+        text = cached.decode("utf-8")
+    else:
+        with metrics.span("article_extract"):
+            text = truncate_text(extract_text(_decode(body, content_type), target))
+        _disk.write("text", content_hash, text.encode("utf-8"))
+    _disk.write("url", url_key, json.dumps({"hash": content_hash, "at": time.time()}).encode("utf-8"))
+    return text
+
+
+def get_article_text(url: str) -> str:
+    """
+    기사 URL의 본문(ARTICLE_TEXT_TOKENS 이하)을 반환합니다. 받지 못하면 빈 문자열.
+    메모리 → 디스크 캐시 순으로 찾고, 없으면 내려받아 추출합니다.
+    원문 URL을 알 수 없는 Google News 링크는 받지도 캐시하지도 않고 빈 문자열을 반환합니다.
+    """
+    if not url or not url.startswith(("http://", "https://")):
+        return ""
+    _count("requests")
+    target = resolve_link(url)
+    if not target:
+        _count("unresolved")
+        return ""
+    text = _memory.get(url)
+    if text is not None:
+        _count("memory_hits")
+        return text
+
+    url_key = _sha256(url.encode("utf-8"))
+    raw = _disk.read("url", url_key)
+    if raw is not None:
+        try:
+            entry = json.loads(raw)
+        except ValueError:
+            entry = {}
+        age = time.time() - float(entry.get("at", 0))
+        if entry.get("hash") is None and age < ARTICLE_FAIL_TTL:
+            return ""
+        if entry.get("hash") and age < ARTICLE_CACHE_TTL:
+            cached = _disk.read("text", entry["hash"])
+            if cached is not None:
+                _count("disk_hits")
+                text = cached.decode("utf-8")
+                _memory.set(url, text)
+                return text
+
+    text = _flight.do(url_key, _fetch_and_extract, target, url_key)
+    if text:
+        _memory.set(url, text)
+    return text
+
+
+def cached_article_text(url: str) -> str:
+    """메모리·디스크 캐시에 있는 본문만 반환합니다. (다운로드하지 않음, 없으면 빈 문자열)"""
+    if not url:
+        return ""
+    text = _memory.get(url)
+    if text is not None:
+        return text
+    raw = _disk.read("url", _sha256(url.encode("utf-8")))
+    try:
+        entry = json.loads(raw) if raw is not None else {}
+    except ValueError:
+        entry = {}
+    if not entry.get("hash") or time.time() - float(entry.get("at", 0)) >= ARTICLE_CACHE_TTL:
+        return ""
+    cached = _disk.read("text", entry["hash"])
+    return cached.decode("utf-8") if cached is not None else ""
+
+
+def enrich_articles(
+    articles: List[Dict[str, str]],
+    allowed: Collection[str],
+    deadline: float = ARTICLE_DEADLINE,
+) -> List[Dict[str, str]]:
+    """
+    기사 dict마다 "content"(본문 일부)를 붙인 새 리스트를 반환합니다. (원본 리스트는 그대로)
+    링크가 allowed(서버가 자기 피드에서 받은 링크)에 없는 기사와 deadline초 안에 받지 못한 기사는
+    content 없이 반환합니다.
+    """
+    if not articles:
+        return articles
+    with metrics.span("article_enrich"):
+        pool = _get_pool()
+        futures = []
+        for a in articles:
+            link = a.get("link", "")
+            if link not in allowed:
+                if link:
+                    _count("rejected")
+                link = ""
+            futures.append(pool.submit(get_article_text, link))
+        _, pending = wait(futures, timeout=deadline)
+        if pending:
+            _count("late", len(pending))
+        enriched = []
+        for a, future in zip(articles, futures):
+            text = ""
+            if future.done() and future.exception() is None:
+                text = future.result()
+            enriched.append(dict(a, content=text) if text else a)
+    return enriched
+
+
+def article_cache_stats() -> Dict[str, Any]:
+    """본문 수집 누적 통계와 캐시 설정을 반환합니다."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats.update({
+        "enabled": ARTICLE_FULLTEXT,
+        "cache_dir": ARTICLE_CACHE_DIR,
+        "cache_max_mb": ARTICLE_CACHE_MAX_MB,
+        "evicted": _disk.evicted,
+        "memory_size": len(_memory),
+    })
+    return stats
+
+
+def _collect_metrics():
+    stats = article_cache_stats()
+    for name in ("requests", "memory_hits", "disk_hits", "downloads", "extract_reused", "failed", "late",
+                 "unresolved", "rejected"):
+        yield "newsbot_article_fetch_total", {"result": name}, stats[name]
+
+
+metrics.register_collector(_collect_metrics, kind="counter")
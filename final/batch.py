@@ -0,0 +1,131 @@
+"""
+여러 키워드를 한 번에 수집·요약하는 배치 처리.
+
+- 수집: fetch_google_news를 스레드 풀(BATCH_FETCH_WORKERS)로 동시에 호출
+- 중복 제거: 여러 키워드에 같은 기사(link)가 나오면 처음 나온 키워드에만 기사 본문을 싣고,
+  이후 키워드에는 링크만 duplicate_links로 알려 줍니다. (요약에는 키워드별 전체 기사를 사용)
+- 요약: summarize_news를 제한된 동시성(BATCH_SUMMARY_WORKERS)으로 호출하며,
+  pack > 1이면 여러 키워드를 한 프롬프트로 묶어 요약합니다.
+- 결과는 끝나는 순서대로 yield되므로 전체 소요 시간은 가장 느린 키워드에 가까워집니다.
+"""
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional
+
+from news_fetcher import fetch_google_news
+from gemini_service import summarize_news, summarize_news_multi
+
+BATCH_FETCH_WORKERS = int(os.environ.get("BATCH_FETCH_WORKERS", "16"))
+BATCH_SUMMARY_WORKERS = int(os.environ.get("BATCH_SUMMARY_WORKERS", "4"))
+BATCH_MAX_KEYWORDS = int(os.environ.get("BATCH_MAX_KEYWORDS", "200"))
+BATCH_MAX_PACK = int(os.environ.get("BATCH_MAX_PACK", "8"))  # 한 프롬프트로 묶어 요약할 최대 키워드 수
+
+
+def normalize_keywords(keywords: List[Any]) -> List[str]:
+    """공백 정리 후 빈 값·중복을 제거합니다. (입력 순서 유지)"""
+    seen = set()
+    result = []
+    for k in keywords or []:
+        k = " ".join(str(k).split())
+        if k and k.lower() not in seen:
+            seen.add(k.lower())
+            result.append(k)
+    return result
+
+
+def parse_pack(value: Any) -> Optional[int]:
+    """요청의 pack 값을 1..BATCH_MAX_PACK 정수로 반환합니다. 없으면 1, 정수가 아니면 None."""
+    if value is None or value == "":
+        return 1
+    if isinstance(value, bool):
+        return None
+    try:
+        pack = int(value)
+    except (TypeError, ValueError):
+        return None
+    if isinstance(value, float) and value != pack:
+        return None
+    return min(max(1, pack), max(1, BATCH_MAX_PACK))
+
+
+def iter_batch(
+    keywords: List[str],
+    max_articles: int = 10,
+    summarize: bool = True,
+    pack: int = 1,
+) -> Iterator[Dict[str, Any]]:
+    """
+    키워드 목록을 동시에 수집·요약하고, 끝나는 대로 이벤트를 yield합니다.
+
+    Args:
+        keywords: 키워드 목록 (normalize_keywords로 정리된 값)
+        max_articles: 키워드당 최대 기사 수
+        summarize: False면 수집만 수행
+        pack: 한 번의 Gemini 호출로 요약할 키워드 수 (1이면 키워드별 개별 호출, 최대 BATCH_MAX_PACK)
+
+    Yields:
+        {"type": "news", "keyword", "articles", "duplicate_links"}
+        {"type": "summary", "keyword", "summary"}
+        {"type": "error", "keyword", "stage", "error"}
+    """
+    pack = min(max(1, int(pack)), max(1, BATCH_MAX_PACK))
+    seen_links = set()
+    pending_pack: Dict[str, List[Dict[str, str]]] = {}
+
+    fetch_pool = ThreadPoolExecutor(max_workers=max(1, BATCH_FETCH_WORKERS))
+    summary_pool = ThreadPoolExecutor(max_workers=max(1, BATCH_SUMMARY_WORKERS))
+    try:
+        futures = {
+            fetch_pool.submit(fetch_google_news, k, max_articles): ("news", [k])
+            for k in keywords
+        }
+
+        def submit_pack():
+            group = dict(pending_pack)
+            pending_pack.clear()
+            if len(group) == 1:
+                k, arts = next(iter(group.items()))
+                futures[summary_pool.submit(summarize_news, k, arts)] = ("summary", [k])
+            else:
+                futures[summary_pool.submit(summarize_news_multi, group)] = ("summary_multi", list(group))
+
+        while futures:
+            done, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, names = futures.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    for k in names:
+                        yield {"type": "error", "keyword": k, "stage": stage.split("_")[0], "error": str(e)}
+                    continue
+
+                if stage == "news":
+                    keyword = names[0]
+                    fresh, duplicates = [], []
+                    for a in result:
+                        link = a.get("link", "")
+                        if link and link in seen_links:
+                            duplicates.append(link)
+                        else:
+                            seen_links.add(link)
+                            fresh.append(a)
+                    # 요약 작업을 먼저 제출해 두고 나서 수집 결과를 내보냄
+                    if summarize and result:
+                        pending_pack[keyword] = result
+                        if len(pending_pack) >= pack:
+                            submit_pack()
+                    yield {"type": "news", "keyword": keyword, "articles": fresh, "duplicate_links": duplicates}
+                elif stage == "summary":
+                    yield {"type": "summary", "keyword": names[0], "summary": result}
+                else:
+                    for k in names:
+                        yield {"type": "summary", "keyword": k, "summary": result.get(k, "")}
+
+            # 수집이 모두 끝났는데 묶음이 덜 찼으면 남은 키워드를 바로 요약
+            if pending_pack and not any(v[0] == "news" for v in futures.values()):
+                submit_pack()
+    finally:
+        # 클라이언트가 연결을 끊으면(GeneratorExit) 대기 중인 수집·요약은 취소하고 기다리지 않음
+        fetch_pool.shutdown(wait=False, cancel_futures=True)
+        summary_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,189 @@
+"""
+서버리스 콜드 스타트 측정: api/*.py 핸들러를 매번 새 파이썬 프로세스에서 불러와
+(1) 핸들러 모듈 import 시간, (2) 프로세스 시작부터 첫 응답 완료까지의 시간을 잽니다.
+Vercel 번들 크기(requirements.txt 패키지 + vercel.json excludeFiles를 뺀 프로젝트 파일)도 함께 출력합니다.
+
+업스트림은 bench/fake_upstreams.py를 사용하므로 키 없이 반복 측정할 수 있습니다.
+
+예)
+    python bench/coldstart.py                       # 모든 핸들러, 5회씩
+    python bench/coldstart.py --handler summarize -n 10 --importtime
+    python bench/coldstart.py --json coldstart.json
+"""
+import argparse
+import fnmatch
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+_bench = os.path.dirname(os.path.abspath(__file__))
+_root = os.path.dirname(_bench)
+if _bench not in sys.path:
+    sys.path.insert(0, _bench)
+
+import fake_upstreams  # noqa: E402
+
+HANDLERS = ["news", "summarize", "chat", "batch"]
+
+# 자식 프로세스: 핸들러 import → 임시 포트에서 요청 1건 처리 → 시간(JSON) 출력
+_CHILD = r"""
+import json, sys, threading, time, urllib.request
+t0 = time.perf_counter()
+import importlib
+mod = importlib.import_module("api." + sys.argv[1])
+t_import = time.perf_counter()
+from http.server import HTTPServer
+srv = HTTPServer(("127.0.0.1", 0), mod.handler)
+threading.Thread(target=srv.serve_forever, daemon=True).start()
+req = urllib.request.Request(
+    f"http://127.0.0.1:{srv.server_port}/", data=sys.argv[2].encode("utf-8"), method="POST",
+    headers={"Content-Type": "application/json"},
+)
+with urllib.request.urlopen(req, timeout=60) as resp:
+    resp.read()  # 스트리밍(SSE) 응답은 끝까지 읽어야 완료
+    status = resp.status
+t_done = time.perf_counter()
+print(json.dumps({"import_ms": (t_import - t0) * 1000, "first_request_ms": (t_done - t_import) * 1000, "status": status}))
+"""
+
+
+def _payload(handler: str, n: int) -> dict:
+    # 매 실행 새 키워드를 써서 캐시 없이 측정 (프로세스가 새로 뜨므로 메모리 캐시는 어차피 비어 있음)
+    keyword = f"콜드스타트 {n}"
+    articles = [{"title": f"{keyword} 기사 {i}", "link": f"https://example.com/{n}/{i}", "summary": "내용"} for i in range(5)]
+    if handler == "news":
+        return {"keyword": keyword}
+    if handler == "summarize":
+        return {"keyword": keyword, "articles": articles}
+    if handler == "chat":
+        return {"keyword": keyword, "summary": "요약", "message": "핵심은?", "history": []}
+    return {"keywords": [keyword, keyword + " 2"], "summarize": True}
+
+
+def run_once(handler: str, n: int, env: Dict[str, str]) -> dict:
+    started = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD, handler, json.dumps(_payload(handler, n), ensure_ascii=False)],
+        cwd=_root, env=env, capture_output=True, text=True, timeout=120,
+    )
+    process_ms = (time.perf_counter() - started) * 1000
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "child failed")
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["process_ms"] = process_ms
+    return result
+
+
+def import_profile(handler: str, env: Dict[str, str], top: int = 12) -> List[tuple]:
+    """python -X importtime 결과에서 누적 시간이 큰 최상위 import를 반환합니다. (백그라운드 warm-up 완료까지 대기)"""
+    code = (
+        "import importlib, sys, threading\n"
+        f"importlib.import_module('api.{handler}')\n"
+        "[t.join() for t in threading.enumerate() if t.name == 'warm-up']\n"
+    )
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=_root, env=env,
+                         capture_output=True, text=True, timeout=120)
+    rows = []
+    for line in out.stderr.splitlines():
+        m = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)", line)
+        if m and len(m.group(3)) <= 1:  # 최상위 import만
+            rows.append((m.group(4), int(m.group(2)) / 1000))
+    return sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+
+
+def _dir_size(paths) -> int:
+    return sum(os.path.getsize(p) for p in paths if os.path.isfile(p))
+
+
+def bundle_size() -> Dict[str, float]:
+    """requirements.txt 패키지와 (excludeFiles를 뺀) 프로젝트 파일 크기(MB)를 추정합니다."""
+    from importlib import metadata
+    sizes: Dict[str, float] = {}
+    seen = set()
+    with open(os.path.join(_root, "requirements.txt"), encoding="utf-8") as f:
+        queue = [re.split(r"[<>=\[; ]", l.strip())[0] for l in f if l.strip() and not l.startswith("#")]
+    while queue:  # 의존 패키지까지 포함
+        name = queue.pop().lower().replace("_", "-")
+        if name in seen:
+            continue
+        seen.add(name)
+        try:
+            dist = metadata.distribution(name)
+        except metadata.PackageNotFoundError:
+            continue
+        files = [dist.locate_file(p) for p in (dist.files or [])]
+        sizes[name] = _dir_size(files) / 1e6
+        for req in dist.requires or []:
+            if "extra ==" not in req:
+                queue.append(re.split(r"[<>=!~\[; (]", req.strip())[0])
+
+    with open(os.path.join(_root, "vercel.json"), encoding="utf-8") as f:
+        exclude = json.load(f)["functions"]["api/**/*.py"]["excludeFiles"].strip("{}").split(",")
+    project = []
+    for dirpath, _, filenames in os.walk(_root):
+        for name in filenames:
+            rel = os.path.relpath(os.path.join(dirpath, name), _root).replace(os.sep, "/")
+            if not any(fnmatch.fnmatch(rel, pat) for pat in exclude):
+                project.append(os.path.join(dirpath, name))
+    sizes["(프로젝트 파일)"] = _dir_size(project) / 1e6
+    return sizes
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="서버리스 핸들러 콜드 스타트 측정")
+    parser.add_argument("--handler", choices=HANDLERS + ["all"], default="all")
+    parser.add_argument("-n", "--runs", type=int, default=5, help="핸들러별 반복 횟수")
+    parser.add_argument("--port", type=int, default=8901, help="가짜 업스트림 포트")
+    parser.add_argument("--importtime", action="store_true", help="import 시간이 큰 모듈 목록 출력")
+    parser.add_argument("--no-bundle", action="store_true", help="번들 크기 계산 생략")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    fake_upstreams.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    fake_upstreams.configure(args)
+    fake_upstreams.start(port=args.port)
+    upstream = f"http://127.0.0.1:{args.port}"
+    env = dict(os.environ)
+    env.update({
+        "NEWS_RSS_URL": f"{upstream}/rss/search",
+        "GEMINI_BASE_URL": f"{upstream}/",
+        "GEMINI_API_KEY": env.get("BENCH_GEMINI_API_KEY", "fake-key"),
+    })
+
+    handlers = HANDLERS if args.handler == "all" else [args.handler]
+    result = {"handlers": {}}
+    print(f"{'핸들러':<12}{'import(ms)':>12}{'첫 요청(ms)':>13}{'프로세스(ms)':>14}   (중앙값, {args.runs}회)")
+    for name in handlers:
+        runs = [run_once(name, i, env) for i in range(args.runs)]
+        summary = {
+            key: round(statistics.median(r[key] for r in runs), 1)
+            for key in ("import_ms", "first_request_ms", "process_ms")
+        }
+        summary["status"] = sorted({r["status"] for r in runs})
+        result["handlers"][name] = summary
+        print(f"{name:<12}{summary['import_ms']:>12.1f}{summary['first_request_ms']:>13.1f}{summary['process_ms']:>14.1f}")
+        if args.importtime:
+            profile = import_profile(name, env)
+            result["handlers"][name]["imports"] = profile
+            for module, ms in profile:
+                print(f"    {module:<40}{ms:>9.1f} ms")
+
+    if not args.no_bundle:
+        sizes = bundle_size()
+        result["bundle_mb"] = {k: round(v, 2) for k, v in sizes.items()}
+        print(f"\n번들 크기 추정: {sum(sizes.values()):.1f} MB")
+        for name, mb in sorted(sizes.items(), key=lambda kv: kv[1], reverse=True)[:12]:
+            print(f"    {name:<30}{mb:>8.2f} MB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+벤치마크용 로컬 가짜 업스트림: Google News RSS + Gemini API.
+
+실제 서비스를 호출하지 않고 지연·토큰 생성 속도·오류율을 조절해 부하를 재현합니다.
+- GET  /rss/search?q=...                         RSS (키워드별로 결정적인 기사, ETag/304 지원)
+- GET  /articles/{id}                            기사 HTML (--article-latency, 기사 본문 수집 벤치마크용)
+- POST /v1beta/models/{model}:generateContent     Gemini 응답 (usageMetadata 포함)
+- POST /v1beta/models/{model}:streamGenerateContent?alt=sse   스트리밍 응답
+
+실행:
+    python bench/fake_upstreams.py --port 8900 --latency 0.3 --token-rate 150 --error-rate 0.01
+앱은 다음 환경변수로 가짜 서버를 사용합니다.
+    NEWS_RSS_URL=http://127.0.0.1:8900/rss/search
+    GEMINI_BASE_URL=http://127.0.0.1:8900/  GEMINI_API_KEY=fake
+"""
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+SOURCES = ["연합뉴스", "한국경제", "조선일보", "중앙일보", "매일경제", "KBS", "SBS", "MBC", "한겨레", "동아일보"]
+
+
+class Settings:
+    rss_latency = 0.1  # RSS 응답 지연(초)
+    rss_items = 20  # 피드당 기사 수
+    rss_rotate = 0.0  # 초당 새 기사 비율 (0이면 피드 고정)
+    latency = 0.3  # Gemini 첫 토큰까지 지연(초)
+    token_rate = 150.0  # 초당 생성 토큰 수
+    output_tokens = 300  # 응답 토큰 수
+    error_rate = 0.0  # 429/500 오류 비율
+    slow_rate = 0.0  # 첫 토큰이 slow_latency만큼 더 늦는 요청 비율 (꼬리 지연 재현, 헤지 벤치마크용)
+    slow_latency = 3.0  # 느린 요청의 추가 지연(초)
+    chunk_tokens = 10  # 스트리밍 조각당 토큰 수
+    article_base = ""  # 설정하면 기사 링크가 이 서버의 /articles/{id}를 가리킴 (예: http://127.0.0.1:8900)
+    article_latency = 0.2  # 기사 HTML 응답 지연(초)
+
+
+_stats_lock = threading.Lock()
+stats = {"rss": 0, "rss_304": 0, "generate": 0, "stream": 0, "errors": 0, "article": 0, "slow": 0}
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        stats[name] += 1
+
+
+def build_feed(keyword: str) -> bytes:
+    """키워드별로 결정적인 RSS를 만듭니다. rss_rotate > 0이면 시간에 따라 기사가 조금씩 바뀝니다."""
+    offset = int(time.time() * Settings.rss_rotate) if Settings.rss_rotate else 0
+    items = []
+    for n in range(offset, offset + Settings.rss_items):
+        digest = hashlib.md5(f"{keyword}:{n}".encode("utf-8")).hexdigest()[:12]
+        source = SOURCES[n % len(SOURCES)]
+        title = f"{keyword} 관련 소식 {n}: 시장과 업계의 반응 - {source}"
+        link = f"{Settings.article_base or 'https://news.example.com'}/articles/{digest}"
+        description = (
+            f'<a href="{link}" target="_blank">{title}</a>&nbsp;&nbsp;'
+            f'<font color="#6f6f6f">{source}</font>'
+        )
+        items.append(
+            "<item>"
+            f"<title>{escape(title)}</title>"
+            f"<link>{link}</link>"
+            f'<guid isPermaLink="false">{digest}</guid>'
+            f"<pubDate>{formatdate(usegmt=True)}</pubDate>"
+            f"<description>{escape(description)}</description>"
+            f'<source url="https://news.example.com">{escape(source)}</source>'
+            "</item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/"><channel>'
+        f"<title>\"{escape(keyword)}\" - Google 뉴스</title>"
+        + "".join(items)
+        + "</channel></rss>"
+    ).encode("utf-8")
+
+
+def build_article(digest: str) -> bytes:
+    """기사 페이지 HTML (메뉴·관련 기사·스크립트 사이에 본문 문단)."""
+    words = ["시장", "정부", "기업", "발표", "전망", "투자", "분석", "영향", "관계자", "계획"]
+    paragraphs = "".join(
+        f"<p>{digest} 기사의 {i + 1}번째 문단입니다. "
+        + " ".join(words[(i + j) % len(words)] for j in range(30))
+        + "에 대한 내용이 이어집니다.</p>"
+        for i in range(8)
+    )
+    related = "".join(f'<li><a href="/articles/r{i}">관련 기사 {i}: 다른 소식의 제목</a></li>' for i in range(10))
+    return (
+        '<!doctype html><html><head><meta charset="utf-8"><title>기사</title>'
+        "<script>window.ads = [1, 2, 3];</script></head><body>"
+        '<header><nav><a href="/">홈</a> <a href="/politics">정치</a> <a href="/economy">경제</a></nav></header>'
+        f'<div class="container"><article id="article-body">{paragraphs}</article>'
+        f'<div class="related"><ul>{related}</ul></div></div>'
+        "<footer>Copyright 무단 전재 및 재배포 금지</footer></body></html>"
+    ).encode("utf-8")
+
+
+def _fake_text(prompt: str, tokens: int) -> str:
+    seed = hashlib.md5(prompt.encode("utf-8")).hexdigest()[:6]
+    words = ["시장", "정부", "기업", "발표", "전망", "투자", "분석", "영향", "관계자", "계획"]
+    return " ".join(f"{words[i % len(words)]}{seed if i == 0 else ''}" for i in range(tokens))
+
+
+def _usage(prompt: str, output_tokens: int) -> dict:
+    prompt_tokens = max(1, len(prompt) // 2)
+    return {
+        "promptTokenCount": prompt_tokens,
+        "candidatesTokenCount": output_tokens,
+        "totalTokenCount": prompt_tokens + output_tokens,
+    }
+
+
+def _candidate(text: str, finish: bool) -> dict:
+    cand = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+    if finish:
+        cand["finishReason"] = "STOP"
+    return cand
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str, extra=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (extra or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            with _stats_lock:
+                body = json.dumps(stats).encode("utf-8")
+            self._send(200, body, "application/json")
+            return
+        if url.path.startswith("/articles/"):
+            _count("article")
+            time.sleep(Settings.article_latency)
+            self._send(200, build_article(url.path.rsplit("/", 1)[-1]), "text/html; charset=utf-8")
+            return
+        if not url.path.startswith("/rss"):
+            self._send(404, b"not found", "text/plain")
+            return
+        _count("rss")
+        time.sleep(Settings.rss_latency)
+        keyword = parse_qs(url.query).get("q", [""])[0]
+        body = build_feed(keyword)
+        etag = '"' + hashlib.md5(body.split(b"<item>", 1)[-1]).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            _count("rss_304")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._send(200, body, "application/rss+xml; charset=utf-8", {"ETag": etag})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            payload = {}
+        prompt = "".join(
+            part.get("text", "")
+            for content in payload.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        if ":generateContent" not in url.path and ":streamGenerateContent" not in url.path:
+            self._send(404, b"{}", "application/json")
+            return
+
+        time.sleep(Settings.latency)
+        if Settings.slow_rate and random.random() < Settings.slow_rate:
+            _count("slow")
+            time.sleep(Settings.slow_latency)
+        if Settings.error_rate and random.random() < Settings.error_rate:
+            _count("errors")
+            status = random.choice([429, 500, 503])
+            body = json.dumps({"error": {"code": status, "message": "fake upstream error", "status": "UNAVAILABLE"}})
+            self._send(status, body.encode("utf-8"), "application/json")
+            return
+
+        tokens = Settings.output_tokens
+        if ":streamGenerateContent" in url.path:
+            _count("stream")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            words = _fake_text(prompt, tokens).split(" ")
+            step = max(1, Settings.chunk_tokens)
+            for i in range(0, len(words), step):
+                time.sleep(step / Settings.token_rate)
+                last = i + step >= len(words)
+                chunk = {"candidates": [_candidate(" ".join(words[i:i + step]) + " ", last)]}
+                if last:
+                    chunk["usageMetadata"] = _usage(prompt, tokens)
+                data = f"data: {json.dumps(chunk, ensure_ascii=False)}\r\n\r\n".encode("utf-8")
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+            return
+
+        _count("generate")
+        time.sleep(tokens / Settings.token_rate)
+        body = {"candidates": [_candidate(_fake_text(prompt, tokens), True)], "usageMetadata": _usage(prompt, tokens)}
+        self._send(200, json.dumps(body, ensure_ascii=False).encode("utf-8"), "application/json")
+
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 벤치마크 종료 시 클라이언트가 먼저 끊는 경우는 무시
+        exc = sys.exc_info()[1]
+        if isinstance(exc, (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+
+def start(host: str = "127.0.0.1", port: int = 8900) -> ThreadingHTTPServer:
+    """백그라운드 스레드에서 가짜 서버를 시작하고 서버 객체를 반환합니다."""
+    server = FakeServer((host, port), FakeHandler)
+    threading.Thread(target=server.serve_forever, name="fake-upstreams", daemon=True).start()
+    return server
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--rss-latency", type=float, default=Settings.rss_latency, help="RSS 응답 지연(초)")
+    parser.add_argument("--rss-rotate", type=float, default=Settings.rss_rotate, help="초당 새 기사 비율")
+    parser.add_argument("--latency", type=float, default=Settings.latency, help="Gemini 첫 토큰 지연(초)")
+    parser.add_argument("--token-rate", type=float, default=Settings.token_rate, help="초당 생성 토큰 수")
+    parser.add_argument("--output-tokens", type=int, default=Settings.output_tokens, help="응답 토큰 수")
+    parser.add_argument("--error-rate", type=float, default=Settings.error_rate, help="429/5xx 오류 비율 (0~1)")
+    parser.add_argument("--slow-rate", type=float, default=Settings.slow_rate, help="첫 토큰이 크게 늦는 요청 비율 (0~1)")
+    parser.add_argument("--slow-latency", type=float, default=Settings.slow_latency, help="느린 요청의 추가 지연(초)")
+    parser.add_argument("--article-base", default=Settings.article_base,
+                        help="기사 링크 주소 (예: http://127.0.0.1:8900 이면 /articles/{id}를 이 서버가 응답)")
+    parser.add_argument("--article-latency", type=float, default=Settings.article_latency, help="기사 HTML 응답 지연(초)")
+
+
+def configure(args: argparse.Namespace) -> None:
+    Settings.rss_latency = args.rss_latency
+    Settings.rss_rotate = args.rss_rotate
+    Settings.latency = args.latency
+    Settings.token_rate = max(1.0, args.token_rate)
+    Settings.output_tokens = args.output_tokens
+    Settings.error_rate = args.error_rate
+    Settings.slow_rate = args.slow_rate
+    Settings.slow_latency = args.slow_latency
+    Settings.article_base = args.article_base.rstrip("/")
+    Settings.article_latency = args.article_latency
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="가짜 Google News RSS / Gemini 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure(args)
+    server = FakeServer((args.host, args.port), FakeHandler)
+    print(f"가짜 업스트림 실행 중: http://{args.host}:{args.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+부하 테스트: 앱(app_web.py / app_asgi.py / api/*.py)에 시나리오별 요청을 보내고
+p50/p95/p99 지연, 초당 요청 수, 서버 프로세스 메모리를 보고합니다.
+
+실제 Google News·Gemini 대신 bench/fake_upstreams.py를 사용하므로 키 없이 반복 측정할 수 있습니다.
+
+예)
+    # 가짜 업스트림 + Flask 앱을 직접 띄워 모든 시나리오 실행
+    python bench/load.py --spawn web --scenario all
+    # 이미 떠 있는 서버(가짜 업스트림을 가리키도록 설정된)에 hot 시나리오 실행
+    python bench/load.py --target http://127.0.0.1:5000 --api flask --scenario hot -c 50 -n 500
+
+시나리오
+    cold    매 요청 새 키워드: 수집 + 요약 (캐시 미적중 경로)
+    hot     모든 요청 같은 키워드: 수집 + 요약 (캐시·동시 요청 합치기 경로)
+    stream  스트리밍 요약의 첫 바이트(TTFB)와 완료 시간
+    chat    대화 길이를 늘려 가며 턴별 지연 측정
+    batch   /api/batch 로 여러 키워드를 한 번에 요청
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+
+_bench = os.path.dirname(os.path.abspath(__file__))
+_root = os.path.dirname(_bench)
+if _bench not in sys.path:
+    sys.path.insert(0, _bench)
+
+import fake_upstreams  # noqa: E402
+
+SCENARIOS = ["cold", "hot", "stream", "chat", "batch"]
+
+
+class Recorder:
+    """요청 이름별 지연·오류를 모읍니다. 스레드 안전."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.durations: Dict[str, float] = {}  # 시나리오별 실행 시간(초)
+
+    def add(self, name: str, seconds: float, ok: bool = True) -> None:
+        with self._lock:
+            self.samples.setdefault(name, []).append(seconds)
+            if not ok:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def timed(self, name: str, fn, *args, **kwargs):
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = fn(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            self.add(name, time.perf_counter() - started, ok)
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+class Client:
+    """API 계약(flask: 세션 쿠키 / stateless: 본문에 상태 전달)을 감춘 요청 도우미."""
+
+    def __init__(self, base: str, api: str, timeout: float = 120.0):
+        self.base = base.rstrip("/")
+        self.api = api
+        self.timeout = timeout
+        self.http = requests.Session()
+        self.keyword = ""
+        self.articles: List[dict] = []
+        self.summary = ""
+
+    def _post(self, path: str, body: dict, stream: bool = False):
+        resp = self.http.post(self.base + path, json=body, timeout=self.timeout, stream=stream)
+        if resp.status_code >= 400:
+            raise RuntimeError(f"{path} {resp.status_code}: {resp.text[:200]}")
+        return resp
+
+    def news(self, keyword: str) -> None:
+        data = self._post("/api/news", {"keyword": keyword}).json()
+        if not data.get("ok"):
+            raise RuntimeError(data.get("error"))
+        self.keyword, self.articles = keyword, data.get("articles", [])
+
+    def summarize(self) -> None:
+        body = {} if self.api == "flask" else {"keyword": self.keyword, "articles": self.articles}
+        data = self._post("/api/summarize", body).json()
+        if not data.get("ok"):
+            raise RuntimeError(data.get("error"))
+        self.summary = data.get("summary", "")
+
+    def summarize_stream(self) -> float:
+        """스트리밍 요약을 끝까지 읽고 첫 바이트까지 걸린 시간(초)을 반환합니다."""
+        if self.api == "flask":
+            path, body = "/api/summarize/stream", {}
+        else:
+            path, body = "/api/summarize", {"keyword": self.keyword, "articles": self.articles, "stream": True}
+        started = time.perf_counter()
+        resp = self._post(path, body, stream=True)
+        ttfb = None
+        for chunk in resp.iter_content(chunk_size=None):
+            if ttfb is None and chunk:
+                ttfb = time.perf_counter() - started
+        return ttfb if ttfb is not None else time.perf_counter() - started
+
+    def chat(self, message: str, history: List[dict]) -> str:
+        body = {"message": message, "history": history}
+        if self.api != "flask":
+            body.update(summary=self.summary, keyword=self.keyword)
+        data = self._post("/api/chat", body).json()
+        if not data.get("ok"):
+            raise RuntimeError(data.get("error"))
+        return data.get("reply", "")
+
+    def batch(self, keywords: List[str]) -> int:
+        resp = self._post("/api/batch", {"keywords": keywords, "summarize": True}, stream=True)
+        events = 0
+        for line in resp.iter_lines(decode_unicode=True):
+            if line and line.startswith("event:"):
+                events += 1
+        return events
+
+
+def run_scenario(name: str, args, rec: Recorder) -> None:
+    run_id = uuid.uuid4().hex[:6]
+
+    def cold(i):
+        c = Client(args.target, args.api)
+        rec.timed("cold/news", c.news, f"콜드{run_id}-{i}")
+        rec.timed("cold/summarize", c.summarize)
+
+    def hot(i):
+        c = Client(args.target, args.api)
+        rec.timed("hot/news", c.news, "삼성전자")
+        rec.timed("hot/summarize", c.summarize)
+
+    def stream(i):
+        c = Client(args.target, args.api)
+        c.news(f"스트림{run_id}-{i % max(1, args.keywords)}")
+        started = time.perf_counter()
+        try:
+            ttfb = c.summarize_stream()
+            rec.add("stream/ttfb", ttfb)
+            rec.add("stream/total", time.perf_counter() - started)
+        except Exception:
+            rec.add("stream/total", time.perf_counter() - started, ok=False)
+
+    def chat(i):
+        c = Client(args.target, args.api)
+        c.news(f"대화{run_id}-{i % max(1, args.keywords)}")
+        c.summarize()
+        history: List[dict] = []
+        for turn in range(args.chat_turns):
+            message = f"{turn}번째 질문: 이 뉴스의 배경과 전망을 자세히 알려 주세요."
+            bucket = f"chat/turn{(turn // 5) * 5 + 1:02d}-{(turn // 5) * 5 + 5:02d}"
+            reply = rec.timed(bucket, c.chat, message, history)
+            history += [{"role": "user", "text": message}, {"role": "model", "text": reply}]
+
+    def batch(i):
+        c = Client(args.target, args.api)
+        keywords = [f"배치{run_id}-{i}-{k}" for k in range(args.batch_size)]
+        rec.timed("batch/total", c.batch, keywords)
+
+    fn = {"cold": cold, "hot": hot, "stream": stream, "chat": chat, "batch": batch}[name]
+    count = args.requests
+    if name == "chat":
+        count = max(1, args.concurrency)
+    elif name == "batch":
+        count = max(1, args.requests // max(1, args.batch_size))
+
+    def guarded(i):
+        try:
+            fn(i)
+        except Exception as e:
+            rec.add(f"{name}/failed", 0.0, ok=False)
+            if args.verbose:
+                print(f"[{name}] {e}", file=sys.stderr)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(guarded, range(count)))
+
+
+def _process_tree(pid: int) -> List[int]:
+    pids = [pid]
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                for child in f.read().split():
+                    pids += _process_tree(int(child))
+    except OSError:
+        pass
+    return pids
+
+
+def _rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return 0.0
+
+
+class MemorySampler(threading.Thread):
+    """서버 프로세스 트리의 RSS를 주기적으로 측정해 프로세스별 최대값을 기록합니다. (Linux /proc)"""
+
+    def __init__(self, pid: int, interval: float = 0.5):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak: Dict[int, float] = {}
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            for p in _process_tree(self.pid):
+                self.peak[p] = max(self.peak.get(p, 0.0), _rss_mb(p))
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def spawn_server(kind: str, port: int, upstream: str, workers: int, verbose: bool = False) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "NEWS_RSS_URL": f"{upstream}/rss/search",
+        "GEMINI_BASE_URL": f"{upstream}/",
+        "GEMINI_API_KEY": env.get("BENCH_GEMINI_API_KEY", "fake-key"),
+        "PYTHONUNBUFFERED": "1",
+    })
+    if kind == "web":
+        cmd = [sys.executable, "-c",
+               f"from app_web import app; app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    elif kind == "gunicorn":
+        if workers > 1 and "SESSION_BACKEND" not in os.environ:
+            # 메모리 세션은 워커 간에 공유되지 않으므로 sqlite 세션 저장소 사용
+            env["SESSION_BACKEND"] = "sqlite"
+            env.setdefault("CACHE_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "newsbot_bench.sqlite3"))
+        cmd = [sys.executable, "-m", "gunicorn", "app_web:app", "--bind", f"127.0.0.1:{port}",
+               "--workers", str(workers), "--threads", "8", "--log-level", "warning"]
+    elif kind == "asgi":
+        cmd = [sys.executable, "-m", "uvicorn", "app_asgi:app", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(workers), "--log-level", "warning"]
+    else:
+        raise ValueError(kind)
+    proc = subprocess.Popen(
+        cmd, cwd=_root, env=env, stdout=subprocess.DEVNULL, stderr=None if verbose else subprocess.DEVNULL
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return proc
+        except requests.RequestException:
+            if proc.poll() is not None:
+                raise RuntimeError(f"서버 시작 실패: {' '.join(cmd)}")
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("서버가 30초 안에 응답하지 않았습니다.")
+
+
+def report(rec: Recorder, wall: float, memory: Optional[Dict[int, float]], upstream_stats: Optional[dict]) -> dict:
+    result = {"wall_seconds": round(wall, 3), "requests": {}}
+    print(f"\n{'요청':<22}{'건수':>7}{'오류':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'req/s':>9}")
+    for name in sorted(rec.samples):
+        values = rec.samples[name]
+        duration = rec.durations.get(name.split("/")[0], wall)
+        row = {
+            "count": len(values),
+            "errors": rec.errors.get(name, 0),
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+            "p99_ms": round(percentile(values, 99) * 1000, 1),
+            "rps": round(len(values) / duration, 2) if duration else 0.0,
+        }
+        result["requests"][name] = row
+        print(f"{name:<22}{row['count']:>7}{row['errors']:>6}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['rps']:>9}")
+    if memory:
+        result["memory_mb"] = {str(pid): round(mb, 1) for pid, mb in memory.items()}
+        print("\n서버 메모리(최대 RSS): " + ", ".join(f"pid {pid}: {mb:.1f}MB" for pid, mb in memory.items()))
+    if upstream_stats:
+        result["upstream_calls"] = upstream_stats
+        print("업스트림 호출: " + json.dumps(upstream_stats, ensure_ascii=False))
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="뉴스 챗봇 부하 테스트")
+    parser.add_argument("--target", help="테스트할 서버 주소 (--spawn을 쓰면 자동 설정)")
+    parser.add_argument("--api", choices=["flask", "stateless"], default="flask",
+                        help="flask: app_web.py(세션) / stateless: app_asgi.py·Vercel api")
+    parser.add_argument("--spawn", choices=["web", "gunicorn", "asgi"], help="가짜 업스트림과 함께 서버를 직접 실행")
+    parser.add_argument("--workers", type=int, default=2, help="--spawn gunicorn/asgi 워커 수")
+    parser.add_argument("--port", type=int, default=5055, help="--spawn 서버 포트")
+    parser.add_argument("--upstream-port", type=int, default=8900, help="가짜 업스트림 포트")
+    parser.add_argument("--scenario", choices=SCENARIOS + ["all"], default="all")
+    parser.add_argument("-c", "--concurrency", type=int, default=20, help="동시 가상 사용자 수")
+    parser.add_argument("-n", "--requests", type=int, default=200, help="시나리오당 요청 수")
+    parser.add_argument("--keywords", type=int, default=10, help="stream/chat 시나리오의 서로 다른 키워드 수")
+    parser.add_argument("--chat-turns", type=int, default=20, help="chat 시나리오의 대화 턴 수")
+    parser.add_argument("--batch-size", type=int, default=50, help="batch 시나리오의 요청당 키워드 수")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    fake_upstreams.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = None
+    sampler = None
+    upstream = None
+    if args.spawn:
+        fake_upstreams.configure(args)
+        upstream = fake_upstreams.start(port=args.upstream_port)
+        server = spawn_server(args.spawn, args.port, f"http://127.0.0.1:{args.upstream_port}", args.workers, args.verbose)
+        args.target = f"http://127.0.0.1:{args.port}"
+        args.api = "flask" if args.spawn in ("web", "gunicorn") else "stateless"
+        sampler = MemorySampler(server.pid)
+        sampler.start()
+    elif not args.target:
+        parser.error("--target 또는 --spawn 중 하나가 필요합니다.")
+
+    rec = Recorder()
+    scenarios = SCENARIOS if args.scenario == "all" else [args.scenario]
+    started = time.perf_counter()
+    try:
+        for name in scenarios:
+            print(f"[bench] {name} 시나리오 실행 중...", flush=True)
+            scenario_started = time.perf_counter()
+            run_scenario(name, args, rec)
+            rec.durations[name] = time.perf_counter() - scenario_started
+    finally:
+        wall = time.perf_counter() - started
+        if sampler:
+            sampler.stop()
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+        if upstream:
+            upstream.shutdown()
+
+    upstream_stats = dict(fake_upstreams.stats) if args.spawn else None
+    result = report(rec, wall, sampler.peak if sampler else None, upstream_stats)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
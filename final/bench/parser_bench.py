@@ -0,0 +1,117 @@
+"""
+RSS 파서 비교: feedparser(기존 경로) vs rss_parser(NEWS_PARSER=fast)
+
+같은 RSS 바이트를 여러 번 파싱해 1회당 CPU 시간(중앙값)과 tracemalloc 최대 할당량,
+결과 기사 목록이 차지하는 메모리(__slots__ 레코드 vs dict)를 비교하고, 두 파서의 dict 출력이 같은지 확인합니다.
+
+예)
+    python bench/parser_bench.py                                 # bench/fixtures/*.xml
+    python bench/parser_bench.py --feed saved.xml --limit 10 -n 200
+    python bench/parser_bench.py --record "삼성전자"             # 실제 Google News 피드를 fixtures에 저장
+"""
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+_bench = os.path.dirname(os.path.abspath(__file__))
+_root = os.path.dirname(_bench)
+if _root not in sys.path:
+    sys.path.insert(0, _root)
+
+import feedparser  # noqa: E402
+
+from news_fetcher import _build_url, _parse_entries  # noqa: E402
+from rss_parser import parse_articles  # noqa: E402
+
+_FIXTURES = os.path.join(_bench, "fixtures")
+
+
+def _deep_size(articles) -> int:
+    """기사 목록(리스트 + 레코드 + 문자열)의 대략적인 메모리 크기(bytes)."""
+    size = sys.getsizeof(articles)
+    for a in articles:
+        size += sys.getsizeof(a)
+        values = a.values() if isinstance(a, dict) else (getattr(a, s) for s in a.__slots__)
+        size += sum(sys.getsizeof(v) for v in values)
+    return size
+
+
+def measure(fn: Callable[[], list], runs: int) -> Dict[str, float]:
+    fn()  # 첫 호출(지연 import 등)은 제외
+    times = []
+    for _ in range(runs):
+        started = time.process_time()
+        fn()
+        times.append(time.process_time() - started)
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "cpu_ms": statistics.median(times) * 1000,
+        "peak_kb": peak / 1024,
+        "result_kb": _deep_size(result) / 1024,
+        "dict_kb": _deep_size([a.to_dict() for a in result]) / 1024,
+        "articles": len(result),
+    }
+
+
+def record(keyword: str) -> str:
+    import requests
+    resp = requests.get(_build_url(keyword), timeout=10)
+    resp.raise_for_status()
+    path = os.path.join(_FIXTURES, f"recorded_{len(os.listdir(_FIXTURES))}.xml")
+    with open(path, "wb") as f:
+        f.write(resp.content)
+    return path
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="feedparser vs 경량 RSS 파서 비교")
+    parser.add_argument("--feed", nargs="*", help="RSS 파일 경로 (기본: bench/fixtures/*.xml)")
+    parser.add_argument("--limit", type=int, default=10, help="빠른 파서가 읽을 기사 수")
+    parser.add_argument("-n", "--runs", type=int, default=50, help="파서별 반복 횟수")
+    parser.add_argument("--record", metavar="KEYWORD", help="Google News 피드를 받아 fixtures에 저장")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        print(f"저장: {record(args.record)}")
+        return
+
+    paths = args.feed or sorted(glob.glob(os.path.join(_FIXTURES, "*.xml")))
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        cases = {
+            "feedparser": lambda: _parse_entries(feedparser.parse(data)),
+            "fast (전체)": lambda: parse_articles(data),
+            f"fast (limit={args.limit})": lambda: parse_articles(data, args.limit),
+        }
+        print(f"\n{os.path.basename(path)}  ({len(data) / 1024:.1f} KB)")
+        print(f"{'파서':<20}{'기사':>6}{'CPU(ms)':>10}{'최대 할당(KB)':>15}{'결과(KB)':>11}{'dict일 때(KB)':>15}")
+        base = None
+        for name, fn in cases.items():
+            m = measure(fn, args.runs)
+            base = base or m
+            ratio = base["cpu_ms"] / m["cpu_ms"] if m["cpu_ms"] else 0.0
+            print(f"{name:<20}{m['articles']:>6}{m['cpu_ms']:>10.2f}{m['peak_kb']:>15.1f}{m['result_kb']:>11.1f}"
+                  f"{m['dict_kb']:>15.1f}   x{ratio:.1f}")
+
+        expected = [a.to_dict() for a in _parse_entries(feedparser.parse(data))]
+        actual = [a.to_dict() for a in parse_articles(data)]
+        same = expected == actual
+        print(f"출력 일치: {'예' if same else '아니오'}")
+        if not same:
+            for e, a in zip(expected, actual):
+                if e != a:
+                    print(f"  feedparser: {e}\n  fast:       {a}")
+                    break
+
+
+if __name__ == "__main__":
+    main()
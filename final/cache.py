@@ -0,0 +1,266 @@
+"""
+공용 캐시: TTL 만료 + LRU 크기 제한 + 적중/미스 카운터.
+여러 스레드(gunicorn 워커 스레드 등)에서 동시에 사용해도 안전합니다.
+
+- TTLCache: 프로세스 내 메모리 캐시
+- SqliteCache: sqlite 파일 캐시 (같은 서버의 워커 프로세스끼리 공유)
+- RedisCache: Redis 호환 서버 캐시 (여러 서버가 공유). redis 패키지가 없으면 create_cache가 경고를 남기고
+  SqliteCache로 대신합니다.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger("newsbot.cache")
+
+
+class TTLCache:
+    """
+    키별 TTL과 최대 항목 수(LRU)를 갖는 스레드 안전 캐시.
+
+    만료된 항목도 maxsize 안에서는 바로 지우지 않고 남겨 둡니다.
+    (RSS의 ETag/Last-Modified 재검증처럼 오래된 값이 필요한 경우 peek로 조회)
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = float(ttl)
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """만료되지 않은 값을 반환합니다. 없거나 만료됐으면 default."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def peek(self, key: str) -> Tuple[Any, bool]:
+        """(값, 만료 여부)를 반환합니다. 카운터는 바꾸지 않습니다. 없으면 (None, True)."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None, True
+            self._data.move_to_end(key)
+            return item[1], item[0] < time.monotonic()
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires = time.monotonic() + (self.ttl if ttl is None else float(ttl))
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+
+class SqliteCache:
+    """
+    sqlite 파일 기반 캐시 (여러 워커 프로세스가 공유 가능).
+    TTLCache와 같은 get/set/delete/clear/stats 인터페이스를 가집니다.
+    값은 JSON으로 직렬화 가능한 객체여야 합니다.
+    """
+
+    def __init__(self, path: str, maxsize: int = 1024, ttl: float = 3600.0, namespace: str = "default"):
+        import sqlite3
+        self.path = path
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = float(ttl)
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "expires REAL NOT NULL, accessed REAL NOT NULL, PRIMARY KEY (ns, key))"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires FROM cache WHERE ns = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None or row[1] < now:
+                self.misses += 1
+                return default
+            self._conn.execute(
+                "UPDATE cache SET accessed = ? WHERE ns = ? AND key = ?",
+                (now, self.namespace, key),
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else float(ttl))
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (ns, key, value, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, payload, expires, now),
+            )
+            # 만료 항목 정리 후, 최대 개수를 넘으면 가장 오래 사용하지 않은 항목부터 제거 (LRU)
+            self._conn.execute("DELETE FROM cache WHERE ns = ? AND expires < ?", (self.namespace, now))
+            self._conn.execute(
+                "DELETE FROM cache WHERE ns = ? AND key IN ("
+                "SELECT key FROM cache WHERE ns = ? ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.namespace, self.namespace, self.maxsize),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE ns = ? AND key = ?", (self.namespace, key))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE ns = ?", (self.namespace,))
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM cache WHERE ns = ?", (self.namespace,)).fetchone()
+        return int(row[0])
+
+    def stats(self) -> Dict[str, Any]:
+        size = len(self)
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": "sqlite",
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "size": size,
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+
+class RedisCache:
+    """
+    Redis 호환 서버(Redis, Valkey, KeyDB 등) 기반 캐시.
+    메모리 상한은 서버의 maxmemory/LRU 정책으로, 만료는 키 TTL로 처리합니다.
+    redis 패키지가 필요합니다 (pip install redis).
+    """
+
+    def __init__(self, url: str, ttl: float = 3600.0, namespace: str = "default"):
+        import redis  # 선택 의존성: 이 백엔드를 쓸 때만 필요
+        self._redis = redis.Redis.from_url(url)
+        self.ttl = float(ttl)
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _k(self, key: str) -> str:
+        return f"newsbot:{self.namespace}:{key}"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        raw = self._redis.get(self._k(key))
+        with self._lock:
+            if raw is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        seconds = max(1, int(self.ttl if ttl is None else ttl))
+        self._redis.set(self._k(key), json.dumps(value, ensure_ascii=False), ex=seconds)
+
+    def delete(self, key: str) -> None:
+        self._redis.delete(self._k(key))
+
+    def clear(self) -> None:
+        for k in self._redis.scan_iter(match=self._k("*")):
+            self._redis.delete(k)
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": "redis",
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "ttl": self.ttl,
+            }
+
+
+def create_cache(backend: str, namespace: str, maxsize: int = 1024, ttl: float = 3600.0):
+    """
+    백엔드 이름으로 캐시를 생성합니다.
+
+    Args:
+        backend: "memory" | "sqlite" | "redis"
+        namespace: 같은 저장소를 여러 용도로 나눠 쓸 때의 구분자
+        maxsize: 최대 항목 수 (redis는 서버 설정을 따름)
+        ttl: 기본 만료 시간(초)
+
+    sqlite 경로는 CACHE_SQLITE_PATH, redis 주소는 REDIS_URL 환경변수를 사용합니다.
+    redis 패키지가 설치되어 있지 않으면 경고를 남기고 sqlite 백엔드를 사용합니다.
+    """
+    backend = (backend or "memory").strip().lower()
+    if backend == "redis":
+        url = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+        try:
+            return RedisCache(url, ttl=ttl, namespace=namespace)
+        except ImportError:
+            logger.warning("redis 패키지가 없어 %s 캐시를 sqlite로 대신합니다. (pip install redis)", namespace)
+            backend = "sqlite"
+    if backend == "sqlite":
+        path = os.environ.get("CACHE_SQLITE_PATH", "newsbot_cache.sqlite3")
+        return SqliteCache(path, maxsize=maxsize, ttl=ttl, namespace=namespace)
+    if backend != "memory":
+        raise ValueError(f"알 수 없는 캐시 백엔드: {backend}")
+    return TTLCache(maxsize=maxsize, ttl=ttl)
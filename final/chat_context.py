@@ -0,0 +1,160 @@
+"""
+대화 기록 압축: 프롬프트 크기가 대화 길이에 비례해 커지지 않도록 토큰 예산 안에서 문맥을 구성합니다.
+
+- 최근 대화는 원문 그대로(CHAT_CONTEXT_BUDGET 토큰 이내)
+- 그보다 오래된 대화는 누적 요약(running summary) 한 덩어리로 대체
+- 요약 경계는 CHAT_COMPACT_CHUNK 턴 단위로만 움직이므로 요약 갱신은 몇 턴에 한 번만 필요하고,
+  결과는 대화 접두부(prefix)의 해시로 캐시되어 같은 대화의 다음 요청에서 재사용됩니다.
+- 캐시에 없는 요약은 백그라운드에서 생성하고, 그동안은 직전 요약 + 잘라낸 원문(최근 쪽부터 같은 토큰 예산까지)으로
+  대신해 요청 지연·프롬프트 크기가 대화 길이와 무관하게 유지되도록 합니다.
+"""
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from cache import TTLCache
+from tokens import estimate_tokens
+
+CHAT_CONTEXT_BUDGET = int(os.environ.get("CHAT_CONTEXT_BUDGET", "1500"))  # 원문 유지 대화의 토큰 예산
+CHAT_COMPACT_CHUNK = int(os.environ.get("CHAT_COMPACT_CHUNK", "4"))  # 요약 경계 이동 단위(턴)
+CHAT_FALLBACK_CHARS = 120  # 요약이 준비되지 않았을 때 오래된 턴당 남길 글자 수
+
+Turn = Tuple[str, str]  # (role, text)
+Summarizer = Callable[[str, List[Turn]], str]  # (이전 요약, 새로 요약할 턴들) -> 새 요약
+
+_summary_cache = TTLCache(maxsize=2048, ttl=6 * 3600)
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-compact")
+_pending_lock = threading.Lock()
+_pending = set()
+
+
+def normalize_history(chat_history: List[Dict]) -> List[Turn]:
+    """[{"role", "parts": [{"text"}]}] 또는 [{"role", "text"}] 형식을 (role, text) 목록으로 바꿉니다."""
+    turns = []
+    for turn in chat_history:
+        role = turn.get("role", "")
+        if role not in ("user", "model"):
+            continue
+        text = (turn.get("parts", [{}])[0].get("text", "") if turn.get("parts") else turn.get("text", "")) or ""
+        turns.append((role, text))
+    return turns
+
+
+def format_turns(turns: List[Turn]) -> str:
+    out = ""
+    for role, text in turns:
+        out += f"\n\n[{'사용자' if role == 'user' else '챗봇'}]\n{text}"
+    return out
+
+
+def _prefix_hashes(scope: str, turns: List[Turn]) -> List[str]:
+    """hashes[i] = turns[:i]의 해시 (hashes[0]은 빈 접두부)."""
+    h = hashlib.sha256(scope.encode("utf-8")).hexdigest()
+    hashes = [h]
+    for role, text in turns:
+        h = hashlib.sha256(f"{h}\x00{role}\x00{text}".encode("utf-8")).hexdigest()
+        hashes.append(h)
+    return hashes
+
+
+def _split_point(turns: List[Turn], budget: int, chunk: int) -> int:
+    """원문으로 남길 최근 턴이 예산 안에 들어오는 가장 작은 chunk 배수 경계를 찾습니다."""
+    sizes = [estimate_tokens(text) + 4 for _, text in turns]
+    total = sum(sizes)
+    boundary = 0
+    while boundary < len(turns) and total > budget:
+        step = min(chunk, len(turns) - boundary)
+        total -= sum(sizes[boundary:boundary + step])
+        boundary += step
+    # 최소한 마지막 턴 하나는 원문으로 유지
+    return min(boundary, max(len(turns) - 1, 0))
+
+
+def _truncate_turns(turns: List[Turn], budget: int) -> str:
+    """턴마다 CHAT_FALLBACK_CHARS자로 자르고, 최근 턴부터 budget 토큰까지만 남깁니다."""
+    lines = []
+    used = 0
+    for role, text in reversed(turns):
+        text = " ".join(text.split())
+        if len(text) > CHAT_FALLBACK_CHARS:
+            text = text[:CHAT_FALLBACK_CHARS] + "…"
+        line = f"- {'사용자' if role == 'user' else '챗봇'}: {text}"
+        used += estimate_tokens(line)
+        if used > budget:
+            lines.append(f"- (이전 대화 {len(turns) - len(lines)}턴 생략)")
+            break
+        lines.append(line)
+    return "\n".join(reversed(lines))
+
+
+def _roll_up(key: str, prev_summary: str, new_turns: List[Turn], summarizer: Summarizer) -> None:
+    try:
+        summary = summarizer(prev_summary, new_turns)
+        if summary:
+            _summary_cache.set(key, summary)
+    except Exception:
+        pass
+    finally:
+        with _pending_lock:
+            _pending.discard(key)
+
+
+def compact_history(
+    scope: str,
+    chat_history: List[Dict],
+    summarizer: Optional[Summarizer] = None,
+    budget: Optional[int] = None,
+) -> Tuple[str, List[Turn], Dict[str, int]]:
+    """
+    대화 기록을 (오래된 대화 요약, 원문으로 남길 최근 턴, 통계)로 나눕니다.
+
+    Args:
+        scope: 대화를 구분하는 문자열 (키워드·뉴스 요약 등). 요약 캐시 키에 포함됩니다.
+        chat_history: 이전 대화 기록
+        summarizer: 누적 요약을 만드는 함수. None이면 잘라낸 원문만 사용
+        budget: 원문 유지 토큰 예산 (기본 CHAT_CONTEXT_BUDGET)
+
+    Returns:
+        (running_summary, recent_turns, {"turns", "summarized_turns", "history_tokens"})
+    """
+    turns = normalize_history(chat_history)
+    budget = CHAT_CONTEXT_BUDGET if budget is None else budget
+    boundary = _split_point(turns, budget, max(1, CHAT_COMPACT_CHUNK))
+    older, recent = turns[:boundary], turns[boundary:]
+    running = ""
+    if older:
+        hashes = _prefix_hashes(scope, turns)
+        running = _summary_cache.get(hashes[boundary])
+        if running is None:
+            # 가장 긴 캐시된 접두부 요약 + 아직 요약되지 않은 턴은 잘라낸 원문으로 대신
+            covered, prev = 0, ""
+            for i in range(boundary - 1, 0, -1):
+                cached, expired = _summary_cache.peek(hashes[i])
+                if cached is not None and not expired:
+                    covered, prev = i, cached
+                    break
+            fallback_budget = max(0, budget - estimate_tokens(prev))
+            running = "\n".join(p for p in (prev, _truncate_turns(older[covered:], fallback_budget)) if p)
+            if summarizer is not None:
+                key = hashes[boundary]
+                with _pending_lock:
+                    schedule = key not in _pending
+                    _pending.add(key)
+                if schedule:
+                    _executor.submit(_roll_up, key, prev, older[covered:], summarizer)
+    stats = {
+        "turns": len(turns),
+        "summarized_turns": len(older),
+        "history_tokens": estimate_tokens(running) + estimate_tokens(format_turns(recent)),
+    }
+    return running, recent, stats
+
+
+def chat_context_stats() -> Dict:
+    """누적 요약 캐시 통계와 생성 대기 중인 요약 수."""
+    stats = _summary_cache.stats()
+    with _pending_lock:
+        stats["pending"] = len(_pending)
+    return stats
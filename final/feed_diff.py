@@ -0,0 +1,73 @@
+"""
+키워드별 기사 묶음 변경 감지.
+
+키워드마다 마지막으로 요약한 기사 묶음(link 목록)과 요약을 저장해 두고,
+새로 수집한 기사와 비교해 추가/삭제된 기사를 알려 줍니다.
+- 추가된 기사가 없으면 이전 요약을 그대로 재사용
+- 추가된 기사가 적으면(INCREMENTAL_MAX_NEW 이하) "기존 요약 + 새 기사"로 요약만 갱신
+저장소는 요약 캐시와 같은 백엔드(SUMMARY_CACHE_BACKEND)를 사용합니다.
+"""
+import os
+from typing import Any, Dict, List, Optional
+
+from cache import create_cache
+
+INCREMENTAL_MAX_NEW = int(os.environ.get("INCREMENTAL_MAX_NEW", "3"))
+
+_state = create_cache(
+    os.environ.get("SUMMARY_CACHE_BACKEND", "memory"),
+    namespace="feed_state",
+    maxsize=int(os.environ.get("SUMMARY_CACHE_SIZE", "512")),
+    ttl=float(os.environ.get("FEED_STATE_TTL", "86400")),
+)
+
+
+def _key(keyword: str) -> str:
+    return " ".join(keyword.split()).lower()
+
+
+def article_id(article: Dict[str, str]) -> str:
+    """기사 식별자: link(없으면 guid, 제목)."""
+    return (article.get("link") or article.get("guid") or article.get("title") or "").strip()
+
+
+def get_state(keyword: str) -> Optional[Dict[str, Any]]:
+    """마지막으로 요약한 {"ids", "titles", "summary"}를 반환합니다. 없으면 None."""
+    return _state.get(_key(keyword))
+
+
+def save_state(keyword: str, articles: List[Dict[str, str]], summary: str) -> None:
+    _state.set(_key(keyword), {
+        "ids": [article_id(a) for a in articles],
+        "titles": [a.get("title", "") for a in articles],
+        "summary": summary,
+    })
+
+
+def diff_articles(prev_ids: List[str], articles: List[Dict[str, str]]) -> Dict[str, Any]:
+    """이전 기사 id 목록과 새 기사 목록을 비교합니다."""
+    current = [article_id(a) for a in articles]
+    prev_set, cur_set = set(prev_ids), set(current)
+    added = [i for i in current if i not in prev_set]
+    removed = [i for i in prev_ids if i not in cur_set]
+    return {"added": added, "removed": removed, "unchanged": not added and not removed}
+
+
+def changes_for(keyword: str, articles: List[Dict[str, str]]) -> Dict[str, Any]:
+    """
+    /api/news 응답용 변경 정보. 마지막으로 요약한 기사 묶음과 비교합니다.
+    summary_reusable이 True면 클라이언트는 요약을 다시 요청하지 않아도 됩니다.
+    """
+    state = get_state(keyword)
+    if state is None:
+        return {
+            "previous": False,
+            "added": [article_id(a) for a in articles],
+            "removed": [],
+            "unchanged": False,
+            "summary_reusable": False,
+        }
+    changes = diff_articles(state.get("ids", []), articles)
+    changes["previous"] = True
+    changes["summary_reusable"] = bool(state.get("summary")) and not changes["added"]
+    return changes
@@ -2,15 +2,36 @@
 Gemini 3 Flash를 사용해 뉴스 요약 및 대화 기능을 제공합니다.
 API 키는 반드시 환경변수 GEMINI_API_KEY로만 주입합니다. (코드/로그에 노출 금지)
 """
+import asyncio
+import hashlib
+import json
 import os
-from typing import List, Dict, Optional
+import threading
+import time
+from typing import Any, AsyncIterator, Iterator, List, Dict, Optional, Tuple
+
+import metrics
+import model_router
+import rate_limit
+from article_fetcher import ARTICLE_FULLTEXT, cached_article_text, enrich_articles
+from article_index import retrieve_snippets
+from cache import create_cache
+from chat_context import compact_history, format_turns
+from feed_diff import INCREMENTAL_MAX_NEW, article_id, diff_articles, get_state, save_state
+from prompt_builder import build_article_section, pack_budget
+from singleflight import AsyncSingleFlight, SingleFlight
 
 # API 키: 환경변수에서만 읽음. 배포 시 Vercel 등에서 환경변수로 설정.
-# 로컬 개발 시에만 키가 없을 때 .env 시도 (Vercel에서는 사용 안 함)
+# 로컬 개발 시에만 키가 없을 때 .env 시도 (Vercel에서는 사용 안 함, 프로세스당 한 번만)
+_dotenv_tried = False
+
+
 def _get_api_key() -> str:
+    global _dotenv_tried
     key = os.environ.get("GEMINI_API_KEY")
-    if key:
-        return key
+    if key or _dotenv_tried:
+        return key or ""
+    _dotenv_tried = True
     try:
         from dotenv import load_dotenv
         load_dotenv()
@@ -20,16 +41,262 @@ def _get_api_key() -> str:
     return key or ""
 
 
+# 클라이언트 HTTP 연결 풀 설정 (환경변수로 조정 가능)
+GEMINI_POOL_SIZE = int(os.environ.get("GEMINI_POOL_SIZE", "20"))
+GEMINI_TIMEOUT = float(os.environ.get("GEMINI_TIMEOUT", "60"))  # 초
+GEMINI_KEEPALIVE = float(os.environ.get("GEMINI_KEEPALIVE", "60"))  # 유휴 연결 유지 시간(초)
+GEMINI_BASE_URL = os.environ.get("GEMINI_BASE_URL") or None  # 벤치마크용 가짜 Gemini 서버 주소
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _http_options():
+    import httpx
+    from google.genai import types
+    limits = httpx.Limits(
+        max_connections=GEMINI_POOL_SIZE,
+        max_keepalive_connections=GEMINI_POOL_SIZE,
+        keepalive_expiry=GEMINI_KEEPALIVE,
+    )
+    return types.HttpOptions(
+        base_url=GEMINI_BASE_URL,
+        timeout=int(GEMINI_TIMEOUT * 1000),  # HttpOptions.timeout은 밀리초
+        client_args={"limits": limits},
+        async_client_args={"limits": limits},
+    )
+
+
 def get_client():
-    """Gemini API 클라이언트를 반환합니다. API 키는 환경변수에서만 사용합니다."""
-    from google import genai
-    api_key = _get_api_key()
-    if not api_key:
-        raise ValueError("GEMINI_API_KEY가 설정되지 않았습니다. 배포 환경의 환경변수를 확인하세요.")
-    return genai.Client(api_key=api_key)
+    """
+    프로세스 전역 Gemini API 클라이언트를 반환합니다. API 키는 환경변수에서만 사용합니다.
+    처음 호출될 때 한 번만 만들고, 이후 호출(Vercel warm 호출 포함)은 같은 클라이언트와
+    keep-alive 연결 풀을 재사용합니다.
+    """
+    global _client
+    if _client is not None:
+        return _client
+    with _client_lock:
+        if _client is None:
+            from google import genai
+            api_key = _get_api_key()
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY가 설정되지 않았습니다. 배포 환경의 환경변수를 확인하세요.")
+            _client = genai.Client(api_key=api_key, http_options=_http_options())
+    return _client
+
 
+def get_async_client():
+    """get_client()와 같은 설정·API 키를 공유하는 asyncio용 클라이언트(client.aio)를 반환합니다."""
+    return get_client().aio
+
+
+# 기본 모델 (GEMINI_MODEL). 호출 종류·프롬프트 크기별 모델은 model_router(GEMINI_MODEL_TIERS)가 고름
+MODEL_ID = model_router.GEMINI_MODEL
+
+
+def _generate(client, contents: str, kind: str, config=None):
+    """
+    generate_content 호출 시간과 usage_metadata 토큰 수를 metrics에 기록합니다.
+    rate_limit 제한기에서 자리를 얻은 뒤 호출하며, 429/5xx는 백오프 후 다시 시도합니다.
+    모델은 model_router가 고르고, 응답이 p95보다 늦으면 헤지 요청을 한 번 더 보냅니다.
+    """
+    limiter = rate_limit.get_limiter()
+    cost = rate_limit.estimate_cost(contents)
+    route = model_router.route(kind, contents)
+
+    def call(model: str):
+        with limiter.slot(kind, cost) as permit:
+            with metrics.span("gemini_generate", kind=kind):
+                response = client.models.generate_content(model=model, contents=contents, config=config)
+            permit.settle(response)
+        metrics.record_usage(response, kind)
+        return response
+
+    attempt = 0
+    while True:
+        try:
+            return model_router.call(call, route)
+        except Exception as e:
+            delay = limiter.retry_delay(e, attempt, kind)
+            if delay is None:
+                raise
+        attempt += 1
+        time.sleep(delay)
+
+
+def _stream_text(client, contents: str, kind: str) -> Iterator[str]:
+    """
+    generate_content_stream의 텍스트 조각을 yield하며 첫 조각까지의 시간·전체 시간·토큰 수를 기록합니다.
+    재시도와 헤지는 아직 아무 조각도 보내지 않았을 때만 합니다. (이미 보낸 텍스트와 섞이지 않도록)
+    """
+    limiter = rate_limit.get_limiter()
+    cost = rate_limit.estimate_cost(contents)
+    route = model_router.route(kind, contents)
+
+    def open_stream(model: str) -> Iterator[str]:
+        last = None
+        try:
+            with limiter.slot(kind, cost) as permit:
+                for chunk in client.models.generate_content_stream(model=model, contents=contents):
+                    last = chunk
+                    text = getattr(chunk, "text", "") or ""
+                    if text:
+                        yield text
+                permit.settle(last)
+        finally:
+            if last is not None:
+                metrics.record_usage(last, kind)
+
+    started = time.perf_counter()
+    first = True
+    attempt = 0
+    try:
+        while True:
+            try:
+                for text in model_router.race(open_stream, route):
+                    if first:
+                        first = False
+                        metrics.record_stage("gemini_first_token", time.perf_counter() - started, kind=kind)
+                    yield text
+                return
+            except Exception as e:
+                delay = limiter.retry_delay(e, attempt, kind) if first else None
+                if delay is None:
+                    raise
+            attempt += 1
+            time.sleep(delay)
+    finally:
+        metrics.record_stage("gemini_stream", time.perf_counter() - started, kind=kind)
+
+
+async def _agenerate(client, contents: str, kind: str, config=None):
+    """_generate의 asyncio 버전. (client는 client.aio)"""
+    limiter = rate_limit.get_limiter()
+    cost = rate_limit.estimate_cost(contents)
+    route = model_router.route(kind, contents)
+
+    async def call(model: str):
+        async with limiter.aslot(kind, cost) as permit:
+            with metrics.span("gemini_generate", kind=kind):
+                response = await client.models.generate_content(model=model, contents=contents, config=config)
+            permit.settle(response)
+        metrics.record_usage(response, kind)
+        return response
+
+    attempt = 0
+    while True:
+        try:
+            return await model_router.acall(call, route)
+        except Exception as e:
+            delay = limiter.retry_delay(e, attempt, kind)
+            if delay is None:
+                raise
+        attempt += 1
+        await asyncio.sleep(delay)
+
+
+async def _astream_text(client, contents: str, kind: str) -> AsyncIterator[str]:
+    """_stream_text의 asyncio 버전."""
+    limiter = rate_limit.get_limiter()
+    cost = rate_limit.estimate_cost(contents)
+    route = model_router.route(kind, contents)
+
+    async def open_stream(model: str) -> AsyncIterator[str]:
+        last = None
+        try:
+            async with limiter.aslot(kind, cost) as permit:
+                async for chunk in await client.models.generate_content_stream(model=model, contents=contents):
+                    last = chunk
+                    text = getattr(chunk, "text", "") or ""
+                    if text:
+                        yield text
+                permit.settle(last)
+        finally:
+            if last is not None:
+                metrics.record_usage(last, kind)
+
+    started = time.perf_counter()
+    first = True
+    attempt = 0
+    try:
+        while True:
+            try:
+                async for text in model_router.arace(open_stream, route):
+                    if first:
+                        first = False
+                        metrics.record_stage("gemini_first_token", time.perf_counter() - started, kind=kind)
+                    yield text
+                return
+            except Exception as e:
+                delay = limiter.retry_delay(e, attempt, kind) if first else None
+                if delay is None:
+                    raise
+            attempt += 1
+            await asyncio.sleep(delay)
+    finally:
+        metrics.record_stage("gemini_stream", time.perf_counter() - started, kind=kind)
+
+
+# 요약 결과 캐시: 같은 모델·키워드·기사 묶음이면 Gemini를 다시 호출하지 않음
+# SUMMARY_CACHE_BACKEND: memory(기본) | sqlite | redis
+_summary_cache = create_cache(
+    os.environ.get("SUMMARY_CACHE_BACKEND", "memory"),
+    namespace="summary",
+    maxsize=int(os.environ.get("SUMMARY_CACHE_SIZE", "512")),
+    ttl=float(os.environ.get("SUMMARY_CACHE_TTL", "1800")),
+)
+
+_summary_flight = SingleFlight()
+_asummary_flight = AsyncSingleFlight()
+
+
+def summary_cache_key(keyword: str, articles: List[Dict[str, str]]) -> str:
+    """
+    (요약 모델, 키워드, 정규화한 제목/링크 집합)의 안정적인 해시를 반환합니다.
+    요약 모델은 model_router가 summary 호출에 고를 수 있는 모델 목록이라, GEMINI_MODEL_TIERS를 바꾸면 키도 바뀝니다.
+    """
+    items = sorted(
+        (" ".join((a.get("title") or "").split()), (a.get("link") or "").strip())
+        for a in articles
+    )
+    payload = json.dumps(
+        ["|".join(model_router.kind_models("summary")), " ".join(keyword.split()).lower(), items],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_summary(keyword: str, articles: List[Dict[str, str]]) -> Optional[str]:
+    """캐시에 있는 요약을 반환합니다. 없으면 None."""
+    if not articles:
+        return None
+    return _summary_cache.get(summary_cache_key(keyword, articles))
 
-MODEL_ID = "gemini-3-flash-preview"
+
+def summary_cache_stats() -> Dict[str, Any]:
+    """요약 캐시 적중/미스 카운터를 반환합니다."""
+    stats = _summary_cache.stats()
+    stats["coalesced"] = _summary_flight.stats()["coalesced"] + _asummary_flight.stats()["coalesced"]
+    return stats
+
+
+def _collect_counters():
+    stats = summary_cache_stats()
+    for name in ("hits", "misses", "coalesced"):
+        if isinstance(stats.get(name), (int, float)):
+            yield f"newsbot_cache_{name}_total", {"cache": "summary"}, stats[name]
+
+
+def _collect_metrics():
+    size = summary_cache_stats().get("size")
+    if isinstance(size, (int, float)):
+        yield "newsbot_cache_size", {"cache": "summary"}, size
+
+
+metrics.register_collector(_collect_counters, kind="counter")
+metrics.register_collector(_collect_metrics)
 
 
 def summarize_news(keyword: str, articles: List[Dict[str, str]]) -> str:
@@ -45,30 +312,256 @@ def summarize_news(keyword: str, articles: List[Dict[str, str]]) -> str:
     """
     if not articles:
         return "수집된 뉴스가 없습니다."
-    
-    client = get_client()
-    
-    news_text = ""
-    for i, a in enumerate(articles, 1):
-        news_text += f"\n[기사 {i}] {a.get('title', '')}\n"
-        if a.get("summary"):
-            news_text += f"요약: {a['summary']}\n"
-        if a.get("source"):
-            news_text += f"출처: {a['source']}\n"
-    
-    prompt = f"""다음은 '{keyword}' 키워드로 수집한 뉴스 기사들입니다.
+
+    cache_key = summary_cache_key(keyword, articles)
+    cached = _summary_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    # 같은 기사 묶음을 동시에 요약하려는 요청은 한 번의 Gemini 호출 결과를 공유
+    return _summary_flight.do(cache_key, _generate_summary, keyword, articles, cache_key)
+
+
+def _format_articles(keyword: str, articles: List[Dict[str, str]], packed: int = 1) -> str:
+    # ARTICLE_FULLTEXT=1이면 기사 링크에서 받은 본문 일부를 붙임 (article_fetcher.py)
+    # 요청 본문의 임의 링크를 받지 않도록, 서버 피드 캐시에 있는 키워드 기사 링크만 받음
+    if ARTICLE_FULLTEXT:
+        from news_fetcher import cached_links
+        articles = enrich_articles(articles, cached_links(keyword))
+    # 거의 같은 기사 합치기·중복 요약 제거·토큰 예산 적용 (prompt_builder.py)
+    # packed개 키워드를 한 프롬프트로 묶는 경우 묶음 전체 예산(PACK_PROMPT_BUDGET)을 나눠 씀
+    budget = pack_budget(articles, packed) if packed > 1 else None
+    news_text, _ = build_article_section(articles, budget)
+    return news_text
+
+
+def _build_summary_prompt(keyword: str, articles: List[Dict[str, str]]) -> str:
+    news_text = _format_articles(keyword, articles)
+    return f"""다음은 '{keyword}' 키워드로 수집한 뉴스 기사들입니다.
 각 기사의 제목·요약·출처를 바탕으로 전체를 2~3문단으로 요약해 주세요.
 핵심 이슈와 흐름을 담아 읽기 쉽게 작성해 주세요.
 
 {news_text}
 
 위 뉴스 요약 (한국어):"""
-    
-    response = client.models.generate_content(
-        model=MODEL_ID,
-        contents=prompt,
+
+
+def _build_update_prompt(
+    keyword: str,
+    prev_summary: str,
+    new_articles: List[Dict[str, str]],
+    removed_titles: List[str],
+) -> str:
+    removed = "".join(f"\n- {t}" for t in removed_titles if t) or "\n(없음)"
+    return f"""다음은 '{keyword}' 키워드 뉴스의 기존 요약과, 그 이후 새로 수집된 기사들입니다.
+기존 요약을 바탕으로 새 기사 내용을 반영해 전체를 2~3문단으로 다시 요약해 주세요.
+목록에서 빠진 기사에만 근거한 내용은 비중을 줄이세요.
+
+[기존 요약]
+{prev_summary}
+
+[새 기사]
+{_format_articles(keyword, new_articles)}
+[목록에서 빠진 기사]{removed}
+
+갱신된 뉴스 요약 (한국어):"""
+
+
+def _plan_summary(keyword: str, articles: List[Dict[str, str]]) -> Tuple[Optional[str], str]:
+    """
+    (재사용할 요약, 프롬프트)를 반환합니다.
+    마지막으로 요약한 기사 묶음과 비교해 새 기사가 없으면 이전 요약을 그대로 쓰고,
+    새 기사가 적으면 전체 재요약 대신 "기존 요약 갱신" 프롬프트를 사용합니다.
+    """
+    with metrics.span("prompt_build", kind="summary"):
+        return _plan_summary_inner(keyword, articles)
+
+
+async def _aplan_summary(keyword: str, articles: List[Dict[str, str]]) -> Tuple[Optional[str], str]:
+    """_plan_summary의 asyncio 버전. 본문 수집(네트워크 대기)이 켜져 있으면 스레드에서 실행합니다."""
+    if ARTICLE_FULLTEXT:
+        return await asyncio.to_thread(_plan_summary, keyword, articles)
+    return _plan_summary(keyword, articles)
+
+
+def _plan_summary_inner(keyword: str, articles: List[Dict[str, str]]) -> Tuple[Optional[str], str]:
+    state = get_state(keyword)
+    if state and state.get("summary"):
+        changes = diff_articles(state.get("ids", []), articles)
+        if not changes["added"]:
+            return state["summary"], ""
+        if len(changes["added"]) <= INCREMENTAL_MAX_NEW:
+            added = set(changes["added"])
+            removed = set(changes["removed"])
+            new_articles = [a for a in articles if article_id(a) in added]
+            removed_titles = [
+                t for i, t in zip(state.get("ids", []), state.get("titles", [])) if i in removed
+            ]
+            return None, _build_update_prompt(keyword, state["summary"], new_articles, removed_titles)
+    return None, _build_summary_prompt(keyword, articles)
+
+
+def _store_summary(cache_key: str, keyword: str, articles: List[Dict[str, str]], summary: str) -> None:
+    _summary_cache.set(cache_key, summary)
+    save_state(keyword, articles, summary)
+
+
+def _generate_summary(keyword: str, articles: List[Dict[str, str]], cache_key: str) -> str:
+    reuse, prompt = _plan_summary(keyword, articles)
+    if reuse is not None:
+        _store_summary(cache_key, keyword, articles, reuse)
+        return reuse
+    response = _generate(get_client(), prompt, "summary")
+    summary = getattr(response, "text", "") or str(response)
+    if getattr(response, "text", ""):
+        _store_summary(cache_key, keyword, articles, summary)
+    return summary
+
+
+def summarize_news_multi(groups: Dict[str, List[Dict[str, str]]]) -> Dict[str, str]:
+    """
+    여러 키워드의 기사 묶음을 한 번의 Gemini 호출로 요약합니다. (배치 API용)
+
+    Args:
+        groups: {키워드: 기사 리스트}
+
+    Returns:
+        {키워드: 요약 텍스트}. 캐시에 있는 키워드는 호출 없이 채우고,
+        응답에서 빠진 키워드는 summarize_news로 개별 요약합니다.
+    """
+    results: Dict[str, str] = {}
+    pending: Dict[str, List[Dict[str, str]]] = {}
+    for keyword, articles in groups.items():
+        cached = get_cached_summary(keyword, articles) if articles else None
+        if not articles:
+            results[keyword] = "수집된 뉴스가 없습니다."
+        elif cached is not None:
+            results[keyword] = cached
+        else:
+            pending[keyword] = articles
+    if len(pending) == 1:
+        keyword, articles = next(iter(pending.items()))
+        results[keyword] = summarize_news(keyword, articles)
+        return results
+    if not pending:
+        return results
+
+    sections = "".join(
+        f"\n=== 키워드: {keyword} ===\n{_format_articles(keyword, articles, len(pending))}"
+        for keyword, articles in pending.items()
     )
-    return getattr(response, "text", "") or str(response)
+    prompt = f"""다음은 여러 키워드로 각각 수집한 뉴스 기사들입니다.
+키워드마다 해당 기사들의 제목·요약·출처를 바탕으로 2~3문단으로 요약해 주세요.
+핵심 이슈와 흐름을 담아 읽기 쉽게 한국어로 작성해 주세요.
+응답은 {{"키워드": "요약"}} 형태의 JSON 객체 하나로만 작성하고, 키는 아래 키워드를 그대로 사용하세요.
+{sections}"""
+
+    response = _generate(get_client(), prompt, "summary_multi", config={"response_mime_type": "application/json"})
+    try:
+        packed = json.loads(getattr(response, "text", "") or "{}")
+    except ValueError:
+        packed = {}
+    for keyword, articles in pending.items():
+        summary = packed.get(keyword) if isinstance(packed, dict) else None
+        if isinstance(summary, str) and summary.strip():
+            summary = summary.strip()
+            _store_summary(summary_cache_key(keyword, articles), keyword, articles, summary)
+            results[keyword] = summary
+        else:
+            results[keyword] = summarize_news(keyword, articles)
+    return results
+
+
+def _build_chat_system_context(keyword: str, summary: str, snippets: str = "") -> str:
+    if not snippets:
+        return f"""당신은 '{keyword}' 관련 최신 뉴스를 요약·설명해 주는 뉴스 챗봇입니다.
+아래는 해당 키워드로 수집한 뉴스의 요약입니다. 이 내용을 바탕으로만 답변하세요.
+요약에 없는 내용은 "제공된 뉴스 요약에는 해당 정보가 없습니다"라고 답하세요.
+
+[뉴스 요약]
+{summary}
+"""
+    return f"""당신은 '{keyword}' 관련 최신 뉴스를 요약·설명해 주는 뉴스 챗봇입니다.
+아래는 해당 키워드로 수집한 뉴스의 요약과, 질문과 관련된 기사 발췌입니다. 이 내용을 바탕으로만 답변하세요.
+요약과 발췌에 모두 없는 내용은 "제공된 뉴스에는 해당 정보가 없습니다"라고 답하세요.
+
+[뉴스 요약]
+{summary}
+
+[질문 관련 기사 발췌]
+{snippets}
+"""
+
+
+def _chat_articles(keyword: str, articles: Optional[List[Dict[str, str]]]) -> List[Dict[str, str]]:
+    """
+    대화 검색 색인에 쓸 기사 목록. 요청에 기사가 없으면 이 프로세스의 피드 캐시에서 찾고,
+    본문 수집(ARTICLE_FULLTEXT)으로 받아 둔 본문이 있으면 붙입니다. (네트워크 요청 없음)
+    """
+    if not articles:
+        from news_fetcher import cached_articles
+        articles = cached_articles(keyword) or []
+    if ARTICLE_FULLTEXT:
+        with_content = []
+        for a in articles:
+            text = a.get("content") or cached_article_text(a.get("link", ""))
+            with_content.append(dict(a, content=text) if text else a)
+        articles = with_content
+    return articles
+
+
+def _summarize_turns(prev_summary: str, turns: List[Tuple[str, str]]) -> str:
+    """오래된 대화를 누적 요약에 합칩니다. (chat_context가 백그라운드에서 호출)"""
+    prompt = f"""다음은 뉴스 챗봇과 사용자의 이전 대화 요약과 그 이후의 대화입니다.
+둘을 합쳐, 이후 답변에 필요한 사실·질문·답변 요지만 5줄 이내로 간결하게 요약해 주세요.
+
+[이전 요약]
+{prev_summary or "(없음)"}
+
+[이후 대화]{format_turns(turns)}
+
+통합 요약 (한국어):"""
+    response = _generate(get_client(), prompt, "chat_compact")
+    return (getattr(response, "text", "") or "").strip()
+
+
+def _build_chat_prompt(
+    user_message: str,
+    keyword: str,
+    summary: str,
+    chat_history: List[Dict[str, str]],
+    articles: Optional[List[Dict[str, str]]] = None,
+) -> str:
+    with metrics.span("prompt_build", kind="chat"):
+        # 질문과 관련된 기사 구절만 골라 넣음 (article_index.py, BM25)
+        with metrics.span("chat_retrieval"):
+            snippets = retrieve_snippets(_chat_articles(keyword, articles), user_message)
+        full_prompt = _build_chat_system_context(keyword, summary, snippets)
+        # 오래된 대화는 누적 요약으로, 최근 대화만 원문으로 넣어 프롬프트 크기를 일정하게 유지
+        scope = f"{MODEL_ID}\x00{keyword}\x00{summary}"
+        running, recent, _ = compact_history(scope, chat_history, summarizer=_summarize_turns)
+        if running:
+            full_prompt += f"\n[이전 대화 요약]\n{running}\n"
+        full_prompt += format_turns(recent)
+        full_prompt += f"\n\n[사용자]\n{user_message}\n\n[챗봇]\n"
+    return full_prompt
+
+
+async def _abuild_chat_prompt(
+    user_message: str,
+    keyword: str,
+    summary: str,
+    chat_history: List[Dict[str, str]],
+    articles: Optional[List[Dict[str, str]]] = None,
+) -> str:
+    """_build_chat_prompt의 asyncio 버전. 대화 압축·검색(디스크 캐시 읽기 포함)이 이벤트 루프를 막지 않도록 스레드에서 실행합니다."""
+    return await asyncio.to_thread(_build_chat_prompt, user_message, keyword, summary, chat_history, articles)
+
+
+def _chat_error_message(e: Exception) -> str:
+    if rate_limit.is_throttled(e):
+        # 재시도 후에도 한도에 걸림: 원문 오류 대신 안내 문구
+        return "요청이 많아 응답이 지연되고 있습니다. 잠시 후 다시 시도해 주세요."
+    return f"응답 생성 중 오류가 발생했습니다: {e}"
 
 
 def chat_with_news(
@@ -76,59 +569,157 @@ def chat_with_news(
     keyword: str,
     summary: str,
     chat_history: List[Dict[str, str]],
+    articles: Optional[List[Dict[str, str]]] = None,
 ) -> str:
     """
-    뉴스 요약을 컨텍스트로 삼아 사용자 메시지에 답합니다.
+    뉴스 요약과 질문 관련 기사 발췌를 컨텍스트로 삼아 사용자 메시지에 답합니다.
     
     Args:
         user_message: 사용자 입력
         keyword: 검색 키워드
         summary: 뉴스 요약
         chat_history: [{"role": "user"|"model", "parts": [{"text": "..."}]}] 형식의 이전 대화 (선택)
+        articles: 검색할 기사 리스트 (선택, 없으면 피드 캐시에서 keyword로 찾음)
     
     Returns:
         모델 응답 텍스트
     """
     client = get_client()
     
-    system_context = f"""당신은 '{keyword}' 관련 최신 뉴스를 요약·설명해 주는 뉴스 챗봇입니다.
-아래는 해당 키워드로 수집한 뉴스의 요약입니다. 이 내용을 바탕으로만 답변하세요.
-요약에 없는 내용은 "제공된 뉴스 요약에는 해당 정보가 없습니다"라고 답하세요.
-
-[뉴스 요약]
-{summary}
-"""
-    
-    # google-genai는 대화형으로 contents에 이전 대화 + 새 메시지를 넣을 수 있음
-    contents = [system_context]
-    for turn in chat_history:
-        role = turn.get("role", "")
-        text = turn.get("parts", [{}])[0].get("text", "") if turn.get("parts") else turn.get("text", "")
-        if role == "user":
-            contents.append({"role": "user", "parts": [{"text": text}]})
-        elif role == "model":
-            contents.append({"role": "model", "parts": [{"text": text}]})
-    
-    contents.append({"role": "user", "parts": [{"text": user_message}]})
-    
-    # SDK에 따라 generate_content에 history를 넘기는 방식이 다를 수 있음
-    # 간단히 마지막 사용자 메시지와 시스템 컨텍스트만 보내는 방식으로 시도
     try:
-        # 채팅 API가 있다면 사용, 없으면 단일 요청으로 처리
-        full_prompt = system_context
-        for turn in chat_history:
-            role = turn.get("role", "")
-            text = (turn.get("parts", [{}])[0].get("text", "") if turn.get("parts") else turn.get("text", "")) or ""
-            if role == "user":
-                full_prompt += f"\n\n[사용자]\n{text}"
-            elif role == "model":
-                full_prompt += f"\n\n[챗봇]\n{text}"
-        full_prompt += f"\n\n[사용자]\n{user_message}\n\n[챗봇]\n"
+        full_prompt = _build_chat_prompt(user_message, keyword, summary, chat_history, articles)
         
-        response = client.models.generate_content(
-            model=MODEL_ID,
-            contents=full_prompt,
-        )
+        response = _generate(client, full_prompt, "chat")
+        return getattr(response, "text", "") or str(response)
+    except Exception as e:
+        return _chat_error_message(e)
+
+
+def summarize_news_stream(keyword: str, articles: List[Dict[str, str]]) -> Iterator[str]:
+    """
+    summarize_news의 스트리밍 버전. 생성되는 대로 텍스트 조각을 yield합니다.
+    캐시에 요약이 있으면 한 번에 yield하고, 새로 생성한 요약은 끝난 뒤 캐시에 저장합니다.
+    """
+    if not articles:
+        yield "수집된 뉴스가 없습니다."
+        return
+
+    cache_key = summary_cache_key(keyword, articles)
+    cached = _summary_cache.get(cache_key)
+    if cached is not None:
+        yield cached
+        return
+
+    reuse, prompt = _plan_summary(keyword, articles)
+    if reuse is not None:
+        _store_summary(cache_key, keyword, articles, reuse)
+        yield reuse
+        return
+
+    parts = []
+    for text in _stream_text(get_client(), prompt, "summary"):
+        parts.append(text)
+        yield text
+    summary = "".join(parts)
+    if summary:
+        _store_summary(cache_key, keyword, articles, summary)
+
+
+def chat_with_news_stream(
+    user_message: str,
+    keyword: str,
+    summary: str,
+    chat_history: List[Dict[str, str]],
+    articles: Optional[List[Dict[str, str]]] = None,
+) -> Iterator[str]:
+    """
+    chat_with_news의 스트리밍 버전. 생성되는 대로 텍스트 조각을 yield합니다.
+    오류는 문자열로 바꾸지 않고 그대로 예외로 전달합니다 (엔드포인트에서 error 이벤트로 전송).
+    """
+    client = get_client()
+    full_prompt = _build_chat_prompt(user_message, keyword, summary, chat_history, articles)
+    yield from _stream_text(client, full_prompt, "chat")
+
+
+# ---- asyncio 버전 (app_asgi.py에서 사용) ----
+
+async def summarize_news_async(keyword: str, articles: List[Dict[str, str]]) -> str:
+    """summarize_news의 asyncio 버전. 요약 캐시와 동시 요청 합치기를 동일하게 적용합니다."""
+    if not articles:
+        return "수집된 뉴스가 없습니다."
+
+    cache_key = summary_cache_key(keyword, articles)
+    cached = _summary_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    return await _asummary_flight.do(cache_key, _generate_summary_async, keyword, articles, cache_key)
+
+
+async def _generate_summary_async(keyword: str, articles: List[Dict[str, str]], cache_key: str) -> str:
+    reuse, prompt = await _aplan_summary(keyword, articles)
+    if reuse is not None:
+        _store_summary(cache_key, keyword, articles, reuse)
+        return reuse
+    response = await _agenerate(get_async_client(), prompt, "summary")
+    summary = getattr(response, "text", "") or str(response)
+    if getattr(response, "text", ""):
+        _store_summary(cache_key, keyword, articles, summary)
+    return summary
+
+
+async def chat_with_news_async(
+    user_message: str,
+    keyword: str,
+    summary: str,
+    chat_history: List[Dict[str, str]],
+    articles: Optional[List[Dict[str, str]]] = None,
+) -> str:
+    """chat_with_news의 asyncio 버전."""
+    client = get_async_client()
+    try:
+        full_prompt = await _abuild_chat_prompt(user_message, keyword, summary, chat_history, articles)
+        response = await _agenerate(client, full_prompt, "chat")
         return getattr(response, "text", "") or str(response)
     except Exception as e:
-        return f"응답 생성 중 오류가 발생했습니다: {e}"
+        return _chat_error_message(e)
+
+
+async def summarize_news_stream_async(keyword: str, articles: List[Dict[str, str]]) -> AsyncIterator[str]:
+    """summarize_news_stream의 asyncio 버전."""
+    if not articles:
+        yield "수집된 뉴스가 없습니다."
+        return
+
+    cache_key = summary_cache_key(keyword, articles)
+    cached = _summary_cache.get(cache_key)
+    if cached is not None:
+        yield cached
+        return
+
+    reuse, prompt = await _aplan_summary(keyword, articles)
+    if reuse is not None:
+        _store_summary(cache_key, keyword, articles, reuse)
+        yield reuse
+        return
+
+    parts = []
+    async for text in _astream_text(get_async_client(), prompt, "summary"):
+        parts.append(text)
+        yield text
+    summary = "".join(parts)
+    if summary:
+        _store_summary(cache_key, keyword, articles, summary)
+
+
+async def chat_with_news_stream_async(
+    user_message: str,
+    keyword: str,
+    summary: str,
+    chat_history: List[Dict[str, str]],
+    articles: Optional[List[Dict[str, str]]] = None,
+) -> AsyncIterator[str]:
+    """chat_with_news_stream의 asyncio 버전."""
+    client = get_async_client()
+    full_prompt = await _abuild_chat_prompt(user_message, keyword, summary, chat_history, articles)
+    async for text in _astream_text(client, full_prompt, "chat"):
+        yield text
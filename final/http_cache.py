@@ -0,0 +1,133 @@
+"""
+JSON 응답 압축(gzip/brotli)과 ETag 재검증(If-None-Match → 304).
+
+같은 키워드를 반복 조회(폴링)하는 클라이언트는 매번 같은 기사 10건 JSON을 다시 받습니다.
+app_web.py(Flask), api/_core.py(서버리스), app_asgi.py가 모두 이 모듈로 응답 본문을 인코딩합니다.
+- ETag: 직렬화한 JSON 본문의 해시(강한 ETag). 기사 묶음·요약이 같으면 본문도 같으므로 값이 같습니다.
+  압축한 응답은 인코딩별로 "-gzip"/"-br"을 붙여 구분하고, 비교할 때는 떼고 비교합니다.
+- 304: GET/HEAD 요청의 200 응답 ETag가 If-None-Match와 같으면 본문 없이 304로 바꿉니다.
+  POST 등은 부수 효과(세션 저장, 새 기사 diff 상태 갱신 등)가 이미 실행된 뒤이므로 ETag도 붙이지 않고
+  항상 전체 응답을 보냅니다. (RFC 9110: 안전하지 않은 메서드에 304를 보내지 않음)
+- 압축: Accept-Encoding 협상. brotli 패키지가 설치되어 있으면 br, 아니면 gzip.
+  HTTP_COMPRESS_MIN_BYTES보다 작은 본문은 그대로 보냅니다. 압축 결과는 ETag별로 잠시 캐시합니다.
+"""
+import gzip
+import hashlib
+import os
+from typing import List, Optional, Tuple
+
+import metrics
+from cache import TTLCache
+
+# 사용할 인코딩 (선호 순서). 앞단 프록시가 압축하는 경우 "off"로 끄기
+HTTP_COMPRESSION = [
+    e.strip() for e in os.environ.get("HTTP_COMPRESSION", "br,gzip").lower().split(",")
+    if e.strip() in ("br", "gzip")
+]
+HTTP_COMPRESS_MIN_BYTES = int(os.environ.get("HTTP_COMPRESS_MIN_BYTES", "1024"))
+HTTP_GZIP_LEVEL = int(os.environ.get("HTTP_GZIP_LEVEL", "6"))
+HTTP_BROTLI_QUALITY = int(os.environ.get("HTTP_BROTLI_QUALITY", "5"))
+
+_SUFFIXES = ("-gzip", "-br")
+_compressed = TTLCache(maxsize=256, ttl=600)
+
+try:
+    import brotli  # 선택 의존성
+except ImportError:
+    brotli = None
+
+
+def make_etag(body: bytes) -> str:
+    """본문 바이트의 강한 ETag (따옴표 포함)."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _opaque(tag: str) -> str:
+    """ETag에서 W/, 따옴표, 인코딩 접미사를 뗀 값."""
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    for suffix in _SUFFIXES:
+        if tag.endswith(suffix):
+            return tag[: -len(suffix)]
+    return tag
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match 헤더 값이 etag와 일치하는지. (약한 비교, 인코딩 접미사 무시)"""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    base = _opaque(etag)
+    return any(_opaque(tag) == base for tag in if_none_match.split(","))
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Accept-Encoding에서 사용할 인코딩("br", "gzip")을 고릅니다. 없으면 None."""
+    if not accept_encoding or not HTTP_COMPRESSION:
+        return None
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+    best, best_q = None, 0.0
+    for encoding in HTTP_COMPRESSION:
+        if encoding == "br" and brotli is None:
+            continue
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:  # 같은 q면 HTTP_COMPRESSION 순서가 앞선 쪽
+            best, best_q = encoding, q
+    return best
+
+
+def _compress(body: bytes, encoding: str, etag: str = "") -> bytes:
+    data = _compressed.get(etag) if etag else None
+    if data is None:
+        if encoding == "br":
+            data = brotli.compress(body, quality=HTTP_BROTLI_QUALITY)
+        else:
+            data = gzip.compress(body, compresslevel=HTTP_GZIP_LEVEL, mtime=0)
+        if etag:  # 인코딩 접미사가 붙은 ETag이므로 인코딩별로 따로 캐시됨
+            _compressed.set(etag, data)
+    return data
+
+
+def encode_response(
+    body: bytes,
+    status: int,
+    if_none_match: str = "",
+    accept_encoding: str = "",
+    method: str = "GET",
+) -> Tuple[int, bytes, List[Tuple[str, str]]]:
+    """
+    JSON 응답 본문에 ETag·304·압축을 적용합니다.
+    반환: (상태 코드, 보낼 본문, 추가 헤더 목록). Content-Type·Content-Length는 호출한 쪽에서 설정합니다.
+    ETag와 304는 GET/HEAD 요청의 200 응답에만 적용합니다.
+    """
+    headers: List[Tuple[str, str]] = [("Vary", "Accept-Encoding")]
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= HTTP_COMPRESS_MIN_BYTES else None
+    etag = ""
+    if status == 200 and method.upper() in ("GET", "HEAD"):
+        etag = make_etag(body)
+        if encoding:
+            etag = f'{etag[:-1]}-{encoding}"'
+        headers.append(("ETag", etag))
+        if etag_matches(if_none_match, etag):
+            metrics.inc("newsbot_http_not_modified_total", help="If-None-Match 일치로 304를 보낸 응답 수")
+            return 304, b"", headers
+    if encoding:
+        compressed = _compress(body, encoding, etag)
+        metrics.inc("newsbot_http_bytes_saved_total", {"encoding": encoding}, len(body) - len(compressed),
+                    help="응답 압축으로 줄인 바이트 수")
+        headers.append(("Content-Encoding", encoding))
+        body = compressed
+    return status, body, headers
@@ -0,0 +1,198 @@
+"""
+단계별 지연 측정과 Prometheus 형식 메트릭.
+
+- span("rss_download") 처럼 단계를 감싸면 newsbot_stage_seconds 히스토그램에 기록되고,
+  현재 요청의 단계별 시간표(timings)에도 누적됩니다.
+- Gemini 응답의 usage_metadata에서 프롬프트/응답 토큰 수를 집계합니다.
+- render_prometheus()는 /metrics 응답 본문을 만듭니다. 캐시 통계처럼 조회 시점에 읽는 값은
+  register_collector로 등록합니다. 누적 카운터(적중·미스 수 등)는 kind="counter"로 등록하고 이름을 _total로 끝냅니다.
+- METRICS_LOG=1 이면 요청이 끝날 때 단계별 시간을 JSON 한 줄로 로그에 남깁니다. (서버리스 포함)
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+METRICS_LOG = os.environ.get("METRICS_LOG") == "1"
+
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+logger = logging.getLogger("newsbot.timing")
+if METRICS_LOG and not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_lock = threading.Lock()
+_counters: Dict[str, Dict[Labels, float]] = {}
+_histograms: Dict[str, Dict[Labels, List[float]]] = {}  # [bucket counts..., sum, count]
+_help: Dict[str, str] = {}
+Collector = Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]
+_collectors: List[Tuple[Collector, str]] = []  # (함수, "gauge" | "counter")
+
+_request: "contextvars.ContextVar[Optional[dict]]" = contextvars.ContextVar("newsbot_request", default=None)
+
+
+def _labels(labels: Optional[Dict[str, str]]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+
+def inc(name: str, labels: Optional[Dict[str, str]] = None, value: float = 1.0, help: str = "") -> None:
+    """카운터를 증가시킵니다."""
+    key = _labels(labels)
+    with _lock:
+        if help:
+            _help.setdefault(name, help)
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0.0) + value
+
+
+def observe(name: str, seconds: float, labels: Optional[Dict[str, str]] = None, help: str = "") -> None:
+    """히스토그램에 값을 기록합니다."""
+    key = _labels(labels)
+    with _lock:
+        if help:
+            _help.setdefault(name, help)
+        series = _histograms.setdefault(name, {})
+        data = series.get(key)
+        if data is None:
+            data = series[key] = [0.0] * (len(_BUCKETS) + 2)
+        for i, bound in enumerate(_BUCKETS):
+            if seconds <= bound:
+                data[i] += 1
+        data[-2] += seconds
+        data[-1] += 1
+
+
+def register_collector(fn: Collector, kind: str = "gauge") -> None:
+    """
+    조회 시점에 (이름, 라벨, 값)들을 돌려주는 함수를 등록합니다.
+    kind="counter"면 단조 증가하는 누적 값으로 내보냅니다. (이름은 _total로 끝나야 함)
+    """
+    if kind not in ("gauge", "counter"):
+        raise ValueError(f"알 수 없는 메트릭 종류: {kind}")
+    with _lock:
+        _collectors.append((fn, kind))
+
+
+@contextmanager
+def span(stage: str, **labels):
+    """단계 실행 시간을 newsbot_stage_seconds{stage=...}와 현재 요청 시간표에 기록합니다."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        record_stage(stage, elapsed, **labels)
+
+
+def record_stage(stage: str, seconds: float, **labels) -> None:
+    observe("newsbot_stage_seconds", seconds, dict(labels, stage=stage), help="처리 단계별 소요 시간(초)")
+    req = _request.get()
+    if req is not None:
+        timings = req["timings"]
+        timings[stage] = round(timings.get(stage, 0.0) + seconds * 1000, 2)
+
+
+def record_usage(response, kind: str) -> None:
+    """Gemini 응답의 usage_metadata에서 토큰 수를 집계합니다."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_token_count", None) or 0
+    response_tokens = getattr(usage, "candidates_token_count", None) or 0
+    help_text = "Gemini 프롬프트/응답 토큰 수"
+    inc("newsbot_gemini_tokens_total", {"kind": kind, "type": "prompt"}, prompt_tokens, help=help_text)
+    inc("newsbot_gemini_tokens_total", {"kind": kind, "type": "response"}, response_tokens, help=help_text)
+    add_request_tokens("prompt", prompt_tokens)
+    add_request_tokens("response", response_tokens)
+
+
+def add_request_tokens(name: str, count: int) -> None:
+    """현재 요청의 토큰 집계(METRICS_LOG의 "tokens")에 값을 더합니다."""
+    req = _request.get()
+    if req is not None:
+        tokens = req.setdefault("tokens", {})
+        tokens[name] = tokens.get(name, 0) + count
+
+
+def start_request(endpoint: str):
+    """요청 시작. 반환값을 finish_request에 넘깁니다."""
+    req = {"endpoint": endpoint, "started": time.perf_counter(), "timings": {}}
+    token = _request.set(req)
+    return token, req
+
+
+def finish_request(handle, status: int) -> None:
+    """요청 종료: 요청 지연 히스토그램을 기록하고, METRICS_LOG=1이면 시간표를 로그로 남깁니다."""
+    token, req = handle
+    elapsed = time.perf_counter() - req["started"]
+    try:
+        _request.reset(token)
+    except ValueError:
+        _request.set(None)  # 다른 컨텍스트(스트리밍 제너레이터 등)에서 끝난 경우
+    labels = {"endpoint": req["endpoint"], "status": str(status)}
+    observe("newsbot_request_seconds", elapsed, labels, help="API 요청 처리 시간(초)")
+    if METRICS_LOG:
+        entry = {
+            "endpoint": req["endpoint"],
+            "status": status,
+            "total_ms": round(elapsed * 1000, 2),
+            "stages_ms": req["timings"],
+        }
+        if req.get("tokens"):
+            entry["tokens"] = req["tokens"]
+        logger.info(json.dumps(entry, ensure_ascii=False))
+
+
+def _fmt_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    escaped = (f'{k}="{v}"'.replace("\n", " ") for k, v in items)
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_prometheus() -> str:
+    """Prometheus text exposition format(0.0.4) 문자열을 반환합니다."""
+    lines: List[str] = []
+    with _lock:
+        counters = {n: dict(s) for n, s in _counters.items()}
+        histograms = {n: {k: list(v) for k, v in s.items()} for n, s in _histograms.items()}
+        collectors = list(_collectors)
+        helps = dict(_help)
+    for name, series in sorted(counters.items()):
+        if name in helps:
+            lines.append(f"# HELP {name} {helps[name]}")
+        lines.append(f"# TYPE {name} counter")
+        for labels, value in sorted(series.items()):
+            lines.append(f"{name}{_fmt_labels(labels)} {value:g}")
+    for name, series in sorted(histograms.items()):
+        if name in helps:
+            lines.append(f"# HELP {name} {helps[name]}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, data in sorted(series.items()):
+            for bound, count in zip(_BUCKETS, data):
+                lines.append(f"{name}_bucket{_fmt_labels(labels, (('le', f'{bound:g}'),))} {count:g}")
+            lines.append(f"{name}_bucket{_fmt_labels(labels, (('le', '+Inf'),))} {data[-1]:g}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {data[-2]:.6f}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {data[-1]:g}")
+    collected: Dict[Tuple[str, str], List[str]] = {}
+    for collect, kind in collectors:
+        try:
+            for name, labels, value in collect():
+                collected.setdefault((name, kind), []).append(f"{name}{_fmt_labels(_labels(labels))} {value:g}")
+        except Exception:
+            continue
+    for (name, kind), samples in sorted(collected.items()):
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
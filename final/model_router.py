@@ -0,0 +1,437 @@
+"""
+Gemini 모델 선택(라우팅)과 헤지(hedged) 요청.
+
+- 라우팅: 호출 종류(kind)와 프롬프트 크기(추정 토큰)로 모델을 고릅니다. GEMINI_MODEL_TIERS 예:
+      chat:gemini-2.5-flash-lite<1500, chat:gemini-3-flash-preview, summary:gemini-3-flash-preview|gemini-2.5-flash
+  항목 형식은 "종류:모델[|헤지 모델][<최대 토큰]"입니다. 종류는 kind의 접두어로 비교하고("summary"는 summary_multi 포함,
+  "*"는 모두), 위에서부터 처음 맞는 항목을 씁니다. 맞는 항목이 없으면 GEMINI_MODEL.
+- 헤지: 첫 응답(스트리밍은 첫 텍스트 조각)이 그 모델·종류의 p95 지연보다 늦으면 같은 요청을 한 번 더 보내고
+  (헤지 모델을 정했으면 그 모델로), 먼저 도착한 쪽을 씁니다.
+  p95는 모델·종류별 지연 히스토그램에서 계산하며, 최근 GEMINI_LATENCY_WINDOW개 정도에 가중됩니다.
+  - 표본이 GEMINI_HEDGE_MIN_SAMPLES개 미만이면 헤지하지 않음
+  - 헤지 요청 수는 전체 요청의 GEMINI_HEDGE_BUDGET 비율 이내 (p95 기준이면 보통 5% 안팎)
+  - GEMINI_HEDGE_KINDS에 없는 호출, 백그라운드 호출, 제한기(rate_limit)에 여유가 없을 때는 헤지하지 않음
+  - 헤지할 수 없는 호출(표본 부족·예산 소진 등)은 스레드·태스크를 거치지 않고 바로 호출합니다.
+  - asyncio 호출(arace/acall)은 진 쪽 태스크를 취소해 바로 끊습니다. 끊긴 쪽은 취소 시점까지의 경과 시간을
+    (실제 지연의 하한으로) 기록해, 빠른 응답만 히스토그램에 남아 p95가 점점 낮아지지 않게 합니다.
+  - 동기 호출은 다른 스레드에서 끊을 수 없어, 진 쪽은 응답이 끝날 때까지 제한기 자리를 잡은 채 결과만 버려집니다.
+    그래서 동기 헤지는 단일 응답(call)에만 쓰고, 동기 스트리밍(race)은 헤지하지 않습니다.
+"""
+import asyncio
+import bisect
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import metrics
+import rate_limit
+from tokens import estimate_tokens
+
+GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-3-flash-preview")
+GEMINI_MODEL_TIERS = os.environ.get("GEMINI_MODEL_TIERS", "")
+GEMINI_HEDGE = os.environ.get("GEMINI_HEDGE", "1") == "1"
+GEMINI_HEDGE_KINDS = {k.strip() for k in os.environ.get("GEMINI_HEDGE_KINDS", "chat,summary").split(",") if k.strip()}
+GEMINI_HEDGE_QUANTILE = float(os.environ.get("GEMINI_HEDGE_QUANTILE", "0.95"))
+GEMINI_HEDGE_MIN_DELAY = float(os.environ.get("GEMINI_HEDGE_MIN_DELAY", "0.3"))  # 헤지 지연 하한(초)
+GEMINI_HEDGE_MIN_SAMPLES = int(os.environ.get("GEMINI_HEDGE_MIN_SAMPLES", "20"))
+GEMINI_HEDGE_BUDGET = float(os.environ.get("GEMINI_HEDGE_BUDGET", "0.05"))  # 요청 대비 헤지 비율 상한
+GEMINI_HEDGE_THREADS = int(os.environ.get("GEMINI_HEDGE_THREADS", "64"))  # 동기 헤지용 스레드 수
+GEMINI_LATENCY_WINDOW = int(os.environ.get("GEMINI_LATENCY_WINDOW", "500"))
+
+# 히스토그램 구간 상한: 0.05초부터 1.25배씩 (마지막 약 300초)
+_BOUNDS = [0.05 * 1.25 ** i for i in range(40)]
+_HEDGE_BURST = 3.0  # 모아 둘 수 있는 헤지 횟수
+
+_END = object()
+
+
+class Route(NamedTuple):
+    kind: str
+    model: str
+    hedge_model: str
+
+
+class LatencyHistogram:
+    """
+    지연(초) 히스토그램. 표본이 window를 넘으면 모든 구간을 절반으로 줄여 최근 값에 가중합니다.
+    분위수는 해당 구간의 상한으로 (보수적으로) 계산합니다.
+    """
+
+    def __init__(self, window: int = GEMINI_LATENCY_WINDOW):
+        self.window = max(2, window)
+        self.counts = [0.0] * (len(_BOUNDS) + 1)
+        self.total = 0.0
+        self.samples = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(_BOUNDS, seconds)] += 1
+        self.total += 1
+        self.samples += 1
+        if self.total > self.window:
+            self.counts = [c / 2 for c in self.counts]
+            self.total /= 2
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.total:
+            return None
+        target = q * self.total
+        running = 0.0
+        for i, count in enumerate(self.counts):
+            running += count
+            if running >= target:
+                return _BOUNDS[min(i, len(_BOUNDS) - 1)]
+        return _BOUNDS[-1]
+
+
+def _parse_tiers(spec: str) -> List[Tuple[str, str, str, int]]:
+    """GEMINI_MODEL_TIERS → [(종류, 모델, 헤지 모델, 최대 토큰 또는 0)]."""
+    tiers = []
+    for item in spec.split(","):
+        kind, _, rest = item.strip().partition(":")
+        if not kind or not rest:
+            continue
+        rest, _, limit = rest.partition("<")
+        model, _, hedge_model = rest.partition("|")
+        model = model.strip()
+        if not model:
+            continue
+        try:
+            max_tokens = int(limit) if limit.strip() else 0
+        except ValueError:
+            max_tokens = 0
+        tiers.append((kind.strip(), model, hedge_model.strip() or model, max_tokens))
+    return tiers
+
+
+_tiers = _parse_tiers(GEMINI_MODEL_TIERS)
+_lock = threading.Lock()
+_histograms: Dict[Tuple[str, str, str], LatencyHistogram] = {}
+_stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "hedge_skipped": 0}
+_credits = 0.0
+_executor: Optional[ThreadPoolExecutor] = None
+_cleanup_tasks = set()
+
+
+def route(kind: str, contents: str) -> Route:
+    """kind와 프롬프트 크기로 모델을 고릅니다."""
+    tokens = estimate_tokens(contents) if _tiers else 0
+    for tier_kind, model, hedge_model, max_tokens in _tiers:
+        if tier_kind != "*" and not kind.startswith(tier_kind):
+            continue
+        if max_tokens and tokens > max_tokens:
+            continue
+        return Route(kind, model, hedge_model)
+    return Route(kind, GEMINI_MODEL, GEMINI_MODEL)
+
+
+def kind_models(kind: str) -> Tuple[str, ...]:
+    """kind 호출이 프롬프트 크기에 따라 라우팅될 수 있는 모델들 (route()가 보는 순서대로)."""
+    models = []
+    for tier_kind, model, _, max_tokens in _tiers:
+        if tier_kind != "*" and not kind.startswith(tier_kind):
+            continue
+        if model not in models:
+            models.append(model)
+        if not max_tokens:
+            return tuple(models)
+    if GEMINI_MODEL not in models:
+        models.append(GEMINI_MODEL)
+    return tuple(models)
+
+
+def observe(model: str, kind: str, mode: str, seconds: float) -> None:
+    """모델·종류·방식(generate: 전체 응답, stream: 첫 조각)별 지연을 기록합니다."""
+    key = (model, kind, mode)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = LatencyHistogram()
+        histogram.observe(seconds)
+    metrics.observe("newsbot_gemini_model_latency_seconds", seconds, {"model": model, "kind": kind, "mode": mode},
+                    help="모델별 Gemini 응답 지연 (generate: 전체, stream: 첫 조각)")
+
+
+def hedge_delay(model: str, kind: str, mode: str) -> Optional[float]:
+    """헤지 요청을 보낼 지연(초). 헤지 대상이 아니거나 표본이 부족하면 None."""
+    if not GEMINI_HEDGE or kind not in GEMINI_HEDGE_KINDS:
+        return None
+    if rate_limit.priority_for(kind) == rate_limit.PRIORITY_BACKGROUND:
+        return None
+    with _lock:
+        histogram = _histograms.get((model, kind, mode))
+        if histogram is None or histogram.samples < GEMINI_HEDGE_MIN_SAMPLES:
+            return None
+        p = histogram.quantile(GEMINI_HEDGE_QUANTILE)
+    return max(GEMINI_HEDGE_MIN_DELAY, p or 0.0)
+
+
+def _count_request() -> None:
+    global _credits
+    with _lock:
+        _stats["requests"] += 1
+        _credits = min(_HEDGE_BURST, _credits + GEMINI_HEDGE_BUDGET)
+
+
+def _hedge_possible(route: Route, mode: str) -> Optional[float]:
+    """이번 호출에 헤지를 보낼 수 있으면 헤지 지연(초), 아니면 None. (헤지 예산은 차감하지 않음)"""
+    delay = hedge_delay(route.model, route.kind, mode)
+    if delay is None:
+        return None
+    with _lock:
+        if _credits < 1.0:
+            return None
+    return delay
+
+
+def _take_hedge() -> bool:
+    """헤지 예산과 제한기 여유가 있으면 헤지 1회분을 차감하고 True."""
+    global _credits
+    headroom = rate_limit.get_limiter().has_headroom()
+    with _lock:
+        if _credits < 1.0 or not headroom:
+            _stats["hedge_skipped"] += 1
+            return False
+        _credits -= 1.0
+        _stats["hedged"] += 1
+    return True
+
+
+def _hedge_finished(kind: str, hedge_won: bool) -> None:
+    if hedge_won:
+        with _lock:
+            _stats["hedge_wins"] += 1
+    metrics.inc("newsbot_gemini_hedges_total", {"kind": kind, "winner": "hedge" if hedge_won else "primary"},
+                help="보낸 헤지 요청 수 (먼저 응답한 쪽별)")
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=GEMINI_HEDGE_THREADS, thread_name_prefix="gemini-hedge")
+    return _executor
+
+
+def _close(iterator) -> None:
+    close = getattr(iterator, "close", None)
+    if close is not None:
+        close()
+
+
+class _Racer:
+    """헤지 경쟁의 한 쪽: 모델, 이터레이터, 첫 항목을 기다리는 future."""
+
+    __slots__ = ("model", "iterator", "future", "started")
+
+    def __init__(self, open_stream: Callable[[str], Iterator[Any]], model: str):
+        self.model = model
+        self.iterator = iter(open_stream(model))
+        self.started = time.perf_counter()
+        # 스레드마다 문맥을 복사해 metrics 요청 기록·백그라운드 우선순위를 그대로 이어받음
+        self.future = _get_executor().submit(contextvars.copy_context().run, next, self.iterator, _END)
+
+    def abandon(self, kind: str, mode: str) -> None:
+        """진 쪽: 실행 중인 호출은 끊을 수 없으므로, 끝나는 대로 (지연을 기록하고) 이터레이터를 닫습니다."""
+        def finish(future):
+            if not future.cancelled() and future.exception() is None and future.result() is not _END:
+                observe(self.model, kind, mode, time.perf_counter() - self.started)
+            _close(self.iterator)
+
+        self.future.add_done_callback(finish)
+
+
+def race(open_stream: Callable[[str], Iterator[Any]], route: Route, mode: str = "stream") -> Iterator[Any]:
+    """
+    open_stream(model)의 항목을 yield합니다. 첫 항목이 헤지 지연보다 늦으면 route.hedge_model로 한 번 더 열어
+    먼저 첫 항목을 낸 쪽을 이어서 사용합니다. 둘 다 실패하면 먼저 난 오류를 그대로 발생시킵니다.
+    동기 스트리밍(mode="stream")은 진 쪽을 끊을 수 없어 헤지하지 않고 지연만 기록합니다.
+    """
+    _count_request()
+    delay = None if mode == "stream" else _hedge_possible(route, mode)
+    if delay is None:
+        # 헤지하지 않는 호출은 스레드를 거치지 않음
+        started = time.perf_counter()
+        iterator = iter(open_stream(route.model))
+        try:
+            item = next(iterator, _END)
+            if item is _END:
+                return
+            observe(route.model, route.kind, mode, time.perf_counter() - started)
+            yield item
+            yield from iterator
+        finally:
+            _close(iterator)
+        return
+
+    primary = _Racer(open_stream, route.model)
+    racers = [primary]
+    done, _ = wait([primary.future], timeout=delay)
+    if not done and _take_hedge():
+        racers.append(_Racer(open_stream, route.hedge_model))
+    winner, error = None, None
+    pending = {r.future: r for r in racers}
+    while pending and winner is None:
+        done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+        for future in done:
+            racer = pending.pop(future)
+            if future.exception() is None:
+                winner = racer
+                break
+            error = error or future.exception()
+    for racer in racers:
+        if racer is not winner:
+            racer.abandon(route.kind, mode)
+    if len(racers) > 1:
+        _hedge_finished(route.kind, winner is not None and winner is not primary)
+    if winner is None:
+        raise error
+    item = winner.future.result()
+    try:
+        if item is _END:
+            return
+        observe(winner.model, route.kind, mode, time.perf_counter() - winner.started)
+        yield item
+        yield from winner.iterator
+    finally:
+        _close(winner.iterator)
+
+
+def _single(fn: Callable[[str], Any], model: str) -> Iterator[Any]:
+    yield fn(model)
+
+
+def call(fn: Callable[[str], Any], route: Route) -> Any:
+    """fn(model) 단일 응답 호출을 헤지와 함께 실행하고 먼저 도착한 응답을 반환합니다."""
+    results = race(lambda model: _single(fn, model), route, "generate")
+    try:
+        return next(results)
+    finally:
+        results.close()
+
+
+async def _anext(iterator: AsyncIterator[Any]) -> Any:
+    try:
+        return await iterator.__anext__()
+    except StopAsyncIteration:
+        return _END
+
+
+async def _aclose(task: "asyncio.Task", iterator: AsyncIterator[Any]) -> None:
+    task.cancel()
+    try:
+        await task
+    except BaseException:
+        pass
+    await iterator.aclose()
+
+
+async def arace(open_stream: Callable[[str], AsyncIterator[Any]], route: Route, mode: str = "stream") -> AsyncIterator[Any]:
+    """race()의 asyncio 버전. 진 쪽 요청은 태스크 취소로 바로 끊습니다."""
+    _count_request()
+    delay = _hedge_possible(route, mode)
+    iterator = open_stream(route.model).__aiter__()
+    started = time.perf_counter()
+    if delay is None:
+        try:
+            item = await _anext(iterator)
+            if item is _END:
+                return
+            observe(route.model, route.kind, mode, time.perf_counter() - started)
+            yield item
+            async for item in iterator:
+                yield item
+        finally:
+            await iterator.aclose()
+        return
+
+    racers = [(route.model, iterator, started, asyncio.ensure_future(_anext(iterator)))]
+    winner = None
+    try:
+        done, _ = await asyncio.wait([racers[0][3]], timeout=delay)
+        if not done and _take_hedge():
+            iterator = open_stream(route.hedge_model).__aiter__()
+            racers.append((route.hedge_model, iterator, time.perf_counter(), asyncio.ensure_future(_anext(iterator))))
+        error = None
+        pending = {r[3] for r in racers}
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    winner = next(r for r in racers if r[3] is task)
+                    break
+                error = error or task.exception()
+        if len(racers) > 1:
+            _hedge_finished(route.kind, winner is racers[-1])
+        if winner is None:
+            raise error
+        model, iterator, started, task = winner
+        item = task.result()
+        if item is _END:
+            return
+        observe(model, route.kind, mode, time.perf_counter() - started)
+        yield item
+        async for item in iterator:
+            yield item
+    finally:
+        for racer in racers:
+            if racer is winner:
+                await racer[1].aclose()
+            else:
+                if winner is not None and not racer[3].done():
+                    # 응답 전에 끊긴 쪽: 취소 시점까지의 경과 시간을 하한값(censored)으로 기록
+                    observe(racer[0], route.kind, mode, time.perf_counter() - racer[2])
+                # 진 쪽은 기다리지 않고 백그라운드에서 취소·정리 (참조를 잡아 두어 GC되지 않게)
+                cleanup = asyncio.ensure_future(_aclose(racer[3], racer[1]))
+                _cleanup_tasks.add(cleanup)
+                cleanup.add_done_callback(_cleanup_tasks.discard)
+
+
+async def _asingle(fn: Callable[[str], Awaitable[Any]], model: str) -> AsyncIterator[Any]:
+    yield await fn(model)
+
+
+async def acall(fn: Callable[[str], Awaitable[Any]], route: Route) -> Any:
+    """call()의 asyncio 버전."""
+    results = arace(lambda model: _asingle(fn, model), route, "generate")
+    try:
+        return await results.__anext__()
+    finally:
+        await results.aclose()
+
+
+def router_stats() -> Dict[str, Any]:
+    with _lock:
+        stats = dict(_stats)
+        latency = {
+            "/".join(key): {
+                "samples": h.samples,
+                "p50": h.quantile(0.5),
+                "p95": h.quantile(0.95),
+            }
+            for key, h in _histograms.items()
+        }
+    stats.update({
+        "default_model": GEMINI_MODEL,
+        "tiers": [
+            {"kind": k, "model": m, "hedge_model": hm, "max_tokens": t or None} for k, m, hm, t in _tiers
+        ],
+        "hedge_enabled": GEMINI_HEDGE,
+        "latency": latency,
+    })
+    return stats
+
+
+def _collect_metrics():
+    with _lock:
+        keys = list(_histograms)
+    for model, kind, mode in keys:
+        delay = hedge_delay(model, kind, mode)
+        if delay is not None:
+            yield "newsbot_gemini_hedge_delay_seconds", {"model": model, "kind": kind, "mode": mode}, delay
+
+
+metrics.register_collector(_collect_metrics)
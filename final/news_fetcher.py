@@ -1,50 +1,334 @@
 """
 Google News RSS를 통해 키워드로 뉴스 10건을 수집합니다.
+
+같은 키워드의 피드는 프로세스 내 캐시(TTL + LRU)에 보관하고,
+TTL이 지나면 ETag/Last-Modified로 조건부 재요청(304)해 재다운로드·재파싱을 줄입니다.
+다운로드(rss_download), 파싱(rss_parse), HTML 제거(html_strip) 단계는 metrics로 따로 측정합니다.
+feedparser·requests는 처음 다운로드할 때 import합니다. (서버리스 콜드 스타트 단축, warm_up 참고)
+NEWS_PARSER=fast 이면 feedparser 대신 필요한 만큼만 읽는 경량 파서(rss_parser.py)를 사용합니다.
+app_web.py, app.py, api/news.py 모두 이 모듈을 거치므로 캐시를 함께 사용합니다.
 """
-import re
-import feedparser
+import asyncio
+import os
+import threading
+import time
 from urllib.parse import quote_plus
-from typing import List, Dict
+from typing import List, Dict, Any, Optional, Set, Tuple
+from xml.etree.ElementTree import ParseError
 
+import metrics
+from cache import TTLCache
+from rss_parser import Article, parse_articles, strip_html
+from singleflight import AsyncSingleFlight, SingleFlight
 
-def fetch_google_news(keyword: str, max_articles: int = 10) -> List[Dict[str, str]]:
-    """
-    키워드로 Google News RSS에서 뉴스를 수집합니다.
-    
-    Args:
-        keyword: 검색 키워드
-        max_articles: 수집할 최대 기사 수 (기본 10)
-    
-    Returns:
-        [{"title", "link", "published", "summary", "source"}] 형태의 리스트
-    """
+# 피드 캐시 설정 (환경변수로 조정 가능)
+NEWS_CACHE_TTL = float(os.environ.get("NEWS_CACHE_TTL", "300"))
+NEWS_CACHE_SIZE = int(os.environ.get("NEWS_CACHE_SIZE", "256"))
+# 벤치마크 등에서 로컬 가짜 RSS 서버를 쓸 때만 변경
+NEWS_RSS_URL = os.environ.get("NEWS_RSS_URL", "https://news.google.com/rss/search")
+NEWS_FETCH_TIMEOUT = float(os.environ.get("NEWS_FETCH_TIMEOUT", "10"))  # RSS 다운로드 타임아웃(초)
+# RSS 파서: feedparser(기본) | fast (rss_parser.py, NEWS_PARSE_LIMIT개를 읽으면 중단)
+NEWS_PARSER = os.environ.get("NEWS_PARSER", "feedparser").lower()
+NEWS_PARSE_LIMIT = int(os.environ.get("NEWS_PARSE_LIMIT", "30"))
+
+# 키워드 -> {"articles": [Article], "truncated", "etag", "modified"}
+_feed_cache = TTLCache(maxsize=NEWS_CACHE_SIZE, ttl=NEWS_CACHE_TTL)
+_feed_flight = SingleFlight()
+_afeed_flight = AsyncSingleFlight()
+_http_session = None  # requests.Session — 연결 재사용, 처음 사용할 때 생성
+_async_http = None  # (이벤트 루프, httpx.AsyncClient) — 처음 사용할 때 생성
+_counter_lock = threading.Lock()
+_revalidated = 0  # 304 응답으로 재사용한 횟수
+_stale_served = 0  # 재요청 실패 시 만료된 캐시를 돌려준 횟수
+
+
+def _cache_key(keyword: str) -> str:
+    return " ".join(keyword.split()).lower()
+
+
+def _build_url(keyword: str) -> str:
     encoded_keyword = quote_plus(keyword)
     # Google News RSS 검색 URL (한국어)
-    url = (
-        f"https://news.google.com/rss/search?"
+    return (
+        f"{NEWS_RSS_URL}?"
         f"q={encoded_keyword}&hl=ko&gl=KR&ceid=KR:ko"
     )
-    
-    feed = feedparser.parse(url)
+
+
+def _parse_entries(feed) -> List[Article]:
     articles = []
-    
-    for i, entry in enumerate(feed.entries):
-        if i >= max_articles:
-            break
+    strip_seconds = 0.0
+    for entry in feed.entries:
         # summary가 없을 수 있음
         summary = getattr(entry, "summary", "") or ""
         # HTML 태그 제거
         if summary:
-            summary = re.sub(r"<[^>]+>", "", summary)
+            started = time.perf_counter()
+            summary = strip_html(summary)
+            strip_seconds += time.perf_counter() - started
         source = ""
         if hasattr(entry, "source") and entry.source:
             source = getattr(entry.source, "title", "") or str(entry.source)
-        articles.append({
-            "title": entry.get("title", ""),
-            "link": entry.get("link", ""),
-            "published": entry.get("published", ""),
-            "summary": summary.strip(),
-            "source": source,
+        articles.append(Article(
+            title=entry.get("title", ""),
+            link=entry.get("link", ""),
+            published=entry.get("published", ""),
+            summary=summary,
+            source=source,
+        ))
+    metrics.record_stage("html_strip", strip_seconds)
+    return articles
+
+
+def _parse_feed(content: bytes, limit: int) -> Tuple[List[Article], bool]:
+    """RSS 바이트를 파싱해 (기사 목록, limit에서 잘렸는지)를 반환합니다."""
+    if NEWS_PARSER == "fast":
+        try:
+            with metrics.span("rss_parse", parser="fast"):
+                articles = parse_articles(content, limit)
+            return articles, len(articles) >= limit
+        except ParseError:
+            pass  # 형식이 어긋난 피드는 관대한 feedparser로 다시 시도
+    import feedparser
+    with metrics.span("rss_parse", parser="feedparser"):
+        feed = feedparser.parse(content)
+    return _parse_entries(feed), False
+
+
+def _covers(entry: Dict[str, Any], count: int) -> bool:
+    # 빠른 파서가 limit에서 멈춘 피드는 그보다 많은 기사를 요청하면 다시 받아야 함
+    return not entry.get("truncated") or len(entry["articles"]) >= count
+
+
+def _load_feed(keyword: str, max_articles: int) -> List[Article]:
+    """캐시를 거쳐 키워드 피드의 기사 목록을 반환합니다."""
+    key = _cache_key(keyword)
+    limit = max(NEWS_PARSE_LIMIT, max_articles)
+    cached = _feed_cache.get(key)
+    if cached is not None and _covers(cached, limit):
+        return cached["articles"]
+    # 같은 키워드를 동시에 요청한 스레드들은 한 번의 다운로드 결과를 공유
+    return _feed_flight.do(key, _refresh_feed, keyword, key, False, limit)
+
+
+def _refresh_feed(keyword: str, key: str, force: bool = False, limit: int = 0) -> List[Article]:
+    limit = limit or NEWS_PARSE_LIMIT
+    stale, expired = _feed_cache.peek(key)
+    if stale is not None and not _covers(stale, limit):
+        stale = None  # 기사 수가 모자란 캐시는 조건부 요청에 쓰지 않음
+    if stale is not None and not expired and not force:
+        # 직전에 다른 호출이 갱신을 끝낸 경우
+        return stale["articles"]
+
+    try:
+        with metrics.span("rss_download"):
+            resp = _get_http().get(
+                _build_url(keyword),
+                headers=_conditional_headers(stale),
+                timeout=NEWS_FETCH_TIMEOUT,
+            )
+            content = resp.content
+    except Exception:
+        if stale is None:
+            raise
+        return _apply_response(key, stale, None, None, False, None, None)
+
+    articles, truncated = None, False
+    if resp.status_code != 304:
+        # 다운로드와 파싱 시간을 나눠 재도록 바이트를 받아 파서에 넘김
+        articles, truncated = _parse_feed(content, limit)
+    return _apply_response(
+        key,
+        stale,
+        resp.status_code,
+        articles,
+        truncated,
+        resp.headers.get("ETag"),
+        resp.headers.get("Last-Modified"),
+    )
+
+
+def _conditional_headers(stale: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    headers = {}
+    if stale and stale.get("etag"):
+        headers["If-None-Match"] = stale["etag"]
+    if stale and stale.get("modified"):
+        headers["If-Modified-Since"] = stale["modified"]
+    return headers
+
+
+def _get_http():
+    global _http_session
+    if _http_session is None:
+        import requests
+        _http_session = requests.Session()
+    return _http_session
+
+
+def warm_up() -> None:
+    """첫 요청 전에 feedparser·requests를 import하고 HTTP 세션을 만들어 둡니다. (api/_core.py)"""
+    if NEWS_PARSER != "fast":
+        import feedparser
+    _get_http()
+
+
+def _apply_response(key: str, stale, status, articles, truncated, etag, modified) -> List[Article]:
+    """RSS 응답(상태 코드, 파싱한 기사)을 캐시에 반영하고 기사 목록을 반환합니다."""
+    global _revalidated, _stale_served
+
+    if stale is not None and status == 304:
+        # 변경 없음: 기존 기사 재사용, TTL만 갱신
+        _feed_cache.set(key, stale)
+        with _counter_lock:
+            _revalidated += 1
+        return stale["articles"]
+
+    if stale is not None and (status is None or status >= 400) and not articles:
+        # 네트워크 오류 등: 만료된 값이라도 돌려주고 캐시는 갱신하지 않음
+        with _counter_lock:
+            _stale_served += 1
+        return stale["articles"]
+
+    if articles is None:
+        return []
+    if status is not None and status < 400:
+        _feed_cache.set(key, {
+            "articles": articles,
+            "truncated": truncated,
+            "etag": etag,
+            "modified": modified,
         })
-    
     return articles
+
+
+def fetch_google_news(keyword: str, max_articles: int = 10) -> List[Dict[str, str]]:
+    """
+    키워드로 Google News RSS에서 뉴스를 수집합니다.
+
+    Args:
+        keyword: 검색 키워드
+        max_articles: 수집할 최대 기사 수 (기본 10)
+
+    Returns:
+        [{"title", "link", "published", "summary", "source"}] 형태의 리스트
+    """
+    # 캐시의 기사 레코드는 호출 측(세션 등)이 수정해도 안전하도록 새 dict로 반환
+    return [a.to_dict() for a in _load_feed(keyword, max_articles)[:max_articles]]
+
+
+def refresh_google_news(keyword: str, max_articles: int = 10) -> List[Dict[str, str]]:
+    """
+    캐시 유효 여부와 관계없이 피드를 다시 확인(조건부 요청)해 캐시를 갱신합니다.
+    백그라운드 사전 갱신(prewarm.py)에서 사용합니다.
+    """
+    key = _cache_key(keyword)
+    limit = max(NEWS_PARSE_LIMIT, max_articles)
+    articles = _feed_flight.do(key, _refresh_feed, keyword, key, True, limit)
+    return [a.to_dict() for a in articles[:max_articles]]
+
+
+def cached_articles(keyword: str, max_articles: int = 10) -> Optional[List[Dict[str, str]]]:
+    """
+    피드 캐시에 있는 기사만 반환합니다. (네트워크 요청 없음, 만료된 항목 포함, 없으면 None)
+    요청 본문에 기사 목록이 없는 대화 요청에서 검색 색인을 만들 때 사용합니다.
+    """
+    entry, _ = _feed_cache.peek(_cache_key(keyword))
+    if not entry or not entry.get("articles"):
+        return None
+    return [a.to_dict() for a in entry["articles"][:max_articles]]
+
+
+def cached_links(keyword: str) -> Set[str]:
+    """피드 캐시에 있는 키워드 기사 링크 전체. (만료된 항목 포함, 본문 수집 대상 확인용)"""
+    entry, _ = _feed_cache.peek(_cache_key(keyword))
+    if not entry:
+        return set()
+    return {a.link for a in entry.get("articles") or [] if a.link}
+
+
+async def fetch_google_news_async(keyword: str, max_articles: int = 10) -> List[Dict[str, str]]:
+    """
+    fetch_google_news의 asyncio 버전. 다운로드는 httpx 비동기 클라이언트로, 파싱은
+    파서를 스레드에서 실행합니다. 피드 캐시는 동기 버전과 공유합니다.
+    """
+    key = _cache_key(keyword)
+    limit = max(NEWS_PARSE_LIMIT, max_articles)
+    cached = _feed_cache.get(key)
+    if cached is not None and _covers(cached, limit):
+        articles = cached["articles"]
+    else:
+        articles = await _afeed_flight.do(key, _refresh_feed_async, keyword, key, limit)
+    return [a.to_dict() for a in articles[:max_articles]]
+
+
+def _get_async_http():
+    # httpx.AsyncClient의 연결은 이벤트 루프에 묶이므로 루프가 바뀌면 새로 만듦
+    global _async_http
+    loop = asyncio.get_running_loop()
+    if _async_http is None or _async_http[0] is not loop:
+        import httpx
+        _async_http = (loop, httpx.AsyncClient(timeout=NEWS_FETCH_TIMEOUT, follow_redirects=True))
+    return _async_http[1]
+
+
+async def _refresh_feed_async(keyword: str, key: str, limit: int) -> List[Article]:
+    stale, expired = _feed_cache.peek(key)
+    if stale is not None and not _covers(stale, limit):
+        stale = None
+    if stale is not None and not expired:
+        return stale["articles"]
+
+    try:
+        with metrics.span("rss_download"):
+            resp = await _get_async_http().get(_build_url(keyword), headers=_conditional_headers(stale))
+    except Exception:
+        if stale is None:
+            raise
+        return _apply_response(key, stale, None, None, False, None, None)
+
+    articles, truncated = None, False
+    if resp.status_code != 304:
+        # 파싱은 CPU 작업이므로 이벤트 루프를 막지 않도록 스레드에서 실행
+        articles, truncated = await asyncio.to_thread(_parse_feed, resp.content, limit)
+    return _apply_response(
+        key,
+        stale,
+        resp.status_code,
+        articles,
+        truncated,
+        resp.headers.get("ETag"),
+        resp.headers.get("Last-Modified"),
+    )
+
+
+def feed_cache_stats() -> Dict[str, Any]:
+    """피드 캐시 적중/미스 카운터를 반환합니다."""
+    stats = _feed_cache.stats()
+    with _counter_lock:
+        stats["revalidated"] = _revalidated
+        stats["stale_served"] = _stale_served
+    stats["coalesced"] = _feed_flight.stats()["coalesced"] + _afeed_flight.stats()["coalesced"]
+    return stats
+
+
+def _collect_counters():
+    stats = feed_cache_stats()
+    for name in ("hits", "misses", "revalidated", "stale_served", "coalesced"):
+        yield f"newsbot_cache_{name}_total", {"cache": "feed"}, stats[name]
+
+
+def _collect_metrics():
+    yield "newsbot_cache_size", {"cache": "feed"}, feed_cache_stats()["size"]
+
+
+metrics.register_collector(_collect_counters, kind="counter")
+metrics.register_collector(_collect_metrics)
+
+
+def clear_feed_cache() -> None:
+    """피드 캐시와 카운터를 초기화합니다."""
+    global _revalidated, _stale_served
+    _feed_cache.clear()
+    with _counter_lock:
+        _revalidated = 0
+        _stale_served = 0
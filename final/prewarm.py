@@ -0,0 +1,180 @@
+"""
+인기 키워드 사전 갱신(pre-warm).
+
+/api/news로 들어온 키워드의 요청 빈도를 집계(시간이 지나면 감쇠)하고,
+상위 키워드의 피드와 요약을 주기적으로 미리 갱신해 두어 사용자가 캐시된 결과를 받도록 합니다.
+
+- 웹 앱 안에서: PREWARM_ENABLED=1 이면 app_web.py가 백그라운드 스레드로 실행
+- 별도 프로세스/cron: python prewarm.py [--once] [--top 20] [--interval 300] [--concurrency 4]
+  피드 캐시는 프로세스 메모리에 있어 웹 앱과 공유되지 않으므로, 별도 프로세스는 공유 요약 캐시만 채울 수 있습니다.
+  그래서 키워드 집계 공유(PREWARM_DB, 또는 --keywords)와 공유 요약 캐시(SUMMARY_CACHE_BACKEND=sqlite|redis)가
+  설정되어 있어야 시작합니다. (웹 앱과 같은 값으로 설정)
+"""
+import argparse
+import math
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+PREWARM_TOP = int(os.environ.get("PREWARM_TOP", "20"))
+PREWARM_INTERVAL = float(os.environ.get("PREWARM_INTERVAL", "300"))  # 초
+PREWARM_CONCURRENCY = int(os.environ.get("PREWARM_CONCURRENCY", "4"))
+PREWARM_HALF_LIFE = float(os.environ.get("PREWARM_HALF_LIFE", "3600"))  # 요청 점수 반감기(초)
+PREWARM_MAX_KEYWORDS = 1000  # 집계할 최대 키워드 수
+
+
+class KeywordTracker:
+    """
+    키워드별 요청 점수(시간 감쇠)를 집계합니다. 스레드 안전.
+    path를 주면 sqlite 파일에 저장해 여러 워커·prewarm 프로세스가 같은 집계를 봅니다.
+    """
+
+    def __init__(self, path: Optional[str] = None, half_life: float = PREWARM_HALF_LIFE):
+        self.half_life = half_life
+        self._lock = threading.Lock()
+        self._scores: Dict[str, List[float]] = {}  # keyword -> [score, updated]
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS keyword_scores ("
+                "keyword TEXT PRIMARY KEY, score REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def _decayed(self, score: float, updated: float, now: float) -> float:
+        return score * math.pow(0.5, max(0.0, now - updated) / self.half_life)
+
+    def record(self, keyword: str) -> None:
+        keyword = " ".join(keyword.split())
+        if not keyword:
+            return
+        now = time.time()
+        with self._lock:
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT score, updated FROM keyword_scores WHERE keyword = ?", (keyword,)
+                ).fetchone()
+                score = (self._decayed(row[0], row[1], now) if row else 0.0) + 1.0
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO keyword_scores (keyword, score, updated) VALUES (?, ?, ?)",
+                    (keyword, score, now),
+                )
+                self._conn.commit()
+                return
+            item = self._scores.get(keyword)
+            score = (self._decayed(item[0], item[1], now) if item else 0.0) + 1.0
+            self._scores[keyword] = [score, now]
+            if len(self._scores) > PREWARM_MAX_KEYWORDS:
+                # 점수가 가장 낮은 키워드부터 정리
+                ranked = sorted(self._scores.items(), key=lambda kv: self._decayed(kv[1][0], kv[1][1], now))
+                for k, _ in ranked[: len(self._scores) - PREWARM_MAX_KEYWORDS]:
+                    del self._scores[k]
+
+    def top(self, n: int) -> List[str]:
+        """현재 점수가 높은 키워드 n개를 반환합니다."""
+        now = time.time()
+        with self._lock:
+            if self._conn is not None:
+                rows = self._conn.execute("SELECT keyword, score, updated FROM keyword_scores").fetchall()
+            else:
+                rows = [(k, v[0], v[1]) for k, v in self._scores.items()]
+        ranked = sorted(rows, key=lambda r: self._decayed(r[1], r[2], now), reverse=True)
+        return [r[0] for r in ranked[:n]]
+
+
+tracker = KeywordTracker(os.environ.get("PREWARM_DB") or None)
+
+
+def record_keyword(keyword: str) -> None:
+    """/api/news 요청 키워드를 집계합니다. 실패해도 요청 처리에는 영향을 주지 않습니다."""
+    try:
+        tracker.record(keyword)
+    except Exception:
+        pass
+
+
+def refresh_keyword(keyword: str, summarize: bool = True) -> None:
+    """키워드 피드를 다시 확인하고, 요약 캐시가 비어 있으면 요약을 미리 만들어 둡니다."""
+    from news_fetcher import refresh_google_news
+    from gemini_service import summarize_news
+    from rate_limit import background
+    articles = refresh_google_news(keyword, max_articles=10)
+    if summarize and articles:
+        # 사용자 요청(대화·요약)보다 뒤로 밀리고, Gemini 한도의 일부만 사용
+        with background():
+            summarize_news(keyword, articles)
+
+
+def refresh_once(
+    keywords: List[str],
+    concurrency: int = PREWARM_CONCURRENCY,
+    summarize: bool = True,
+) -> Dict[str, str]:
+    """키워드들을 제한된 동시성으로 갱신하고 {키워드: "ok" | 오류 메시지}를 반환합니다."""
+    results: Dict[str, str] = {}
+    if not keywords:
+        return results
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="prewarm") as pool:
+        futures = {pool.submit(refresh_keyword, k, summarize): k for k in keywords}
+        for future, keyword in futures.items():
+            try:
+                future.result()
+                results[keyword] = "ok"
+            except Exception as e:
+                results[keyword] = str(e)
+    return results
+
+
+def start_background(
+    interval: float = PREWARM_INTERVAL,
+    top: int = PREWARM_TOP,
+    concurrency: int = PREWARM_CONCURRENCY,
+) -> threading.Thread:
+    """상위 키워드를 interval초마다 갱신하는 데몬 스레드를 시작합니다."""
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                refresh_once(tracker.top(top), concurrency=concurrency)
+            except Exception:
+                pass
+
+    thread = threading.Thread(target=loop, name="prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="인기 키워드의 뉴스 피드·요약을 미리 갱신합니다.")
+    parser.add_argument("--keywords", nargs="*", help="갱신할 키워드 (없으면 집계 상위 키워드)")
+    parser.add_argument("--top", type=int, default=PREWARM_TOP, help="집계 상위 몇 개를 갱신할지")
+    parser.add_argument("--interval", type=float, default=PREWARM_INTERVAL, help="반복 주기(초)")
+    parser.add_argument("--concurrency", type=int, default=PREWARM_CONCURRENCY, help="동시 갱신 수")
+    parser.add_argument("--once", action="store_true", help="한 번만 실행하고 종료 (cron용)")
+    args = parser.parse_args(argv)
+    # 메모리 집계·캐시로는 웹 앱과 아무것도 공유되지 않아 이 프로세스가 하는 일이 없음
+    if not args.keywords and not os.environ.get("PREWARM_DB"):
+        parser.error("키워드 집계를 웹 앱과 공유하려면 PREWARM_DB를 설정하거나 --keywords로 키워드를 지정하세요.")
+    if os.environ.get("SUMMARY_CACHE_BACKEND", "memory") not in ("sqlite", "redis"):
+        parser.error("요약을 웹 앱과 공유하려면 SUMMARY_CACHE_BACKEND=sqlite 또는 redis로 설정하세요. "
+                     "(웹 앱 안에서 갱신하려면 PREWARM_ENABLED=1)")
+
+    while True:
+        keywords = args.keywords or tracker.top(args.top)
+        started = time.time()
+        results = refresh_once(keywords, concurrency=args.concurrency, summarize=True)
+        failed = {k: v for k, v in results.items() if v != "ok"}
+        print(f"[prewarm] {len(results) - len(failed)}/{len(results)}개 키워드 갱신 ({time.time() - started:.1f}초)", flush=True)
+        for keyword, error in failed.items():
+            print(f"[prewarm] 실패: {keyword}: {error}", flush=True)
+        if args.once:
+            return
+        time.sleep(max(0.0, args.interval - (time.time() - started)))
+
+
+if __name__ == "__main__":
+    main()
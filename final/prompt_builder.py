@@ -0,0 +1,204 @@
+"""
+요약 프롬프트의 기사 목록 압축.
+
+Google News RSS의 기사 요약은 대부분 "제목 + 출처"의 반복이고, 같은 사건을 여러 언론사가
+거의 같은 제목으로 싣는 경우가 많아 입력 토큰의 상당 부분이 중복입니다.
+- 제목이 거의 같은 기사(문자 bigram 자카드 유사도 ≥ PROMPT_DEDUP_THRESHOLD, 제목 속 숫자는 일치)는
+  하나로 합치고 출처만 모읍니다.
+- 기사 요약에서 제목·출처와 겹치는 부분을 지우고, 남는 내용이 없으면 요약 줄을 생략합니다.
+- 기사 목록 전체를 SUMMARY_PROMPT_BUDGET 토큰(tokens.estimate_tokens 기준) 안에 맞추며,
+  넘치면 뒤쪽 기사부터 요약 줄을 빼고, 그래도 넘치면 기사를 생략합니다.
+- 기사에 본문("content", article_fetcher.py)이 붙어 있으면 RSS 요약 대신 본문을 쓰고,
+  예산도 FULLTEXT_PROMPT_BUDGET으로 늘립니다.
+- 여러 키워드를 한 프롬프트로 묶는 배치 요약은 PACK_PROMPT_BUDGET을 키워드 수로 나눠 씁니다. (pack_budget)
+절약한 토큰 수는 prompt_stats()와 metrics(newsbot_prompt_tokens_saved_total)로 확인할 수 있습니다.
+"""
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import metrics
+from tokens import estimate_tokens
+
+SUMMARY_PROMPT_BUDGET = int(os.environ.get("SUMMARY_PROMPT_BUDGET", "1200"))  # 기사 목록 토큰 예산
+FULLTEXT_PROMPT_BUDGET = int(os.environ.get("FULLTEXT_PROMPT_BUDGET", "3000"))  # 본문이 붙은 경우의 예산
+PACK_PROMPT_BUDGET = int(os.environ.get("PACK_PROMPT_BUDGET", "4000"))  # 묶음 요약 프롬프트 전체의 기사 목록 예산
+PROMPT_DEDUP_THRESHOLD = float(os.environ.get("PROMPT_DEDUP_THRESHOLD", "0.6"))
+PROMPT_MAX_SOURCES = 3  # 합친 기사에 나열할 최대 출처 수
+
+_DIGITS_RE = re.compile(r"\d+(?:[.,]\d+)*")
+_PUNCT_RE = re.compile(r"[\s\"'“”‘’`·…,.!?()\[\]{}<>|:;~\-–—_/\\]+")
+
+_stats_lock = threading.Lock()
+_totals = {"prompts": 0, "articles": 0, "merged": 0, "omitted": 0, "tokens_raw": 0, "tokens_used": 0}
+
+
+def _strip_source_suffix(title: str, source: str) -> str:
+    # Google News 제목은 "제목 - 출처" 형식
+    if source and title.endswith(f" - {source}"):
+        return title[: -len(source) - 3].rstrip()
+    head, sep, tail = title.rpartition(" - ")
+    if sep and head and len(tail) <= 20:
+        return head.rstrip()
+    return title
+
+
+def _bigrams(text: str) -> set:
+    text = _PUNCT_RE.sub("", text.lower())
+    return {text[i:i + 2] for i in range(len(text) - 1)} or {text}
+
+
+def _similar(a: set, b: set) -> bool:
+    if not a or not b:
+        return False
+    return len(a & b) / len(a | b) >= PROMPT_DEDUP_THRESHOLD
+
+
+def _trim_summary(summary: str, title: str, full_title: str, source: str) -> str:
+    """기사 요약에서 제목·출처와 겹치는 부분을 지우고 남은 내용을 반환합니다."""
+    if not summary:
+        return ""
+    for part in (full_title, title, source):
+        if part:
+            summary = summary.replace(part, " ")
+    summary = " ".join(summary.split()).strip(" -·|")
+    if not _PUNCT_RE.sub("", summary):
+        return ""
+    # 남은 내용이 제목과 거의 같으면 생략
+    if _similar(_bigrams(summary), _bigrams(title)):
+        return ""
+    return summary
+
+
+def _body(article: Dict[str, str]) -> str:
+    # 본문(content)이 있으면 RSS 요약보다 우선
+    return article.get("content") or article.get("summary") or ""
+
+
+def _group_articles(articles: List[Dict[str, str]]) -> Tuple[List[Dict[str, Any]], int]:
+    """제목이 거의 같은 기사를 합쳐 [{"title", "summary", "sources"}]와 합친 기사 수를 반환합니다."""
+    groups: List[Dict[str, Any]] = []
+    merged = 0
+    for a in articles:
+        source = (a.get("source") or "").strip()
+        full_title = " ".join((a.get("title") or "").split())
+        title = _strip_source_suffix(full_title, source)
+        grams = _bigrams(title)
+        numbers = _DIGITS_RE.findall(title)
+        summary = _trim_summary(" ".join(_body(a).split()), title, full_title, source)
+        for g in groups:
+            # 숫자(금액·순위 등)가 다르면 다른 기사로 봄
+            if numbers == g["numbers"] and _similar(grams, g["grams"]):
+                merged += 1
+                if source and source not in g["sources"]:
+                    g["sources"].append(source)
+                if summary and len(summary) > len(g["summary"]):
+                    g["summary"] = summary
+                break
+        else:
+            groups.append({"title": title, "summary": summary, "sources": [source] if source else [],
+                           "grams": grams, "numbers": numbers})
+    return groups, merged
+
+
+def _format_sources(sources: List[str]) -> str:
+    if len(sources) <= PROMPT_MAX_SOURCES:
+        return ", ".join(sources)
+    return f"{', '.join(sources[:PROMPT_MAX_SOURCES])} 외 {len(sources) - PROMPT_MAX_SOURCES}곳"
+
+
+def _format_group(i: int, g: Dict[str, Any], with_summary: bool = True) -> str:
+    lines = [f"\n[기사 {i}] {g['title']}\n"]
+    if with_summary and g["summary"]:
+        lines.append(f"요약: {g['summary']}\n")
+    if g["sources"]:
+        lines.append(f"출처: {_format_sources(g['sources'])}\n")
+    return "".join(lines)
+
+
+def format_articles_raw(articles: List[Dict[str, str]]) -> str:
+    """압축하지 않은 기사 목록 (절약량 비교 기준)."""
+    lines = []
+    for i, a in enumerate(articles, 1):
+        lines.append(f"\n[기사 {i}] {a.get('title', '')}\n")
+        if _body(a):
+            lines.append(f"요약: {_body(a)}\n")
+        if a.get("source"):
+            lines.append(f"출처: {a['source']}\n")
+    return "".join(lines)
+
+
+def pack_budget(articles: List[Dict[str, str]], keywords: int) -> int:
+    """키워드 keywords개를 한 프롬프트로 묶을 때 키워드 하나의 기사 목록 예산. (단독 요약 예산 이하)"""
+    single = FULLTEXT_PROMPT_BUDGET if any(a.get("content") for a in articles) else SUMMARY_PROMPT_BUDGET
+    return max(1, min(single, PACK_PROMPT_BUDGET // max(1, keywords)))
+
+
+def build_article_section(
+    articles: List[Dict[str, str]],
+    budget: Optional[int] = None,
+) -> Tuple[str, Dict[str, int]]:
+    """
+    프롬프트에 넣을 기사 목록 텍스트를 만듭니다.
+
+    Args:
+        articles: 기사 리스트 (중요한 순서대로)
+        budget: 토큰 예산 (기본 SUMMARY_PROMPT_BUDGET, 본문이 붙은 기사가 있으면 FULLTEXT_PROMPT_BUDGET,
+            0 이하면 무제한)
+
+    Returns:
+        (텍스트, {"articles", "merged", "omitted", "tokens_raw", "tokens_used", "tokens_saved"})
+    """
+    if budget is None:
+        budget = FULLTEXT_PROMPT_BUDGET if any(a.get("content") for a in articles) else SUMMARY_PROMPT_BUDGET
+    groups, merged = _group_articles(articles)
+
+    blocks = [_format_group(i, g) for i, g in enumerate(groups, 1)]
+    costs = [estimate_tokens(b) for b in blocks]
+    used = len(groups)
+    if budget > 0 and sum(costs) > budget:
+        # 뒤쪽 기사부터 요약 줄을 빼서 예산을 맞춤
+        for i in range(len(groups) - 1, 0, -1):
+            if sum(costs) <= budget:
+                break
+            blocks[i] = _format_group(i + 1, groups[i], with_summary=False)
+            costs[i] = estimate_tokens(blocks[i])
+        # 그래도 넘치면 뒤쪽 기사를 생략 (첫 기사는 항상 유지)
+        while used > 1 and sum(costs[:used]) > budget:
+            used -= 1
+
+    text = "".join(blocks[:used])
+    raw = estimate_tokens(format_articles_raw(articles))
+    tokens_used = estimate_tokens(text)
+    stats = {
+        "articles": len(articles),
+        "merged": merged,
+        "omitted": len(groups) - used,
+        "tokens_raw": raw,
+        "tokens_used": tokens_used,
+        "tokens_saved": max(0, raw - tokens_used),
+    }
+    _record(stats)
+    return text, stats
+
+
+def _record(stats: Dict[str, int]) -> None:
+    with _stats_lock:
+        _totals["prompts"] += 1
+        for name in ("articles", "merged", "omitted", "tokens_raw", "tokens_used"):
+            _totals[name] += stats[name]
+    metrics.inc("newsbot_prompt_tokens_saved_total", value=stats["tokens_saved"],
+                help="기사 목록 압축으로 줄인 추정 입력 토큰 수")
+    metrics.inc("newsbot_prompt_articles_merged_total", value=stats["merged"],
+                help="제목이 거의 같아 합친 기사 수")
+    metrics.add_request_tokens("prompt_saved_estimate", stats["tokens_saved"])
+
+
+def prompt_stats() -> Dict[str, Any]:
+    """지금까지 만든 요약 프롬프트의 누적 압축 통계를 반환합니다."""
+    with _stats_lock:
+        stats = dict(_totals)
+    stats["tokens_saved"] = max(0, stats["tokens_raw"] - stats["tokens_used"])
+    stats["saved_ratio"] = round(stats["tokens_saved"] / stats["tokens_raw"], 3) if stats["tokens_raw"] else 0.0
+    return stats
@@ -0,0 +1,471 @@
+"""
+Gemini 호출 제한기 (클라이언트 측 rate limit + 동시성 제한 + 재시도).
+
+요청이 몰리면 요약·대화가 제한 없이 동시에 generate_content를 호출해 Gemini의 분당 한도(429)에
+걸리고, 그 뒤로는 모든 호출이 함께 실패합니다. 이 모듈은 호출 전에 자리를 예약하게 합니다.
+- 토큰 버킷: 분당 요청 수(GEMINI_RPM)와 분당 토큰 수(GEMINI_TPM) 예산. 0이면 제한 없음.
+  토큰은 프롬프트 추정치 + GEMINI_OUTPUT_ESTIMATE로 미리 차감하고, 응답의 usage_metadata로 보정합니다.
+- 동시성: 최대 GEMINI_MAX_CONCURRENCY개 호출. 기다리는 호출은 우선순위 순서로 자리를 받습니다.
+- 우선순위: 대화(chat, chat_compact) > 요약(summary, summary_multi) > 백그라운드(prewarm 등, background()).
+  백그라운드 호출은 동시성·버킷 예산의 GEMINI_BACKGROUND_SHARE 비율까지만 쓰고 나머지는 대화용으로 남겨 둡니다.
+- 재시도: 429/5xx와 연결 오류는 지터를 준 지수 백오프로 최대 GEMINI_MAX_RETRIES번 다시 시도합니다.
+  429를 받으면 모든 호출이 함께 백오프 시간만큼 기다려 한도가 풀릴 때까지 재시도가 몰리지 않게 합니다.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import re
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, List, Optional
+
+import metrics
+from tokens import estimate_tokens
+
+GEMINI_RPM = int(os.environ.get("GEMINI_RPM", "0"))  # 분당 요청 수 (0 = 제한 없음)
+GEMINI_TPM = int(os.environ.get("GEMINI_TPM", "0"))  # 분당 토큰 수 (0 = 제한 없음)
+GEMINI_MAX_CONCURRENCY = int(os.environ.get("GEMINI_MAX_CONCURRENCY", "16"))
+GEMINI_BACKGROUND_SHARE = float(os.environ.get("GEMINI_BACKGROUND_SHARE", "0.75"))
+GEMINI_MAX_RETRIES = int(os.environ.get("GEMINI_MAX_RETRIES", "3"))
+GEMINI_RETRY_BASE = float(os.environ.get("GEMINI_RETRY_BASE", "0.5"))  # 첫 재시도 최대 대기(초)
+GEMINI_RETRY_MAX = float(os.environ.get("GEMINI_RETRY_MAX", "20"))  # 재시도 대기 상한(초)
+GEMINI_QUEUE_TIMEOUT = float(os.environ.get("GEMINI_QUEUE_TIMEOUT", "30"))  # 자리를 기다리는 최대 시간(초)
+GEMINI_OUTPUT_ESTIMATE = int(os.environ.get("GEMINI_OUTPUT_ESTIMATE", "800"))  # 응답 토큰 추정치
+
+PRIORITY_CHAT = 0
+PRIORITY_SUMMARY = 1
+PRIORITY_BACKGROUND = 2
+
+_KIND_PRIORITY = {
+    "chat": PRIORITY_CHAT,
+    "chat_compact": PRIORITY_CHAT,
+    "summary": PRIORITY_SUMMARY,
+    "summary_multi": PRIORITY_SUMMARY,
+}
+
+_RETRY_DELAY_RE = re.compile(r"^(\d+(?:\.\d+)?)s$")
+
+_background: "contextvars.ContextVar[bool]" = contextvars.ContextVar("gemini_background", default=False)
+
+
+class RateLimitError(RuntimeError):
+    """GEMINI_QUEUE_TIMEOUT 안에 호출 자리를 얻지 못했을 때 발생합니다."""
+
+
+@contextmanager
+def background():
+    """이 블록 안의 Gemini 호출을 백그라운드 우선순위로 처리합니다. (prewarm 등)"""
+    token = _background.set(True)
+    try:
+        yield
+    finally:
+        _background.reset(token)
+
+
+def priority_for(kind: str) -> int:
+    if _background.get():
+        return PRIORITY_BACKGROUND
+    return _KIND_PRIORITY.get(kind, PRIORITY_SUMMARY)
+
+
+class TokenBucket:
+    """분당 rate만큼 채워지는 버킷. 스레드 안전."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, amount: float, floor: float = 0.0) -> float:
+        """
+        amount만큼 꺼냅니다. 꺼낸 뒤에도 floor 이상이 남을 때만 꺼내고 0을 반환하며,
+        모자라면 아무것도 꺼내지 않고 기다려야 할 시간(초)을 반환합니다.
+        """
+        amount = min(amount, self.capacity - floor)
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens - amount >= floor:
+                self.tokens -= amount
+                return 0.0
+            return (amount + floor - self.tokens) / self.rate
+
+    def adjust(self, amount: float) -> None:
+        """미리 꺼낸 양을 실제 사용량에 맞춰 보정합니다. (양수면 더 꺼냄, 음수면 돌려줌)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self.tokens
+
+
+class _Waiter:
+    __slots__ = ("priority", "wake", "granted", "cancelled")
+
+    def __init__(self, priority: int, wake):
+        self.priority = priority
+        self.wake = wake
+        self.granted = False
+        self.cancelled = False
+
+
+class PrioritySemaphore:
+    """
+    우선순위 세마포어. 자리가 나면 가장 높은 우선순위(작은 값)의 대기자에게 바로 넘깁니다.
+    스레드(acquire)와 asyncio(acquire_async) 대기자를 함께 받습니다.
+    caps로 우선순위별 최대 사용 수를 정할 수 있으며, 낮은 우선순위일수록 cap이 같거나 작아야 합니다.
+    """
+
+    def __init__(self, limit: int, caps: Optional[Dict[int, int]] = None):
+        self.limit = max(1, limit)
+        self.caps = caps or {}
+        self.in_use = 0
+        self._by_priority: Dict[int, int] = {}
+        self._heap: List[Any] = []  # (priority, seq, waiter)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def _can_run(self, priority: int) -> bool:
+        return (self.in_use < self.limit
+                and self._by_priority.get(priority, 0) < self.caps.get(priority, self.limit))
+
+    def _take(self, priority: int) -> None:
+        self.in_use += 1
+        self._by_priority[priority] = self._by_priority.get(priority, 0) + 1
+
+    def _try_fast(self, priority: int) -> bool:
+        # 앞선(같거나 높은 우선순위) 대기자가 없을 때만 바로 자리를 가져감
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+        if self._heap and self._heap[0][0] <= priority:
+            return False
+        if self._can_run(priority):
+            self._take(priority)
+            return True
+        return False
+
+    def _dispatch(self) -> list:
+        """락을 잡은 상태에서 자리를 넘길 대기자를 고르고, 깨울 대기자 목록을 반환합니다."""
+        woken = []
+        while self._heap and self.in_use < self.limit:
+            priority, _, waiter = self._heap[0]
+            if waiter.cancelled:
+                heapq.heappop(self._heap)
+                continue
+            if not self._can_run(priority):
+                break
+            heapq.heappop(self._heap)
+            self._take(priority)
+            waiter.granted = True
+            woken.append(waiter)
+        return woken
+
+    def _wake(self, woken: list) -> None:
+        for waiter in woken:
+            try:
+                waiter.wake()
+            except RuntimeError:
+                # 대기하던 이벤트 루프가 이미 닫힘: 받은 자리를 돌려줌
+                self.release(waiter.priority)
+
+    def acquire(self, priority: int, timeout: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._try_fast(priority):
+                return True
+            event = threading.Event()
+            waiter = _Waiter(priority, event.set)
+            heapq.heappush(self._heap, (priority, next(self._seq), waiter))
+        event.wait(timeout)
+        with self._lock:
+            if waiter.granted:
+                return True
+            waiter.cancelled = True
+            return False
+
+    async def acquire_async(self, priority: int, timeout: Optional[float] = None) -> bool:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._try_fast(priority):
+                return True
+            future = loop.create_future()
+
+            def wake():
+                loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+            waiter = _Waiter(priority, wake)
+            heapq.heappush(self._heap, (priority, next(self._seq), waiter))
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            with self._lock:
+                waiter.cancelled = True
+                granted = waiter.granted
+            if granted:
+                self.release(priority)
+            raise
+        with self._lock:
+            if waiter.granted:
+                return True
+            waiter.cancelled = True
+            return False
+
+    def release(self, priority: int) -> None:
+        with self._lock:
+            self.in_use -= 1
+            self._by_priority[priority] = self._by_priority.get(priority, 1) - 1
+            woken = self._dispatch()
+        self._wake(woken)
+
+    def waiting(self) -> int:
+        with self._lock:
+            return sum(1 for _, _, w in self._heap if not w.cancelled)
+
+
+def _reserve_share(budget: float) -> float:
+    # 백그라운드 호출이 남겨 두어야 하는 예산
+    return budget * (1.0 - GEMINI_BACKGROUND_SHARE)
+
+
+class GeminiLimiter:
+    """RPM/TPM 버킷, 우선순위 세마포어, 429 공동 백오프를 묶은 제한기."""
+
+    def __init__(self, rpm: int = GEMINI_RPM, tpm: int = GEMINI_TPM, concurrency: int = GEMINI_MAX_CONCURRENCY):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        background_cap = max(1, int(concurrency * GEMINI_BACKGROUND_SHARE))
+        self.slots = PrioritySemaphore(concurrency, {PRIORITY_BACKGROUND: background_cap})
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "retries": 0, "throttled": 0, "rejected": 0, "wait_seconds": 0.0}
+
+    def _budget_wait(self, priority: int, cost: int) -> float:
+        """버킷·공동 백오프 때문에 기다려야 할 시간(초). 0이면 예산을 꺼낸 상태."""
+        wait = self._blocked_until - time.monotonic()
+        if wait > 0:
+            return wait
+        background = priority == PRIORITY_BACKGROUND
+        if self.requests is not None:
+            floor = _reserve_share(self.requests.capacity) if background else 0.0
+            wait = self.requests.try_take(1, floor)
+            if wait > 0:
+                return wait
+        if self.tokens is not None:
+            floor = _reserve_share(self.tokens.capacity) if background else 0.0
+            wait = self.tokens.try_take(cost, floor)
+            if wait > 0:
+                if self.requests is not None:
+                    self.requests.adjust(-1)
+                return wait
+        return 0.0
+
+    def _refund(self, cost: int) -> None:
+        if self.requests is not None:
+            self.requests.adjust(-1)
+        if self.tokens is not None:
+            self.tokens.adjust(-cost)
+
+    def _reject(self, kind: str) -> None:
+        with self._lock:
+            self.stats["rejected"] += 1
+        metrics.inc("newsbot_gemini_rejected_total", {"kind": kind},
+                    help="대기 시간 초과로 보내지 못한 Gemini 호출 수")
+        raise RateLimitError("Gemini 호출 한도를 기다리다 시간이 초과되었습니다.")
+
+    def _granted(self, kind: str, started: float) -> None:
+        waited = time.monotonic() - started
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["wait_seconds"] += waited
+        metrics.record_stage("gemini_queue", waited, kind=kind)
+
+    @contextmanager
+    def slot(self, kind: str, cost: int):
+        """예산과 동시성 자리를 얻을 때까지 기다린 뒤 블록을 실행합니다. yield 값은 _Permit."""
+        priority = priority_for(kind)
+        started = time.monotonic()
+        deadline = started + GEMINI_QUEUE_TIMEOUT
+        while True:
+            wait = self._budget_wait(priority, cost)
+            if wait <= 0:
+                break
+            if time.monotonic() >= deadline:
+                self._reject(kind)
+            time.sleep(min(wait, max(0.01, deadline - time.monotonic())))
+        if not self.slots.acquire(priority, max(0.0, deadline - time.monotonic())):
+            self._refund(cost)
+            self._reject(kind)
+        self._granted(kind, started)
+        try:
+            yield _Permit(self, cost)
+        finally:
+            self.slots.release(priority)
+
+    @asynccontextmanager
+    async def aslot(self, kind: str, cost: int):
+        """slot()의 asyncio 버전."""
+        priority = priority_for(kind)
+        started = time.monotonic()
+        deadline = started + GEMINI_QUEUE_TIMEOUT
+        while True:
+            wait = self._budget_wait(priority, cost)
+            if wait <= 0:
+                break
+            if time.monotonic() >= deadline:
+                self._reject(kind)
+            await asyncio.sleep(min(wait, max(0.01, deadline - time.monotonic())))
+        if not await self.slots.acquire_async(priority, max(0.0, deadline - time.monotonic())):
+            self._refund(cost)
+            self._reject(kind)
+        self._granted(kind, started)
+        try:
+            yield _Permit(self, cost)
+        finally:
+            self.slots.release(priority)
+
+    def retry_delay(self, error: BaseException, attempt: int, kind: str) -> Optional[float]:
+        """
+        error가 재시도할 오류이고 attempt(0부터)번째 재시도가 허용되면 기다릴 시간(초)을, 아니면 None을 반환합니다.
+        429면 모든 호출이 이 시간 동안 새 호출을 보내지 않습니다.
+        """
+        reason = retry_reason(error)
+        if reason is None or attempt >= GEMINI_MAX_RETRIES:
+            return None
+        # full jitter: 0 ~ min(상한, base * 2^attempt)
+        delay = random.uniform(0, min(GEMINI_RETRY_MAX, GEMINI_RETRY_BASE * (2 ** attempt)))
+        hinted = _retry_after(error)
+        if hinted is not None:
+            delay = max(delay, min(hinted, GEMINI_RETRY_MAX))
+        with self._lock:
+            self.stats["retries"] += 1
+            if reason == "429":
+                self.stats["throttled"] += 1
+                self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+        metrics.inc("newsbot_gemini_retries_total", {"kind": kind, "reason": reason},
+                    help="Gemini 호출 재시도 횟수 (사유별)")
+        return delay
+
+    def has_headroom(self) -> bool:
+        """공동 백오프 중이 아니고, 기다리는 호출 없이 자리와 분당 요청 예산이 남아 있는지. (헤지 요청 판단용)"""
+        if self._blocked_until > time.monotonic():
+            return False
+        if self.requests is not None and self.requests.available() < 1:
+            return False
+        return self.slots.in_use < self.slots.limit and self.slots.waiting() == 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            blocked = max(0.0, self._blocked_until - time.monotonic())
+        stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+        stats.update({
+            "in_flight": self.slots.in_use,
+            "waiting": self.slots.waiting(),
+            "max_concurrency": self.slots.limit,
+            "backoff_seconds": round(blocked, 3),
+            "rpm_available": round(self.requests.available(), 1) if self.requests else None,
+            "tpm_available": round(self.tokens.available(), 1) if self.tokens else None,
+        })
+        return stats
+
+
+class _Permit:
+    __slots__ = ("limiter", "cost")
+
+    def __init__(self, limiter: GeminiLimiter, cost: int):
+        self.limiter = limiter
+        self.cost = cost
+
+    def settle(self, response) -> None:
+        """응답의 실제 토큰 수로 TPM 버킷의 추정치를 보정합니다."""
+        if self.limiter.tokens is None or response is None:
+            return
+        usage = getattr(response, "usage_metadata", None)
+        total = getattr(usage, "total_token_count", None) if usage is not None else None
+        if total:
+            self.limiter.tokens.adjust(total - self.cost)
+            self.cost = total
+
+
+def retry_reason(error: BaseException) -> Optional[str]:
+    """재시도할 오류면 사유("429", "5xx", "network"), 아니면 None."""
+    code = getattr(error, "code", None)
+    if isinstance(code, int) and getattr(error, "status", None) is not None:
+        if code == 429:
+            return "429"
+        if code >= 500:
+            return "5xx"
+        return None
+    try:
+        import httpx
+    except ImportError:
+        return None
+    if isinstance(error, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)):
+        return "network"
+    return None
+
+
+def is_throttled(error: BaseException) -> bool:
+    """한도 초과(대기 시간 초과 또는 재시도 후에도 429)로 실패했는지 여부."""
+    return isinstance(error, RateLimitError) or retry_reason(error) == "429"
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    # 429 응답의 RetryInfo.retryDelay("12s") 또는 Retry-After 헤더
+    details = getattr(error, "details", None)
+    if isinstance(details, dict):
+        for item in (details.get("error") or {}).get("details") or []:
+            if isinstance(item, dict) and str(item.get("@type", "")).endswith("RetryInfo"):
+                m = _RETRY_DELAY_RE.match(str(item.get("retryDelay", "")))
+                if m:
+                    return float(m.group(1))
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    value = headers.get("retry-after") if headers is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def estimate_cost(contents: str) -> int:
+    """TPM 버킷에서 미리 꺼낼 토큰 수 (프롬프트 추정치 + 응답 추정치)."""
+    return estimate_tokens(contents) + GEMINI_OUTPUT_ESTIMATE
+
+
+_limiter = GeminiLimiter()
+
+
+def get_limiter() -> GeminiLimiter:
+    return _limiter
+
+
+def limiter_stats() -> Dict[str, Any]:
+    """제한기 현재 상태와 누적 통계 (/api/stats용)."""
+    return _limiter.snapshot()
+
+
+def _collect_metrics():
+    stats = _limiter.snapshot()
+    yield "newsbot_gemini_in_flight", {}, stats["in_flight"]
+    yield "newsbot_gemini_waiting", {}, stats["waiting"]
+    yield "newsbot_gemini_backoff_seconds", {}, stats["backoff_seconds"]
+    if stats["rpm_available"] is not None:
+        yield "newsbot_gemini_budget_available", {"budget": "rpm"}, stats["rpm_available"]
+    if stats["tpm_available"] is not None:
+        yield "newsbot_gemini_budget_available", {"budget": "tpm"}, stats["tpm_available"]
+
+
+metrics.register_collector(_collect_metrics)
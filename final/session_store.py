@@ -0,0 +1,109 @@
+"""
+Flask 서버 측 세션 저장소.
+
+기본 Flask 세션은 기사 10건·요약 전체를 서명된 쿠키에 담아 매 요청마다 주고받으므로
+헤더가 커지고(브라우저 쿠키 한도 4KB 초과 가능) 직렬화·서명 비용이 듭니다.
+이 모듈은 세션 데이터를 서버 저장소(cache.py)에 두고 쿠키에는 무작위 세션 ID만 담습니다.
+
+SESSION_BACKEND: memory(기본, 프로세스 내 LRU + TTL) | sqlite | redis | cookie(기존 방식)
+- gunicorn 워커가 여러 개면 sqlite(CACHE_SQLITE_PATH) 또는 redis(REDIS_URL, Redis 호환 서버)를 사용하세요.
+- SESSION_TTL: 마지막 저장 후 세션 유지 시간(초), SESSION_MAX_ENTRIES: memory/sqlite 최대 세션 수
+"""
+import os
+import re
+import secrets
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+from cache import create_cache
+
+SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "memory").strip().lower()
+SESSION_TTL = float(os.environ.get("SESSION_TTL", str(24 * 3600)))
+SESSION_MAX_ENTRIES = int(os.environ.get("SESSION_MAX_ENTRIES", "10000"))
+
+_SID_RE = re.compile(r"^[A-Za-z0-9_-]{32,64}$")
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """세션 ID와 변경 여부를 추적하는 dict."""
+
+    def __init__(self, initial=None, sid: str = "", new: bool = False):
+        def on_update(self):
+            self.modified = True
+            self.accessed = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.accessed = False
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """세션 데이터는 store(get/set/delete 캐시)에, 쿠키에는 세션 ID만 저장합니다."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid and _SID_RE.match(sid):
+            data = self.store.get(sid)
+            if data is not None:
+                return ServerSession(data, sid=sid)
+        return ServerSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def persist(self, session) -> None:
+        """응답 헤더를 보낸 뒤(스트리밍 중)에도 세션 변경을 저장할 수 있도록 즉시 저장합니다."""
+        if isinstance(session, ServerSession) and session:
+            self.store.set(session.sid, dict(session), ttl=SESSION_TTL)
+            session.modified = False
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if not session:
+            # 비워진 세션은 저장소와 쿠키에서 모두 제거
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if session.modified or session.new:
+            self.store.set(session.sid, dict(session), ttl=SESSION_TTL)
+        if session.new or (session.permanent and self.should_set_cookie(app, session)):
+            options = {}
+            # SESSION_COOKIE_PARTITIONED는 Flask 3.1부터 지원 (이전 버전에서는 설정할 수 없으므로 생략)
+            if getattr(self, "get_cookie_partitioned", lambda a: False)(app):
+                options["partitioned"] = True
+            response.set_cookie(
+                name,
+                session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+                **options,
+            )
+
+
+def init_app(app, backend: str = SESSION_BACKEND) -> None:
+    """app.session_interface를 backend에 맞는 서버 측 세션으로 바꿉니다. ("cookie"면 그대로 둠)"""
+    if backend == "cookie":
+        return
+    store = create_cache(backend, namespace="session", maxsize=SESSION_MAX_ENTRIES, ttl=SESSION_TTL)
+    app.session_interface = ServerSideSessionInterface(store)
+
+
+def persist_session(app, session) -> None:
+    """서버 측 세션이면 현재 세션을 즉시 저장합니다. (쿠키 세션은 응답 이후 저장할 수 없으므로 무시)"""
+    interface = app.session_interface
+    if isinstance(interface, ServerSideSessionInterface):
+        interface.persist(session)
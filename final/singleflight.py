@@ -0,0 +1,101 @@
+"""
+같은 키로 동시에 들어온 호출을 하나로 합칩니다 (single-flight).
+
+속보가 터져 여러 워커 스레드가 같은 키워드로 동시에 수집/요약을 요청하면,
+첫 호출만 실제로 Google News·Gemini를 호출하고 나머지는 그 결과를 기다려 함께 받습니다.
+- SingleFlight: 스레드 기반 (Flask/gunicorn)
+- AsyncSingleFlight: asyncio 기반 (같은 이벤트 루프 안의 코루틴끼리 공유)
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "shared")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.shared = 0
+
+
+class SingleFlight:
+    """스레드 간 single-flight. 결과(또는 예외)는 기다리던 모든 호출자에게 그대로 전달됩니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.executed = 0  # 실제로 fn을 실행한 횟수
+        self.coalesced = 0  # 진행 중인 호출에 합류한 횟수
+
+    def do(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.shared += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
+
+
+class AsyncSingleFlight:
+    """asyncio용 single-flight. 한 호출자가 취소돼도 공유 중인 작업은 계속 진행됩니다."""
+
+    def __init__(self):
+        self._calls: Dict[str, "asyncio.Future[Any]"] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        task = self._calls.get(key)
+        if task is not None and not task.done():
+            self.coalesced += 1
+        else:
+            self.executed += 1
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._calls[key] = task
+
+            def _cleanup(t, key=key):
+                if self._calls.get(key) is t:
+                    del self._calls[key]
+
+            task.add_done_callback(_cleanup)
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
@@ -0,0 +1,24 @@
+"""
+Server-Sent Events(SSE) 직렬화 도우미.
+
+스트리밍 엔드포인트는 다음 이벤트를 보냅니다.
+- (기본 message) data: {"text": "..."}  생성된 텍스트 조각
+- event: done    data: {"ok": true, ...}  전체 결과
+- event: error   data: {"ok": false, "error": "..."}
+"""
+import json
+from typing import Any, Dict, Optional
+
+SSE_HEADERS = {
+    "Content-Type": "text/event-stream; charset=utf-8",
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # 프록시(nginx 등) 버퍼링 방지
+}
+
+
+def format_sse(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """dict 하나를 SSE 이벤트 문자열로 직렬화합니다."""
+    payload = json.dumps(data, ensure_ascii=False)
+    if event:
+        return f"event: {event}\ndata: {payload}\n\n"
+    return f"data: {payload}\n\n"
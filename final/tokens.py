@@ -0,0 +1,15 @@
+"""
+프롬프트 토큰 수 추정기.
+
+실제 토큰 수는 모델 토크나이저에 따라 다르지만, 프롬프트 예산을 나누는 용도로는
+문자 종류별 평균 비율로 충분합니다. (영문·숫자 약 4자/토큰, 한글 등 비ASCII 약 1.5자/토큰)
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """text의 대략적인 토큰 수를 반환합니다."""
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    other_chars = len(text) - ascii_chars
+    return int(ascii_chars / 4 + other_chars / 1.5) + 1